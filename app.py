@@ -11,28 +11,27 @@ import dash_bootstrap_components as dbc
 from dotenv import load_dotenv
 from dash import html, Input, Output
 from controllers import home_controller
+from controllers.metricas import instrumentar_app
+from controllers.recorrencias import materializar_se_necessario
 
 # Estas importações são necessárias para registrar os callbacks, mesmo que não sejam usadas diretamente
 # no código, elas executam seu código durante a importação
 from controllers import cadastro_controller  # noqa: F401
 import callbacks  # noqa: F401 - Importando os callbacks
 from models import database
-from models.database import atualizar_estrutura_banco
-from views.transacoes_view import transacoes_layout
-from views.cadastros_view import cadastros_layout
-from views.visualizar_transacoes_view import (
-    get_layout as visualizar_transacoes_layout,
-)
+from models.migracoes import exibir_progresso
 
 load_dotenv()
 db_path = database.DB_PATH
 
 if not Path(db_path).exists():
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    database.criar_tabelas()
 
-# Atualizar a estrutura do banco para adicionar novas colunas às tabelas existentes
-atualizar_estrutura_banco()
+# Aplicar as migrações pendentes (apenas uma comparação de versão se o esquema estiver atualizado)
+database.atualizar_estrutura_banco(exibir_progresso)
+
+# Gravar as ocorrências de recorrências que venceram desde a última execução
+materializar_se_necessario()
 
 app = dash.Dash(
     __name__,
@@ -41,24 +40,30 @@ app = dash.Dash(
 )
 server = app.server
 
+# Tempo, custo no banco e tamanho da resposta de cada callback, em /metrics
+instrumentar_app(app)
+
 app.layout = html.Div(
     [html.H1('Bem-vindo ao Projeto Dash MVC'), home_controller.layout()]
 )
 
 
-@app.callback(
-    Output('tabs-content', 'children', allow_duplicate=True),
+# Trocar de aba apenas mostra o conteúdo já montado da aba escolhida
+app.clientside_callback(
+    """
+    function(aba) {
+        return dash_clientside.callback_context.outputs_list.map(function(saida) {
+            return saida.id === 'conteudo-' + aba ? {} : {display: 'none'};
+        });
+    }
+    """,
+    [
+        Output(home_controller.id_conteudo_aba(valor), 'style')
+        for valor, _, _ in home_controller.ABAS
+    ],
     [Input('tabs', 'value')],
-    prevent_initial_call='initial_duplicate',
+    prevent_initial_call=True,
 )
-def render_content(tab):
-    """Renderiza o conteúdo da tab selecionada."""
-    if tab == 'transacoes':
-        return transacoes_layout()
-    elif tab == 'cadastros':
-        return cadastros_layout()
-    elif tab == 'visualizar-transacoes':
-        return visualizar_transacoes_layout()
 
 
 if __name__ == '__main__':
@@ -1,10 +1,11 @@
 """
 Script para atualizar a estrutura do banco de dados.
-Este script adiciona novas colunas às tabelas existentes.
+Este script aplica as migrações pendentes do esquema, exibindo o progresso.
 """
 from models.database import atualizar_estrutura_banco
+from models.migracoes import exibir_progresso
 
 if __name__ == '__main__':
     print('Iniciando atualização da estrutura do banco de dados...')
-    atualizar_estrutura_banco()
+    atualizar_estrutura_banco(exibir_progresso)
     print('Atualização concluída.')
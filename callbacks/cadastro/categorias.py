@@ -2,7 +2,8 @@
 Este módulo define os callbacks para o cadastro e gerenciamento de categorias.
 """
 
-from dash import callback, Input, Output, State
+from dash import callback, ctx, Input, Output, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from controllers.cadastro.categorias import (
     cadastrar_categoria as controller_cadastrar_categoria,
@@ -51,16 +52,22 @@ def salvar_categoria(n_clicks, nome):
         Input('btn-salvar-categoria', 'n_clicks'),
         Input('modal-editar-categoria', 'is_open'),
         Input('btn-excluir-categoria', 'n_clicks'),
+        Input('tabs', 'value'),
     ],
     prevent_initial_call=True,
 )
 def atualizar_categorias(
-    n_clicks_atualizar, n_clicks_salvar, modal_aberto, n_clicks_excluir
+    n_clicks_atualizar, n_clicks_salvar, modal_aberto, n_clicks_excluir, aba
 ):
     """
     Callback para atualizar a lista de categorias.
-    Atualiza quando o botão é clicado ou quando uma categoria é salva/editada.
+    Atualiza quando o botão é clicado, quando uma categoria é salva/editada ou
+    quando a aba de cadastros é aberta.
     """
+    # Ao trocar de aba, a tabela só é carregada quando a aba de cadastros é aberta
+    if ctx.triggered_id == 'tabs' and aba != 'cadastros':
+        raise PreventUpdate
+
     resultado = controller_listar_categorias()
     if resultado['success']:
         categorias = resultado['categorias']
@@ -2,7 +2,7 @@
 Este módulo define os callbacks para o cadastro, edição e exclusão de contas.
 """
 
-from dash import callback, Output, Input, State, html, no_update
+from dash import callback, ctx, clientside_callback, Output, Input, State, html, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from controllers.cadastro.contas import (
@@ -20,13 +20,18 @@ from controllers.cadastro.contas import (
         Input('btn-salvar-conta', 'n_clicks'),
         Input('btn-salvar-editar-conta', 'n_clicks'),
         Input('btn-excluir-conta', 'n_clicks'),
+        Input('tabs', 'value'),
     ],
     prevent_initial_call=True,
 )
-def atualizar_contas(n_atualizar, n_salvar, n_editar, n_excluir):
+def atualizar_contas(n_atualizar, n_salvar, n_editar, n_excluir, aba):
     """
-    Atualiza a tabela de contas.
+    Atualiza a tabela de contas (também ao abrir a aba de cadastros).
     """
+    # Ao trocar de aba, a tabela só é carregada quando a aba de cadastros é aberta
+    if ctx.triggered_id == 'tabs' and aba != 'cadastros':
+        raise PreventUpdate
+
     resultado = controller_listar_contas()
     if not resultado['success']:
         return html.Div(
@@ -288,7 +293,17 @@ def salvar_edicao_conta(
         return dbc.Alert(resultado['message'], color='danger'), no_update
 
 
-@callback(
+# Callback para mostrar/esconder campos específicos do tipo de conta no modal de edição
+clientside_callback(
+    """
+    function(tipoConta) {
+        const cartao = tipoConta === 'cartao';
+        return [
+            {display: cartao ? 'block' : 'none'},
+            {display: cartao ? 'none' : 'block'}
+        ];
+    }
+    """,
     [
         Output('campos-editar-cartao-credito', 'style', allow_duplicate=True),
         Output('campos-editar-outros-tipos', 'style', allow_duplicate=True),
@@ -296,14 +311,6 @@ def salvar_edicao_conta(
     [Input('select-editar-tipo-conta', 'value')],
     prevent_initial_call=True,
 )
-def toggle_campos_editar_conta(tipo_conta):
-    """
-    Callback para mostrar/esconder campos específicos de acordo com o tipo de conta no modal de edição.
-    """
-    if tipo_conta == 'cartao':
-        return {'display': 'block'}, {'display': 'none'}
-    else:
-        return {'display': 'none'}, {'display': 'block'}
 
 
 @callback(
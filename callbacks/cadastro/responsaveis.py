@@ -2,7 +2,7 @@
 Este módulo define os callbacks para o cadastro, edição e exclusão de responsáveis.
 """
 
-from dash import callback, Output, Input, State, html, no_update
+from dash import callback, ctx, Output, Input, State, html, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from controllers.cadastro.responsaveis import (
@@ -19,13 +19,18 @@ from controllers.cadastro.responsaveis import (
         Input('btn-salvar-responsavel', 'n_clicks'),
         Input('btn-salvar-editar-responsavel', 'n_clicks'),
         Input('btn-excluir-responsavel', 'n_clicks'),
+        Input('tabs', 'value'),
     ],
     prevent_initial_call=True,
 )
-def atualizar_responsaveis(n_atualizar, n_salvar, n_editar, n_excluir):
+def atualizar_responsaveis(n_atualizar, n_salvar, n_editar, n_excluir, aba):
     """
-    Atualiza a tabela de responsáveis.
+    Atualiza a tabela de responsáveis (também ao abrir a aba de cadastros).
     """
+    # Ao trocar de aba, a tabela só é carregada quando a aba de cadastros é aberta
+    if ctx.triggered_id == 'tabs' and aba != 'cadastros':
+        raise PreventUpdate
+
     resultado = controller_listar_responsaveis()
     if not resultado['success']:
         return html.Div(
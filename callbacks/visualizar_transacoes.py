@@ -2,43 +2,150 @@
 Este módulo define os callbacks para a aba de visualização de transações.
 """
 
-from dash import callback, Output, Input, State, html, dash_table, no_update
+from dash import (
+    callback,
+    clientside_callback,
+    Output,
+    Input,
+    State,
+    Patch,
+    html,
+    dash_table,
+    no_update,
+)
 from dash.exceptions import PreventUpdate
 import dash
 import dash_bootstrap_components as dbc
 from controllers.visualizar_transacoes import (
-    listar_transacoes,
+    listar_pagina_transacoes,
+    resumir_transacoes,
     obter_transacao,
+    obter_linha_transacao,
     editar_transacao,
     excluir_transacao,
 )
-from controllers.cadastro.categorias import listar_categorias
-from controllers.cadastro.responsaveis import listar_responsaveis
-from controllers.cadastro.contas import listar_contas
-from controllers.cadastro.pagamentos import listar_pagamentos
+from models.dimensoes import obter_dimensoes
+from models.dinheiro import para_centavos
 import locale
+import math
 from datetime import datetime
 
 # Configurar formatação de moeda para R$
 locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 
+# Quantidade de transações por página na tabela
+TAMANHO_PAGINA = 15
+
+
+# Campos das transações exibidos na tabela
+CAMPOS_TABELA = (
+    'id',
+    'data',
+    'valor',
+    'tipo',
+    'descricao',
+    'conta',
+    'categoria',
+    'status',
+)
+
+
+def linhas_tabela(transacoes):
+    """
+    Converte as transações no formato de linhas da tabela de visualização,
+    materializando apenas os campos exibidos.
+    """
+    return transacoes.para_dicionarios(CAMPOS_TABELA)
+
+
+def ajustar_totais(totais, tipo, valor, sinal=1):
+    """
+    Soma (sinal=1) ou subtrai (sinal=-1) a contribuição de uma transação aos
+    totais exibidos, como em TransacoesRepository.calcular_totais.
+
+    :param totais: Patch do Store 'totais-transacoes'
+    :param tipo: Tipo da transação ('receita' ou 'despesa')
+    :param valor: Valor da transação em centavos, negativo para despesas
+    """
+    if tipo == 'receita':
+        totais['receitas'] += sinal * valor
+    else:
+        totais['despesas'] -= sinal * valor
+
+
+def totais_do_resumo(resumo):
+    """
+    Converte os totais de resumir_transacoes no formato do Store
+    'totais-transacoes' (centavos).
+    """
+    return {
+        'receitas': para_centavos(resumo['total_receitas']),
+        'despesas': para_centavos(resumo['total_despesas']),
+    }
+
+
+def recarregar_pagina(filtros, pagina, sort_by, filter_query):
+    """
+    Lê novamente a página exibida da tabela e os totais, para alterações que
+    atingem outras linhas além da selecionada (editar ou excluir o modelo de
+    uma recorrência muda todas as suas ocorrências virtuais).
+
+    :return: Tupla (linhas da página, quantidade de páginas, totais), ou None
+        se a consulta falhar
+    """
+    resumo = resumir_transacoes(filtros)
+    contagem = resumir_transacoes(filtros, filter_query) if filter_query else resumo
+    resultado = listar_pagina_transacoes(
+        filtros,
+        TAMANHO_PAGINA,
+        pagina or 0,
+        sort_by=sort_by,
+        filter_query=filter_query,
+    )
+    if not (resumo['success'] and contagem['success'] and resultado['success']):
+        return None
+    return (
+        linhas_tabela(resultado['transacoes']),
+        max(1, math.ceil(contagem['total_registros'] / TAMANHO_PAGINA)),
+        totais_do_resumo(resumo),
+    )
+
+
+def paginacao_apos_remocao(filtros, filter_query, pagina, cursores):
+    """
+    Recalcula a quantidade de páginas depois que uma linha sai da tabela e
+    descarta os cursores (keyset) da página dela em diante, cujas últimas
+    linhas mudaram.
+
+    :return: Tupla (quantidade de páginas, cursores)
+    """
+    contagem = resumir_transacoes(filtros, filter_query)
+    paginas = (
+        max(1, math.ceil(contagem['total_registros'] / TAMANHO_PAGINA))
+        if contagem['success']
+        else no_update
+    )
+    pagina = pagina or 0
+    cursores = {
+        chave: cursor
+        for chave, cursor in (cursores or {}).items()
+        if int(chave) < pagina
+    }
+    return paginas, cursores
+
 
 # Callback para habilitar/desabilitar filtros de acordo com a seleção de período
-@callback(
+clientside_callback(
+    """
+    function(periodo) {
+        // 'mes' habilita mês e ano, 'ano' apenas o ano e 'todos' nenhum
+        return [periodo !== 'mes', periodo !== 'mes' && periodo !== 'ano'];
+    }
+    """,
     [Output('filtro-mes', 'disabled'), Output('filtro-ano', 'disabled')],
     [Input('filtro-periodo', 'value')],
     prevent_initial_call=True,
 )
-def atualizar_filtros_periodo(periodo):
-    """
-    Atualiza o estado de habilitação dos filtros de mês e ano de acordo com o período selecionado.
-    """
-    if periodo == 'mes':
-        return False, False
-    elif periodo == 'ano':
-        return True, False
-    else:  # 'todos'
-        return True, True
 
 
 # Callback para carregar opções para os filtros de conta e categoria
@@ -53,37 +160,18 @@ def carregar_opcoes_filtros(tab):
     if tab != 'visualizar-transacoes':
         raise PreventUpdate
 
-    # Contas
-    resultado_contas = listar_contas()
-    opcoes_contas = []
-    if resultado_contas['success']:
-        opcoes_contas = [
-            {
-                'label': f"{conta['nome']} ({conta['tipo']})",
-                'value': conta['id'],
-            }
-            for conta in resultado_contas['contas']
-        ]
-
-    # Categorias
-    resultado_categorias = listar_categorias()
-    opcoes_categorias = []
-    if resultado_categorias['success']:
-        opcoes_categorias = [
-            {'label': cat['nome'], 'value': cat['id']}
-            for cat in resultado_categorias['categorias']
-        ]
-
-    return opcoes_contas, opcoes_categorias
+    dimensoes = obter_dimensoes()
+    return dimensoes.opcoes('contas'), dimensoes.opcoes('categorias')
 
 
 # Callback para carregar transações baseadas nos filtros
 @callback(
     [
         Output('tabela-visualizar-transacoes', 'children'),
-        Output('badge-total-receitas', 'children'),
-        Output('badge-total-despesas', 'children'),
-        Output('badge-saldo-periodo', 'children'),
+        Output('totais-transacoes', 'data'),
+        Output('feedback-visualizar-transacoes', 'children'),
+        Output('filtros-transacoes', 'data'),
+        Output('paginacao-transacoes', 'data'),
     ],
     [Input('tabs', 'value'), Input('btn-aplicar-filtros', 'n_clicks')],
     [
@@ -101,7 +189,8 @@ def carregar_transacoes(
     tab, n_clicks, periodo, mes, ano, conta_id, categoria_id, tipo, status
 ):
     """
-    Carrega as transações com base nos filtros selecionados.
+    Carrega a primeira página de transações e os totais com base nos filtros selecionados.
+    As demais páginas são buscadas sob demanda por paginar_transacoes.
     """
     if tab != 'visualizar-transacoes':
         raise PreventUpdate
@@ -117,26 +206,30 @@ def carregar_transacoes(
         'status': status,
     }
 
-    # Carregar transações
-    resultado = listar_transacoes(filtros)
+    # Carregar totais e a primeira página de transações
+    resumo = resumir_transacoes(filtros)
+    resultado = listar_pagina_transacoes(filtros, TAMANHO_PAGINA)
 
-    if not resultado['success']:
+    if not resumo['success'] or not resultado['success']:
+        erro = resumo.get('error') or resultado.get('error')
         return (
             html.Div(
                 dbc.Alert(
-                    f"Erro ao carregar transações: {resultado.get('error')}",
+                    f'Erro ao carregar transações: {erro}',
                     color='danger',
                 )
             ),
-            '',
-            '',
-            '',
+            None,
+            None,
+            filtros,
+            {},
         )
 
     transacoes = resultado['transacoes']
-    total_receitas = resultado['total_receitas']
-    total_despesas = resultado['total_despesas']
-    saldo = resultado['saldo']
+    totais = totais_do_resumo(resumo)
+    total_paginas = max(
+        1, math.ceil(resumo['total_registros'] / TAMANHO_PAGINA)
+    )
 
     # Se não houver dados, exibir mensagem
     if not transacoes:
@@ -147,9 +240,10 @@ def carregar_transacoes(
                     color='warning',
                 )
             ),
-            'Receitas: R$ 0,00',
-            'Despesas: R$ 0,00',
-            'Saldo: R$ 0,00',
+            totais,
+            None,
+            filtros,
+            {},
         )
 
     # Preparar dados para a tabela
@@ -169,20 +263,7 @@ def carregar_transacoes(
         {'name': 'Status', 'id': 'status'},
     ]
 
-    data = []
-    for t in transacoes:
-        data.append(
-            {
-                'id': t['id'],
-                'data': t['data'],
-                'valor': t['valor'],
-                'tipo': t['tipo'],
-                'descricao': t['descricao'],
-                'conta': t['conta'],
-                'categoria': t['categoria'],
-                'status': t['status'],
-            }
-        )
+    data = linhas_tabela(transacoes)
 
     # Criar tabela com botões de ação abaixo
     tabela_e_botoes = html.Div(
@@ -219,9 +300,15 @@ def carregar_transacoes(
                         'opacity': 0.6,
                     },
                 ],
-                page_size=15,
-                page_action='native',
-                sort_action='native',
+                page_current=0,
+                page_size=TAMANHO_PAGINA,
+                page_count=total_paginas,
+                page_action='custom',
+                sort_action='custom',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                filter_options={'case': 'insensitive'},
                 row_selectable='single',
             ),
             # Botões de ação abaixo da tabela
@@ -244,152 +331,152 @@ def carregar_transacoes(
         ]
     )
 
-    # Formatar totais para exibição nos badges
-    total_receitas_fmt = f'Receitas: R$ {total_receitas:,.2f}'.replace(
-        '.', ','
-    )
-    total_despesas_fmt = f'Despesas: R$ {total_despesas:,.2f}'.replace(
-        '.', ','
+    return (
+        tabela_e_botoes,
+        totais,
+        None,
+        filtros,
+        {'0': resultado['cursor']},
     )
-    saldo_fmt = f'Saldo: R$ {saldo:,.2f}'.replace('.', ',')
 
-    return tabela_e_botoes, total_receitas_fmt, total_despesas_fmt, saldo_fmt
 
-
-# Callback para resetar os filtros
-@callback(
+# Callback para formatar os totais nos badges, no navegador
+clientside_callback(
+    """
+    function(totais) {
+        if (!totais) {
+            return ['', '', ''];
+        }
+        const formatar = function(rotulo, centavos) {
+            const valor = (centavos / 100).toLocaleString('en-US', {
+                minimumFractionDigits: 2,
+                maximumFractionDigits: 2
+            });
+            return rotulo + ': R$ ' + valor.replace('.', ',');
+        };
+        return [
+            formatar('Receitas', totais.receitas),
+            formatar('Despesas', totais.despesas),
+            formatar('Saldo', totais.receitas - totais.despesas)
+        ];
+    }
+    """,
     [
-        Output('filtro-periodo', 'value'),
-        Output('filtro-mes', 'value'),
-        Output('filtro-ano', 'value'),
-        Output('filtro-conta', 'value'),
-        Output('filtro-categoria', 'value'),
-        Output('filtro-tipo', 'value'),
-        Output('filtro-status', 'value'),
+        Output('badge-total-receitas', 'children'),
+        Output('badge-total-despesas', 'children'),
+        Output('badge-saldo-periodo', 'children'),
     ],
-    [Input('btn-limpar-filtros', 'n_clicks')],
-    prevent_initial_call=True,
+    [Input('totais-transacoes', 'data')],
 )
-def limpar_filtros(n_clicks):
-    """
-    Reseta todos os filtros para seus valores padrão.
-    """
-    if n_clicks is None:
-        raise PreventUpdate
-
-    # Obter o mês e ano atuais
-    now = datetime.now()
-
-    return 'mes', now.month, now.year, None, None, 'todas', 'todos'
 
 
-# Callback para abrir o modal de edição quando o botão "Editar Selecionada" é clicado
+# Callback para buscar no servidor apenas a página exibida da tabela
 @callback(
     [
-        Output('modal-editar-transacao', 'is_open'),
-        Output('editar-transacao-id', 'data'),
+        Output('tabela-transacoes-filtrada', 'data'),
+        Output('tabela-transacoes-filtrada', 'selected_rows'),
+        Output('tabela-transacoes-filtrada', 'page_current'),
+        Output('tabela-transacoes-filtrada', 'page_count'),
+        Output('paginacao-transacoes', 'data', allow_duplicate=True),
     ],
-    [Input('btn-editar-transacao-selecionada', 'n_clicks')],
-    [
-        State('tabela-transacoes-filtrada', 'selected_rows'),
-        State('tabela-transacoes-filtrada', 'data'),
-    ],
-    prevent_initial_call=True,
-)
-def abrir_modal_editar_transacao(n_clicks, selected_rows, data):
-    """
-    Abre o modal de edição quando o botão "Editar Selecionada" é clicado.
-    """
-    if n_clicks is None:
-        raise PreventUpdate
-
-    # Se não houver linha selecionada, mostrar mensagem de aviso
-    if not selected_rows:
-        # Mostrar alerta sem abrir o modal
-        return False, no_update
-
-    row_idx = selected_rows[0]
-    transacao_id = data[row_idx]['id']
-
-    return True, transacao_id
-
-
-# Callback para mostrar mensagem de erro quando não há seleção
-@callback(
-    Output('tabela-visualizar-transacoes', 'children', allow_duplicate=True),
     [
-        Input('btn-editar-transacao-selecionada', 'n_clicks'),
-        Input('btn-excluir-transacao-selecionada', 'n_clicks'),
+        Input('tabela-transacoes-filtrada', 'page_current'),
+        Input('tabela-transacoes-filtrada', 'sort_by'),
+        Input('tabela-transacoes-filtrada', 'filter_query'),
     ],
     [
-        State('tabela-transacoes-filtrada', 'selected_rows'),
-        State('tabela-visualizar-transacoes', 'children'),
+        State('tabela-transacoes-filtrada', 'page_size'),
+        State('filtros-transacoes', 'data'),
+        State('paginacao-transacoes', 'data'),
     ],
     prevent_initial_call=True,
 )
-def mostrar_erro_selecao(n_editar, n_excluir, selected_rows, current_table):
+def paginar_transacoes(
+    pagina, sort_by, filter_query, tamanho_pagina, filtros, cursores
+):
     """
-    Mostra mensagem de erro se nenhuma linha estiver selecionada ao tentar editar/excluir.
+    Carrega a página solicitada da tabela de transações, já ordenada e filtrada
+    pelo banco de dados conforme o sort_by e o filter_query da tabela.
+
+    Na ordem padrão, se a página anterior já foi visitada, continua a partir da
+    sua última linha (keyset); caso contrário, salta diretamente para a página
+    com OFFSET. Uma nova ordenação ou filtro volta para a primeira página.
     """
     ctx = dash.callback_context
-    if not ctx.triggered:
-        raise PreventUpdate
-
-    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
-
-    # Se não houver linha selecionada, mostrar mensagem de aviso
-    if not selected_rows:
-        if trigger_id == 'btn-editar-transacao-selecionada':
-            mensagem = 'Por favor, selecione uma transação para editar.'
-        else:
-            mensagem = 'Por favor, selecione uma transação para excluir.'
+    mudou_consulta = any(
+        gatilho['prop_id'].endswith(('.sort_by', '.filter_query'))
+        for gatilho in ctx.triggered
+    )
 
-        return html.Div(
-            [
-                html.Div(
-                    dbc.Alert(mensagem, color='warning'), className='mb-2'
-                ),
-                current_table,
-            ]
-        )
+    page_count = no_update
+    if mudou_consulta:
+        pagina = 0
+        cursores = {}
+        resumo = resumir_transacoes(filtros, filter_query)
+        if resumo['success']:
+            page_count = max(
+                1, math.ceil(resumo['total_registros'] / tamanho_pagina)
+            )
+
+    pagina = pagina or 0
+    cursores = cursores or {}
+
+    resultado = listar_pagina_transacoes(
+        filtros,
+        tamanho_pagina,
+        pagina,
+        apos=cursores.get(str(pagina - 1)) if pagina and not sort_by else None,
+        sort_by=sort_by,
+        filter_query=filter_query,
+    )
+    if not resultado['success']:
+        # Filtro que o banco não consegue interpretar: nenhuma linha
+        return [], [], 0, 1, {}
 
-    # Se há uma transação selecionada, não modifica a tabela
-    raise PreventUpdate
+    cursores[str(pagina)] = resultado['cursor']
+    return (
+        linhas_tabela(resultado['transacoes']),
+        [],
+        pagina if mudou_consulta else no_update,
+        page_count,
+        cursores,
+    )
 
 
-# Callback para abrir o modal de exclusão quando o botão "Excluir Selecionada" é clicado
+# Callback para resetar os filtros
 @callback(
     [
-        Output('modal-confirmar-exclusao', 'is_open'),
-        Output('transacao-excluir-id', 'data'),
-    ],
-    [Input('btn-excluir-transacao-selecionada', 'n_clicks')],
-    [
-        State('tabela-transacoes-filtrada', 'selected_rows'),
-        State('tabela-transacoes-filtrada', 'data'),
+        Output('filtro-periodo', 'value'),
+        Output('filtro-mes', 'value'),
+        Output('filtro-ano', 'value'),
+        Output('filtro-conta', 'value'),
+        Output('filtro-categoria', 'value'),
+        Output('filtro-tipo', 'value'),
+        Output('filtro-status', 'value'),
     ],
+    [Input('btn-limpar-filtros', 'n_clicks')],
     prevent_initial_call=True,
 )
-def abrir_modal_excluir_transacao(n_clicks, selected_rows, data):
+def limpar_filtros(n_clicks):
     """
-    Abre o modal de confirmação de exclusão quando o botão "Excluir Selecionada" é clicado.
+    Reseta todos os filtros para seus valores padrão.
     """
     if n_clicks is None:
         raise PreventUpdate
 
-    # Se não houver linha selecionada, não abrir o modal
-    if not selected_rows:
-        return False, no_update
-
-    row_idx = selected_rows[0]
-    transacao_id = data[row_idx]['id']
+    # Obter o mês e ano atuais
+    now = datetime.now()
 
-    return True, transacao_id
+    return 'mes', now.month, now.year, None, None, 'todas', 'todos'
 
 
-# Callback para carregar dados da transação para edição
+# Callback para abrir o modal de edição, já preenchido, com a transação selecionada
 @callback(
     [
+        Output('modal-editar-transacao', 'is_open'),
+        Output('editar-transacao-id', 'data'),
+        Output('feedback-visualizar-transacoes', 'children', allow_duplicate=True),
+        Output('editar-transacao-feedback', 'children'),
         Output('editar-transacao-tipo', 'value'),
         Output('editar-transacao-valor', 'value'),
         Output('editar-transacao-data', 'date'),
@@ -404,69 +491,52 @@ def abrir_modal_excluir_transacao(n_clicks, selected_rows, data):
         Output('editar-transacao-responsavel', 'options'),
         Output('editar-transacao-pagamento', 'options'),
     ],
-    [Input('editar-transacao-id', 'data')],
+    [Input('btn-editar-transacao-selecionada', 'n_clicks')],
+    [State('tabela-transacoes-filtrada', 'selected_row_ids')],
     prevent_initial_call=True,
 )
-def carregar_dados_edicao(transacao_id):
+def abrir_edicao_transacao(n_clicks, selected_row_ids):
     """
-    Carrega os dados da transação para o formulário de edição.
+    Abre o modal de edição com os dados da transação selecionada, em uma única
+    resposta; sem seleção, apenas mostra um aviso.
     """
-    if not transacao_id:
+    if n_clicks is None:
         raise PreventUpdate
 
-    # Obter dados da transação
-    resultado = obter_transacao(transacao_id)
+    sem_formulario = (no_update,) * 13
+
+    if not selected_row_ids:
+        aviso = html.Div(
+            dbc.Alert(
+                'Por favor, selecione uma transação para editar.',
+                color='warning',
+            ),
+            className='mb-2',
+        )
+        return (False, no_update, aviso, no_update) + sem_formulario
 
+    transacao_id = selected_row_ids[0]
+    resultado = obter_transacao(transacao_id)
     if not resultado['success']:
-        raise PreventUpdate
+        erro = html.Div(
+            dbc.Alert(
+                f"Erro ao carregar a transação: {resultado.get('error')}",
+                color='danger',
+            ),
+            className='mb-2',
+        )
+        return (False, no_update, erro, no_update) + sem_formulario
 
     transacao = resultado['transacao']
 
-    # Carregar opções para os dropdowns
-    contas = listar_contas()
-    opcoes_contas = (
-        [
-            {
-                'label': f"{conta['nome']} ({conta['tipo']})",
-                'value': conta['id'],
-            }
-            for conta in contas['contas']
-        ]
-        if contas['success']
-        else []
-    )
-
-    categorias = listar_categorias()
-    opcoes_categorias = (
-        [
-            {'label': cat['nome'], 'value': cat['id']}
-            for cat in categorias['categorias']
-        ]
-        if categorias['success']
-        else []
-    )
-
-    responsaveis = listar_responsaveis()
-    opcoes_responsaveis = (
-        [
-            {'label': resp['nome'], 'value': resp['id']}
-            for resp in responsaveis['responsaveis']
-        ]
-        if responsaveis['success']
-        else []
-    )
-
-    pagamentos = listar_pagamentos()
-    opcoes_pagamentos = (
-        [
-            {'label': pag['tipo'], 'value': pag['id']}
-            for pag in pagamentos['pagamentos']
-        ]
-        if pagamentos['success']
-        else []
-    )
+    # Opções dos dropdowns, a partir das tabelas de cadastro em memória
+    dimensoes = obter_dimensoes()
 
     return (
+        True,
+        transacao_id,
+        None,
+        None,
         transacao['tipo'],
         transacao['valor'],
         transacao['data'],
@@ -476,18 +546,59 @@ def carregar_dados_edicao(transacao_id):
         transacao['responsavel_id'],
         transacao['pagamento_id'],
         transacao['status'],
-        opcoes_contas,
-        opcoes_categorias,
-        opcoes_responsaveis,
-        opcoes_pagamentos,
+        dimensoes.opcoes('contas'),
+        dimensoes.opcoes('categorias'),
+        dimensoes.opcoes('responsaveis'),
+        dimensoes.opcoes('pagamentos'),
     )
 
 
+# Callback para abrir o modal de exclusão da transação selecionada (ou avisar
+# que nenhuma foi selecionada), no navegador
+clientside_callback(
+    """
+    function(nClicks, selecionadas) {
+        if (!selecionadas || !selecionadas.length) {
+            const aviso = {
+                namespace: 'dash_bootstrap_components',
+                type: 'Alert',
+                props: {
+                    children: 'Por favor, selecione uma transação para excluir.',
+                    color: 'warning'
+                }
+            };
+            return [
+                false,
+                window.dash_clientside.no_update,
+                {namespace: 'dash_html_components', type: 'Div',
+                 props: {children: aviso, className: 'mb-2'}}
+            ];
+        }
+        return [true, selecionadas[0], null];
+    }
+    """,
+    [
+        Output('modal-confirmar-exclusao', 'is_open'),
+        Output('transacao-excluir-id', 'data'),
+        Output('feedback-visualizar-transacoes', 'children', allow_duplicate=True),
+    ],
+    [Input('btn-excluir-transacao-selecionada', 'n_clicks')],
+    [State('tabela-transacoes-filtrada', 'selected_row_ids')],
+    prevent_initial_call=True,
+)
+
+
 # Callback para salvar a edição da transação
 @callback(
     [
-        Output('editar-transacao-feedback', 'children'),
-        Output('btn-aplicar-filtros', 'n_clicks'),
+        Output('editar-transacao-feedback', 'children', allow_duplicate=True),
+        Output('modal-editar-transacao', 'is_open', allow_duplicate=True),
+        Output('feedback-visualizar-transacoes', 'children', allow_duplicate=True),
+        Output('tabela-transacoes-filtrada', 'data', allow_duplicate=True),
+        Output('tabela-transacoes-filtrada', 'selected_rows', allow_duplicate=True),
+        Output('totais-transacoes', 'data', allow_duplicate=True),
+        Output('tabela-transacoes-filtrada', 'page_count', allow_duplicate=True),
+        Output('paginacao-transacoes', 'data', allow_duplicate=True),
     ],
     [Input('btn-salvar-edicao', 'n_clicks')],
     [
@@ -501,7 +612,12 @@ def carregar_dados_edicao(transacao_id):
         State('editar-transacao-responsavel', 'value'),
         State('editar-transacao-pagamento', 'value'),
         State('editar-transacao-status', 'value'),
-        State('btn-aplicar-filtros', 'n_clicks'),
+        State('filtros-transacoes', 'data'),
+        State('tabela-transacoes-filtrada', 'selected_rows'),
+        State('tabela-transacoes-filtrada', 'page_current'),
+        State('tabela-transacoes-filtrada', 'sort_by'),
+        State('tabela-transacoes-filtrada', 'filter_query'),
+        State('paginacao-transacoes', 'data'),
     ],
     prevent_initial_call=True,
 )
@@ -517,34 +633,46 @@ def salvar_edicao_transacao(
     responsavel_id,
     pagamento_id,
     status,
-    aplicar_filtros_clicks,
+    filtros,
+    selected_rows,
+    pagina,
+    sort_by,
+    filter_query,
+    cursores,
 ):
     """
-    Salva as alterações na transação.
+    Salva as alterações na transação e, na mesma resposta, fecha o modal,
+    mostra a mensagem e atualiza apenas a linha da transação na tabela (ou a
+    remove, se deixou de atender aos filtros ou ao filtro das colunas) e os
+    totais. Se a transação for
+    o modelo de uma recorrência, as ocorrências virtuais também mudam, e a
+    página e os totais são lidos novamente.
+
+    Se os dados forem inválidos ou a gravação falhar, o modal continua aberto
+    com a mensagem de erro.
     """
     if n_clicks is None or not transacao_id:
         raise PreventUpdate
 
+    sem_tabela = (no_update,) * 7
+
     # Verificar dados obrigatórios
     if not valor or valor <= 0:
         return (
             dbc.Alert('Por favor, informe um valor válido.', color='danger'),
-            no_update,
-        )
+        ) + sem_tabela
 
     if not data:
         return (
             dbc.Alert('Por favor, informe uma data.', color='danger'),
-            no_update,
-        )
+        ) + sem_tabela
 
     if not tipo:
         return (
             dbc.Alert(
                 'Por favor, selecione o tipo da transação.', color='danger'
             ),
-            no_update,
-        )
+        ) + sem_tabela
 
     # Preparar dados para atualização
     dados = {
@@ -568,104 +696,156 @@ def salvar_edicao_transacao(
                 f"Erro ao atualizar a transação: {resultado.get('error')}",
                 color='danger',
             ),
-            no_update,
-        )
+        ) + sem_tabela
 
-    # Forçar atualização da tabela incrementando o contador de cliques do botão aplicar filtros
-    return (
+    mensagem = html.Div(
         dbc.Alert('Transação atualizada com sucesso!', color='success'),
-        aplicar_filtros_clicks + 1,
+        className='mb-2',
     )
 
+    if resultado['recorrencia_id']:
+        recarga = recarregar_pagina(filtros, pagina, sort_by, filter_query)
+        if recarga:
+            linhas, paginas, totais = recarga
+            return None, False, mensagem, linhas, [], totais, paginas, {}
+
+    # Atualiza só a linha editada e os totais, sem recarregar a tabela
+    linhas = Patch()
+    selecao = no_update
+    paginas = no_update
+    totais = Patch()
+    anterior = resultado['anterior']
+    ajustar_totais(totais, anterior['tipo'], anterior['valor'], -1)
+
+    consulta = obter_linha_transacao(
+        resultado['transacao_id'], filtros, filter_query
+    )
+    linha = consulta['transacoes']
+    if linha:
+        # Os totais seguem apenas os filtros, não o filtro das colunas
+        valor_centavos = para_centavos(valor)
+        ajustar_totais(
+            totais, tipo, -valor_centavos if tipo == 'despesa' else valor_centavos
+        )
+    if linha and consulta['na_tabela']:
+        if selected_rows:
+            linhas[selected_rows[0]] = linhas_tabela(linha)[0]
+        cursores = no_update
+    elif selected_rows:
+        # A transação deixou de atender aos filtros ou ao filtro das colunas
+        del linhas[selected_rows[0]]
+        selecao = []
+        paginas, cursores = paginacao_apos_remocao(
+            filtros, filter_query, pagina, cursores
+        )
+    else:
+        cursores = no_update
 
-# Callback para fechar o modal de edição
-@callback(
-    Output('modal-editar-transacao', 'is_open', allow_duplicate=True),
-    [
-        Input('btn-cancelar-edicao', 'n_clicks'),
-        Input('btn-salvar-edicao', 'n_clicks'),
-    ],
-    prevent_initial_call=True,
-)
-def fechar_modal_edicao(cancelar_clicks, salvar_clicks):
-    """
-    Fecha o modal de edição quando o usuário clica em cancelar ou salvar.
-    """
-    if cancelar_clicks is None and salvar_clicks is None:
-        raise PreventUpdate
-
-    return False
+    return None, False, mensagem, linhas, selecao, totais, paginas, cursores
 
 
 # Callback para excluir a transação
 @callback(
-    Output('btn-aplicar-filtros', 'n_clicks', allow_duplicate=True),
-    [Input('btn-confirmar-exclusao', 'n_clicks')],
     [
-        State('transacao-excluir-id', 'data'),
-        State('btn-aplicar-filtros', 'n_clicks'),
+        Output('modal-confirmar-exclusao', 'is_open', allow_duplicate=True),
+        Output('feedback-visualizar-transacoes', 'children', allow_duplicate=True),
+        Output('tabela-transacoes-filtrada', 'data', allow_duplicate=True),
+        Output('tabela-transacoes-filtrada', 'selected_rows', allow_duplicate=True),
+        Output('totais-transacoes', 'data', allow_duplicate=True),
+        Output('tabela-transacoes-filtrada', 'page_count', allow_duplicate=True),
+        Output('paginacao-transacoes', 'data', allow_duplicate=True),
     ],
-    prevent_initial_call=True,
-)
-def confirmar_exclusao_transacao(
-    n_clicks, transacao_id, aplicar_filtros_clicks
-):
-    """
-    Exclui a transação quando o usuário confirma a exclusão.
-    """
-    if n_clicks is None or not transacao_id:
-        raise PreventUpdate
-
-    # Excluir a transação
-    excluir_transacao(transacao_id)
-
-    # Forçar atualização da tabela incrementando o contador de cliques do botão aplicar filtros
-    return aplicar_filtros_clicks + 1
-
-
-# Callback para mostrar mensagem de feedback após exclusão
-@callback(
-    Output('tabela-visualizar-transacoes', 'children', allow_duplicate=True),
     [Input('btn-confirmar-exclusao', 'n_clicks')],
     [
         State('transacao-excluir-id', 'data'),
-        State('tabela-visualizar-transacoes', 'children'),
+        State('tabela-transacoes-filtrada', 'selected_rows'),
+        State('filtros-transacoes', 'data'),
+        State('tabela-transacoes-filtrada', 'page_current'),
+        State('tabela-transacoes-filtrada', 'sort_by'),
+        State('tabela-transacoes-filtrada', 'filter_query'),
+        State('paginacao-transacoes', 'data'),
     ],
     prevent_initial_call=True,
 )
-def mostrar_feedback_exclusao(n_clicks, transacao_id, current_table):
+def confirmar_exclusao_transacao(
+    n_clicks,
+    transacao_id,
+    selected_rows,
+    filtros,
+    pagina,
+    sort_by,
+    filter_query,
+    cursores,
+):
     """
-    Mostra uma mensagem de feedback após a exclusão de uma transação.
+    Exclui a transação quando o usuário confirma a exclusão e, na mesma
+    resposta, fecha o modal, mostra a mensagem e remove apenas a linha da
+    transação da tabela, descontando-a dos totais e recalculando as páginas.
+    Excluir o modelo de uma recorrência exclui também as ocorrências virtuais;
+    nesse caso, a página e os totais são lidos novamente.
     """
     if n_clicks is None or not transacao_id:
         raise PreventUpdate
 
-    # Mostrar mensagem de sucesso
-    return html.Div(
-        [
+    resultado = excluir_transacao(transacao_id)
+    if not resultado['success']:
+        return (
+            False,
             html.Div(
-                dbc.Alert('Transação excluída com sucesso!', color='success'),
+                dbc.Alert(
+                    f"Erro ao excluir a transação: {resultado.get('error')}",
+                    color='danger',
+                ),
                 className='mb-2',
             ),
-            current_table,
-        ]
+        ) + (no_update,) * 5
+
+    mensagem = html.Div(
+        dbc.Alert('Transação excluída com sucesso!', color='success'),
+        className='mb-2',
     )
 
+    if resultado['recorrencia_id']:
+        recarga = recarregar_pagina(filtros, pagina, sort_by, filter_query)
+        if recarga:
+            linhas, paginas, totais = recarga
+            return False, mensagem, linhas, [], totais, paginas, {}
+
+    linhas = Patch()
+    paginas = no_update
+    if selected_rows:
+        del linhas[selected_rows[0]]
+        paginas, cursores = paginacao_apos_remocao(
+            filtros, filter_query, pagina, cursores
+        )
+    else:
+        cursores = no_update
+    totais = Patch()
+    excluida = resultado['excluida']
+    ajustar_totais(totais, excluida['tipo'], excluida['valor'], -1)
 
-# Callback para fechar o modal de confirmação de exclusão
-@callback(
-    Output('modal-confirmar-exclusao', 'is_open', allow_duplicate=True),
-    [
-        Input('btn-cancelar-exclusao', 'n_clicks'),
-        Input('btn-confirmar-exclusao', 'n_clicks'),
-    ],
+    return False, mensagem, linhas, [], totais, paginas, cursores
+
+
+# Callbacks para fechar os modais quando o usuário cancela, no navegador
+clientside_callback(
+    """
+    function(nClicks) {
+        return false;
+    }
+    """,
+    Output('modal-editar-transacao', 'is_open', allow_duplicate=True),
+    [Input('btn-cancelar-edicao', 'n_clicks')],
     prevent_initial_call=True,
 )
-def fechar_modal_exclusao(cancelar_clicks, confirmar_clicks):
-    """
-    Fecha o modal de confirmação de exclusão quando o usuário clica em cancelar ou confirmar.
-    """
-    if cancelar_clicks is None and confirmar_clicks is None:
-        raise PreventUpdate
 
-    return False
+clientside_callback(
+    """
+    function(nClicks) {
+        return false;
+    }
+    """,
+    Output('modal-confirmar-exclusao', 'is_open', allow_duplicate=True),
+    [Input('btn-cancelar-exclusao', 'n_clicks')],
+    prevent_initial_call=True,
+)
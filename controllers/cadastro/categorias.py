@@ -3,12 +3,15 @@ Este módulo define as funções para o cadastro, listagem, edição e exclusão
 """
 
 import sqlite3
-from models.database import conectar
+from models.database import conexao_leitura, unidade_de_trabalho
+from models.dimensoes import invalidar_dimensoes
 
 
-def cadastrar_categoria(nome):
+def cadastrar_categoria(nome, uow=None):
     """
     Cadastra uma nova categoria no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not nome.strip():
         return {
@@ -16,10 +19,9 @@ def cadastrar_categoria(nome):
             'message': 'O nome da categoria não pode ser vazio.',
         }
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO categorias (nome) VALUES (?)', (nome,))
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute('INSERT INTO categorias (nome) VALUES (?)', (nome,))
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Categoria cadastrada com sucesso.',
@@ -34,47 +36,47 @@ def cadastrar_categoria(nome):
             'success': False,
             'message': f'Erro ao cadastrar categoria: {e}',
         }
-    finally:
-        conn.close()
 
 
-def listar_categorias():
+def listar_categorias(uow=None):
     """
     Lista todas as categorias cadastradas no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, nome FROM categorias ORDER BY nome ASC')
-        categorias = [
-            {'id': row[0], 'nome': row[1]} for row in cursor.fetchall()
-        ]
+        with conexao_leitura(uow) as conn:
+            linhas = conn.execute(
+                'SELECT id, nome FROM categorias ORDER BY nome ASC'
+            ).fetchall()
+        categorias = [{'id': row[0], 'nome': row[1]} for row in linhas]
         return {'success': True, 'categorias': categorias}
     except sqlite3.Error as e:
         return {'success': False, 'message': f'Erro ao listar categorias: {e}'}
-    finally:
-        conn.close()
 
 
-def excluir_categoria(categoria_id):
+def excluir_categoria(categoria_id, uow=None):
     """
     Exclui uma categoria existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM categorias WHERE id = ?', (categoria_id,))
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute(
+                'DELETE FROM categorias WHERE id = ?', (categoria_id,)
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
         return {'success': True, 'message': 'Categoria excluída com sucesso.'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f'Erro ao excluir categoria: {e}'}
-    finally:
-        conn.close()
 
 
-def editar_categoria(categoria_id, novo_nome):
+def editar_categoria(categoria_id, novo_nome, uow=None):
     """
     Atualiza o nome de uma categoria existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not novo_nome.strip():
         return {
@@ -82,13 +84,12 @@ def editar_categoria(categoria_id, novo_nome):
             'message': 'O nome da categoria não pode ser vazio.',
         }
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE categorias SET nome = ? WHERE id = ?',
-            (novo_nome, categoria_id),
-        )
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute(
+                'UPDATE categorias SET nome = ? WHERE id = ?',
+                (novo_nome, categoria_id),
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Categoria atualizada com sucesso.',
@@ -98,5 +99,3 @@ def editar_categoria(categoria_id, novo_nome):
             'success': False,
             'message': f'Erro ao atualizar categoria: {e}',
         }
-    finally:
-        conn.close()
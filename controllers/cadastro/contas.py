@@ -3,7 +3,11 @@ Este módulo define as funções para o cadastro, listagem, edição e exclusão
 """
 
 import sqlite3
-from models.database import conectar
+from models.ciclos_fatura import invalidar_ciclos
+from models.database import conexao_leitura, unidade_de_trabalho
+from models.dimensoes import invalidar_dimensoes
+from models.dinheiro import para_centavos, para_reais
+from models.faturas import reatribuir_faturas_da_conta
 
 
 def cadastrar_conta(
@@ -13,9 +17,12 @@ def cadastrar_conta(
     dia_fechamento=None,
     dia_vencimento=None,
     limite=None,
+    uow=None,
 ):
     """
     Cadastra uma nova conta no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not nome.strip():
         return {
@@ -31,25 +38,23 @@ def cadastrar_conta(
         }
 
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-
-        # Inserir a conta no banco de dados
-        cursor.execute(
-            """
-            INSERT INTO contas (nome, tipo, saldo, dia_fechamento, dia_vencimento, limite_credito) 
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (
-                nome,
-                tipo,
-                saldo_inicial,
-                dia_fechamento,
-                dia_vencimento,
-                limite,
-            ),
-        )
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            # Inserir a conta no banco de dados
+            uow.cursor().execute(
+                """
+                INSERT INTO contas (nome, tipo, saldo, dia_fechamento, dia_vencimento, limite_credito) 
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    nome,
+                    tipo,
+                    para_centavos(saldo_inicial or 0),
+                    dia_fechamento,
+                    dia_vencimento,
+                    para_centavos(limite),
+                ),
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
         return {'success': True, 'message': 'Conta cadastrada com sucesso.'}
     except sqlite3.IntegrityError:
         return {
@@ -58,66 +63,63 @@ def cadastrar_conta(
         }
     except sqlite3.Error as e:
         return {'success': False, 'message': f'Erro ao cadastrar conta: {e}'}
-    finally:
-        conn.close()
 
 
-def listar_contas():
+def listar_contas(uow=None):
     """
     Lista todas as contas cadastradas no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, nome, tipo, saldo, dia_fechamento, dia_vencimento, limite_credito 
-            FROM contas 
-            ORDER BY nome ASC
-            """
-        )
+        with conexao_leitura(uow) as conn:
+            linhas = conn.execute(
+                """
+                SELECT id, nome, tipo, saldo, dia_fechamento, dia_vencimento, limite_credito 
+                FROM contas 
+                ORDER BY nome ASC
+                """
+            ).fetchall()
 
         contas = []
-        for row in cursor.fetchall():
+        for row in linhas:
             conta = {
                 'id': row[0],
                 'nome': row[1],
                 'tipo': row[2],
-                'saldo': row[3],
+                'saldo': para_reais(row[3]),
             }
 
             # Adiciona informações específicas para cartões
             if row[2] == 'cartao':
                 conta['dia_fechamento'] = row[4]
                 conta['dia_vencimento'] = row[5]
-                conta['limite'] = row[6]
+                conta['limite'] = para_reais(row[6])
 
             contas.append(conta)
 
         return {'success': True, 'contas': contas}
     except sqlite3.Error as e:
         return {'success': False, 'message': f'Erro ao listar contas: {e}'}
-    finally:
-        conn.close()
 
 
-def obter_conta(conta_id):
+def obter_conta(conta_id, uow=None):
     """
     Obtém uma conta específica pelo ID.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, nome, tipo, saldo, dia_fechamento, dia_vencimento, limite_credito 
-            FROM contas 
-            WHERE id = ?
-            """,
-            (conta_id,),
-        )
-
-        row = cursor.fetchone()
+        with conexao_leitura(uow) as conn:
+            row = conn.execute(
+                """
+                SELECT id, nome, tipo, saldo, dia_fechamento, dia_vencimento, limite_credito 
+                FROM contas 
+                WHERE id = ?
+                """,
+                (conta_id,),
+            ).fetchone()
+
         if not row:
             return {'success': False, 'message': 'Conta não encontrada.'}
 
@@ -125,46 +127,45 @@ def obter_conta(conta_id):
             'id': row[0],
             'nome': row[1],
             'tipo': row[2],
-            'saldo': row[3],
+            'saldo': para_reais(row[3]),
             'dia_fechamento': row[4],
             'dia_vencimento': row[5],
-            'limite': row[6],
+            'limite': para_reais(row[6]),
         }
 
         return {'success': True, 'conta': conta}
     except sqlite3.Error as e:
         return {'success': False, 'message': f'Erro ao obter conta: {e}'}
-    finally:
-        conn.close()
 
 
-def excluir_conta(conta_id):
+def excluir_conta(conta_id, uow=None):
     """
     Exclui uma conta existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-
-        # Verificar se há transações vinculadas à conta
-        cursor.execute(
-            'SELECT COUNT(*) FROM transacoes WHERE conta_id = ?', (conta_id,)
-        )
-        count = cursor.fetchone()[0]
-
-        if count > 0:
-            return {
-                'success': False,
-                'message': f'Não é possível excluir. Existem {count} transações vinculadas a esta conta.',
-            }
+        with unidade_de_trabalho(uow) as uow:
+            cursor = uow.cursor()
+
+            # Verificar se há transações vinculadas à conta
+            cursor.execute(
+                'SELECT COUNT(*) FROM transacoes WHERE conta_id = ?', (conta_id,)
+            )
+            count = cursor.fetchone()[0]
 
-        cursor.execute('DELETE FROM contas WHERE id = ?', (conta_id,))
-        conn.commit()
+            if count > 0:
+                return {
+                    'success': False,
+                    'message': f'Não é possível excluir. Existem {count} transações vinculadas a esta conta.',
+                }
+
+            cursor.execute('DELETE FROM contas WHERE id = ?', (conta_id,))
+            uow.ao_confirmar(invalidar_dimensoes)
+            uow.ao_confirmar(invalidar_ciclos, conta_id)
         return {'success': True, 'message': 'Conta excluída com sucesso.'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f'Erro ao excluir conta: {e}'}
-    finally:
-        conn.close()
 
 
 def editar_conta(
@@ -175,9 +176,12 @@ def editar_conta(
     dia_fechamento=None,
     dia_vencimento=None,
     limite=None,
+    uow=None,
 ):
     """
     Atualiza uma conta existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not nome.strip():
         return {
@@ -186,56 +190,66 @@ def editar_conta(
         }
 
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-
-        # Obtém a conta atual para verificar o tipo
-        resultado = obter_conta(conta_id)
-        if not resultado['success']:
-            return resultado
-
-        conta_atual = resultado['conta']
-
-        # Define o tipo da conta
-        novo_tipo = tipo if tipo is not None else conta_atual['tipo']
-
-        # Verifica se está mudando de/para cartão de crédito
-        if novo_tipo == 'cartao' and (
-            dia_fechamento is None or dia_vencimento is None
-        ):
-            # Se está mudando para cartão mas não informou fechamento/vencimento
-            if conta_atual['tipo'] != 'cartao':
-                return {
-                    'success': False,
-                    'message': 'O cartão de crédito precisa ter dia de fechamento e vencimento.',
-                }
-            # Se já era cartão, mantém os valores anteriores
-            dia_fechamento = conta_atual['dia_fechamento']
-            dia_vencimento = conta_atual['dia_vencimento']
-            limite = limite if limite is not None else conta_atual['limite']
-
-        # Define o saldo
-        novo_saldo = saldo if saldo is not None else conta_atual['saldo']
-
-        cursor.execute(
-            """
-            UPDATE contas 
-            SET nome = ?, tipo = ?, saldo = ?, dia_fechamento = ?, dia_vencimento = ?, limite_credito = ?
-            WHERE id = ?
-            """,
-            (
-                nome,
-                novo_tipo,
-                novo_saldo,
-                dia_fechamento,
-                dia_vencimento,
-                limite,
-                conta_id,
-            ),
-        )
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            # Obtém a conta atual, na mesma transação, para verificar o tipo
+            resultado = obter_conta(conta_id, uow)
+            if not resultado['success']:
+                return resultado
+
+            conta_atual = resultado['conta']
+
+            # Define o tipo da conta
+            novo_tipo = tipo if tipo is not None else conta_atual['tipo']
+
+            # Verifica se está mudando de/para cartão de crédito
+            if novo_tipo == 'cartao' and (
+                dia_fechamento is None or dia_vencimento is None
+            ):
+                # Se está mudando para cartão mas não informou fechamento/vencimento
+                if conta_atual['tipo'] != 'cartao':
+                    return {
+                        'success': False,
+                        'message': 'O cartão de crédito precisa ter dia de fechamento e vencimento.',
+                    }
+                # Se já era cartão, mantém os valores anteriores
+                dia_fechamento = conta_atual['dia_fechamento']
+                dia_vencimento = conta_atual['dia_vencimento']
+                limite = limite if limite is not None else conta_atual['limite']
+
+            # Define o saldo
+            novo_saldo = saldo if saldo is not None else conta_atual['saldo']
+
+            uow.cursor().execute(
+                """
+                UPDATE contas 
+                SET nome = ?, tipo = ?, saldo = ?, dia_fechamento = ?, dia_vencimento = ?, limite_credito = ?
+                WHERE id = ?
+                """,
+                (
+                    nome,
+                    novo_tipo,
+                    para_centavos(novo_saldo),
+                    dia_fechamento,
+                    dia_vencimento,
+                    para_centavos(limite),
+                    conta_id,
+                ),
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
+            # A tabela de ciclos da fatura só muda com os dias do cartão
+            dias_mudaram = (dia_fechamento, dia_vencimento) != (
+                conta_atual['dia_fechamento'],
+                conta_atual['dia_vencimento'],
+            )
+            if dias_mudaram:
+                uow.ao_confirmar(invalidar_ciclos, conta_id)
+            # As transações em aberto passam para as faturas dos novos ciclos
+            # (vencimento e data efetiva incluídos); a volta de cartão para
+            # conta comum é tratada pelos triggers
+            if novo_tipo == 'cartao' and (
+                dias_mudaram or conta_atual['tipo'] != 'cartao'
+            ):
+                reatribuir_faturas_da_conta(uow.cursor(), conta_id)
         return {'success': True, 'message': 'Conta atualizada com sucesso.'}
     except sqlite3.Error as e:
         return {'success': False, 'message': f'Erro ao atualizar conta: {e}'}
-    finally:
-        conn.close()
@@ -3,12 +3,15 @@ Este módulo define as funções para o cadastro, listagem, edição e exclusão
 """
 
 import sqlite3
-from models.database import conectar
+from models.database import conexao_leitura, unidade_de_trabalho
+from models.dimensoes import invalidar_dimensoes
 
 
-def cadastrar_pagamento(tipo):
+def cadastrar_pagamento(tipo, uow=None):
     """
     Cadastra um novo tipo de pagamento no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not tipo.strip():
         return {
@@ -16,10 +19,9 @@ def cadastrar_pagamento(tipo):
             'message': 'O tipo de pagamento não pode ser vazio.',
         }
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO pagamentos (tipo) VALUES (?)', (tipo,))
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute('INSERT INTO pagamentos (tipo) VALUES (?)', (tipo,))
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Tipo de pagamento cadastrado com sucesso.',
@@ -34,54 +36,53 @@ def cadastrar_pagamento(tipo):
             'success': False,
             'message': f'Erro ao cadastrar tipo de pagamento: {e}',
         }
-    finally:
-        conn.close()
 
 
-def listar_pagamentos():
+def listar_pagamentos(uow=None):
     """
     Lista todos os tipos de pagamento cadastrados no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, tipo FROM pagamentos ORDER BY tipo ASC')
-        pagamentos = [
-            {'id': row[0], 'tipo': row[1]} for row in cursor.fetchall()
-        ]
+        with conexao_leitura(uow) as conn:
+            linhas = conn.execute(
+                'SELECT id, tipo FROM pagamentos ORDER BY tipo ASC'
+            ).fetchall()
+        pagamentos = [{'id': row[0], 'tipo': row[1]} for row in linhas]
         return {'success': True, 'pagamentos': pagamentos}
     except sqlite3.Error as e:
         return {
             'success': False,
             'message': f'Erro ao listar tipos de pagamento: {e}',
         }
-    finally:
-        conn.close()
 
 
-def excluir_pagamento(pagamento_id):
+def excluir_pagamento(pagamento_id, uow=None):
     """
     Exclui um tipo de pagamento existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-
-        # Verificar se há transações vinculadas a este tipo de pagamento
-        cursor.execute(
-            'SELECT COUNT(*) FROM transacoes WHERE pagamento_id = ?',
-            (pagamento_id,),
-        )
-        count = cursor.fetchone()[0]
-
-        if count > 0:
-            return {
-                'success': False,
-                'message': f'Não é possível excluir. Existem {count} transações com este tipo de pagamento.',
-            }
-
-        cursor.execute('DELETE FROM pagamentos WHERE id = ?', (pagamento_id,))
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            cursor = uow.cursor()
+
+            # Verificar se há transações vinculadas a este tipo de pagamento
+            cursor.execute(
+                'SELECT COUNT(*) FROM transacoes WHERE pagamento_id = ?',
+                (pagamento_id,),
+            )
+            count = cursor.fetchone()[0]
+
+            if count > 0:
+                return {
+                    'success': False,
+                    'message': f'Não é possível excluir. Existem {count} transações com este tipo de pagamento.',
+                }
+
+            cursor.execute('DELETE FROM pagamentos WHERE id = ?', (pagamento_id,))
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Tipo de pagamento excluído com sucesso.',
@@ -91,13 +92,13 @@ def excluir_pagamento(pagamento_id):
             'success': False,
             'message': f'Erro ao excluir tipo de pagamento: {e}',
         }
-    finally:
-        conn.close()
 
 
-def editar_pagamento(pagamento_id, novo_tipo):
+def editar_pagamento(pagamento_id, novo_tipo, uow=None):
     """
     Atualiza o nome de um tipo de pagamento existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not novo_tipo.strip():
         return {
@@ -105,13 +106,12 @@ def editar_pagamento(pagamento_id, novo_tipo):
             'message': 'O tipo de pagamento não pode ser vazio.',
         }
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE pagamentos SET tipo = ? WHERE id = ?',
-            (novo_tipo, pagamento_id),
-        )
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute(
+                'UPDATE pagamentos SET tipo = ? WHERE id = ?',
+                (novo_tipo, pagamento_id),
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Tipo de pagamento atualizado com sucesso.',
@@ -121,5 +121,3 @@ def editar_pagamento(pagamento_id, novo_tipo):
             'success': False,
             'message': f'Erro ao atualizar tipo de pagamento: {e}',
         }
-    finally:
-        conn.close()
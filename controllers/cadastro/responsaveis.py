@@ -3,12 +3,15 @@ Este módulo define as funções para o cadastro, listagem, edição e exclusão
 """
 
 import sqlite3
-from models.database import conectar
+from models.database import conexao_leitura, unidade_de_trabalho
+from models.dimensoes import invalidar_dimensoes
 
 
-def cadastrar_responsavel(nome):
+def cadastrar_responsavel(nome, uow=None):
     """
     Cadastra um novo responsável no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not nome.strip():
         return {
@@ -16,10 +19,11 @@ def cadastrar_responsavel(nome):
             'message': 'O nome do responsável não pode ser vazio.',
         }
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO responsaveis (nome) VALUES (?)', (nome,))
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute(
+                'INSERT INTO responsaveis (nome) VALUES (?)', (nome,)
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Responsável cadastrado com sucesso.',
@@ -34,42 +38,40 @@ def cadastrar_responsavel(nome):
             'success': False,
             'message': f'Erro ao cadastrar responsável: {e}',
         }
-    finally:
-        conn.close()
 
 
-def listar_responsaveis():
+def listar_responsaveis(uow=None):
     """
     Lista todos os responsáveis cadastrados no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, nome FROM responsaveis ORDER BY nome ASC')
-        responsaveis = [
-            {'id': row[0], 'nome': row[1]} for row in cursor.fetchall()
-        ]
+        with conexao_leitura(uow) as conn:
+            linhas = conn.execute(
+                'SELECT id, nome FROM responsaveis ORDER BY nome ASC'
+            ).fetchall()
+        responsaveis = [{'id': row[0], 'nome': row[1]} for row in linhas]
         return {'success': True, 'responsaveis': responsaveis}
     except sqlite3.Error as e:
         return {
             'success': False,
             'message': f'Erro ao listar responsáveis: {e}',
         }
-    finally:
-        conn.close()
 
 
-def excluir_responsavel(responsavel_id):
+def excluir_responsavel(responsavel_id, uow=None):
     """
     Exclui um responsável existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute(
-            'DELETE FROM responsaveis WHERE id = ?', (responsavel_id,)
-        )
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute(
+                'DELETE FROM responsaveis WHERE id = ?', (responsavel_id,)
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Responsável excluído com sucesso.',
@@ -79,13 +81,13 @@ def excluir_responsavel(responsavel_id):
             'success': False,
             'message': f'Erro ao excluir responsável: {e}',
         }
-    finally:
-        conn.close()
 
 
-def editar_responsavel(responsavel_id, novo_nome):
+def editar_responsavel(responsavel_id, novo_nome, uow=None):
     """
     Atualiza o nome de um responsável existente no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not novo_nome.strip():
         return {
@@ -93,13 +95,12 @@ def editar_responsavel(responsavel_id, novo_nome):
             'message': 'O nome do responsável não pode ser vazio.',
         }
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE responsaveis SET nome = ? WHERE id = ?',
-            (novo_nome, responsavel_id),
-        )
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute(
+                'UPDATE responsaveis SET nome = ? WHERE id = ?',
+                (novo_nome, responsavel_id),
+            )
+            uow.ao_confirmar(invalidar_dimensoes)
         return {
             'success': True,
             'message': 'Responsável atualizado com sucesso.',
@@ -109,5 +110,3 @@ def editar_responsavel(responsavel_id, novo_nome):
             'success': False,
             'message': f'Erro ao atualizar responsável: {e}',
         }
-    finally:
-        conn.close()
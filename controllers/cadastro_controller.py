@@ -4,7 +4,9 @@ Ele inclui funções para manipular categorias, contas, tipos de pagamento e res
 """
 
 from dash import Input, Output, State, callback
-from models.database import conectar
+from models.database import unidade_de_trabalho
+from models.dimensoes import invalidar_dimensoes
+from models.dinheiro import para_centavos
 import controllers.cadastro
 
 
@@ -56,9 +58,12 @@ def salvar_conta(
     dia_vencimento,
     limite_credito,
     saldo_inicial,
+    uow=None,
 ):
     """
     Salvar uma nova conta no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not nome:
         return 'Por favor, informe o nome da conta.'
@@ -66,42 +71,47 @@ def salvar_conta(
     if not tipo:
         return 'Por favor, selecione o tipo da conta.'
 
-    conn = conectar()
-    cursor = conn.cursor()
+    if tipo == 'cartao':
+        # Validações específicas para cartão de crédito
+        if not dia_fechamento:
+            return 'Por favor, informe o dia de fechamento do cartão.'
+
+        if not dia_vencimento:
+            return 'Por favor, informe o dia de vencimento do cartão.'
+
+        if limite_credito is None:
+            return 'Por favor, informe o limite do cartão.'
 
     try:
-        if tipo == 'cartao':
-            # Validações específicas para cartão de crédito
-            if not dia_fechamento:
-                return 'Por favor, informe o dia de fechamento do cartão.'
-
-            if not dia_vencimento:
-                return 'Por favor, informe o dia de vencimento do cartão.'
-
-            if limite_credito is None:
-                return 'Por favor, informe o limite do cartão.'
-
-            cursor.execute(
-                """INSERT INTO contas 
-                   (nome, tipo, dia_fechamento, dia_vencimento, limite_credito, saldo) 
-                   VALUES (?, ?, ?, ?, ?, 0.0)""",
-                (nome, tipo, dia_fechamento, dia_vencimento, limite_credito),
-            )
-        else:
-            # Para outros tipos de conta, só é necessário o saldo inicial
-            saldo = saldo_inicial if saldo_inicial is not None else 0.0
-
-            cursor.execute(
-                'INSERT INTO contas (nome, tipo, saldo) VALUES (?, ?, ?)',
-                (nome, tipo, saldo),
-            )
-
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            cursor = uow.cursor()
+            if tipo == 'cartao':
+                cursor.execute(
+                    """INSERT INTO contas 
+                       (nome, tipo, dia_fechamento, dia_vencimento, limite_credito, saldo) 
+                       VALUES (?, ?, ?, ?, ?, 0)""",
+                    (
+                        nome,
+                        tipo,
+                        dia_fechamento,
+                        dia_vencimento,
+                        para_centavos(limite_credito),
+                    ),
+                )
+            else:
+                # Para outros tipos de conta, só é necessário o saldo inicial
+                saldo = (
+                    para_centavos(saldo_inicial) if saldo_inicial is not None else 0
+                )
+
+                cursor.execute(
+                    'INSERT INTO contas (nome, tipo, saldo) VALUES (?, ?, ?)',
+                    (nome, tipo, saldo),
+                )
+            uow.ao_confirmar(invalidar_dimensoes)
         return 'Conta salva com sucesso!'
     except Exception as e:
         return f'Erro ao salvar conta: {str(e)}'
-    finally:
-        conn.close()
 
 
 @callback(
@@ -110,24 +120,22 @@ def salvar_conta(
     [State('input-pagamento', 'value')],
     prevent_initial_call=True,
 )
-def salvar_pagamento(n_clicks, tipo):
+def salvar_pagamento(n_clicks, tipo, uow=None):
     """
     Salvar um novo tipo de pagamento no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not tipo:
         return 'Por favor, informe o tipo de pagamento.'
 
-    conn = conectar()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute('INSERT INTO pagamentos (tipo) VALUES (?)', (tipo,))
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute('INSERT INTO pagamentos (tipo) VALUES (?)', (tipo,))
+            uow.ao_confirmar(invalidar_dimensoes)
         return 'Tipo de pagamento salvo com sucesso!'
     except Exception as e:
         return f'Erro ao salvar tipo de pagamento: {str(e)}'
-    finally:
-        conn.close()
 
 
 @callback(
@@ -136,21 +144,19 @@ def salvar_pagamento(n_clicks, tipo):
     [State('input-responsavel', 'value')],
     prevent_initial_call=True,
 )
-def salvar_responsavel(n_clicks, nome):
+def salvar_responsavel(n_clicks, nome, uow=None):
     """
     Salvar um novo responsável no banco de dados.
+
+    :param uow: Unidade de trabalho em andamento (opcional)
     """
     if not nome:
         return 'Por favor, informe o nome do responsável.'
 
-    conn = conectar()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute('INSERT INTO responsaveis (nome) VALUES (?)', (nome,))
-        conn.commit()
+        with unidade_de_trabalho(uow) as uow:
+            uow.cursor().execute('INSERT INTO responsaveis (nome) VALUES (?)', (nome,))
+            uow.ao_confirmar(invalidar_dimensoes)
         return 'Responsável salvo com sucesso!'
     except Exception as e:
         return f'Erro ao salvar responsável: {str(e)}'
-    finally:
-        conn.close()
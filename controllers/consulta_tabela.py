@@ -0,0 +1,226 @@
+"""
+Este módulo traduz a ordenação (sort_by) e o filtro (filter_query) das DataTables
+do Dash em cláusulas ORDER BY e WHERE parametrizadas do SQLite.
+
+Com sort_action e filter_action definidos como 'custom', a tabela apenas informa
+o que o usuário pediu, e a ordenação e a filtragem são feitas pelo banco de dados,
+sem precisar enviar todas as linhas ao navegador.
+
+As colunas aceitas são descritas por um dicionário {id_da_coluna: especificação},
+no qual cada especificação pode conter:
+
+- 'expressao': expressão SQL da coluna (obrigatória)
+- 'numerica': True se a coluna só aceita comparações numéricas
+- 'converter': função aplicada ao valor digitado antes de enviá-lo ao banco
+- 'juncao': JOIN necessário para usar a expressão fora da consulta completa
+
+Colunas fora desse dicionário são rejeitadas, de modo que nenhum texto digitado
+pelo usuário chega ao SQL a não ser como parâmetro.
+"""
+
+import re
+
+# Operadores relacionais, com os nomes alternativos usados pelo Dash
+OPERADORES_RELACIONAIS = {
+    '=': '=',
+    'eq': '=',
+    '!=': '!=',
+    'ne': '!=',
+    '<': '<',
+    'lt': '<',
+    '<=': '<=',
+    'le': '<=',
+    '>': '>',
+    'gt': '>',
+    '>=': '>=',
+    'ge': '>=',
+}
+
+# Operador, com prefixo opcional de sensibilidade a maiúsculas (s/i), e valor
+_PADRAO_OPERADOR = re.compile(
+    r'(?P<caso>[si]?)'
+    r'(?P<operador>>=|<=|!=|=|>|<|eq|ne|lt|le|gt|ge|contains|datestartswith)'
+    r'(?:\s+|(?<=[=<>])\s*)(?P<valor>.*)$',
+    re.DOTALL,
+)
+_PADRAO_EXPRESSAO = re.compile(r'\{(?P<coluna>[^{}]+)\}\s*(?P<resto>.*)$', re.DOTALL)
+_PADRAO_VAZIO = re.compile(r'is\s+(?:blank|nil)$')
+_ASPAS = ('"', "'", '`')
+
+
+def dividir_filter_query(filter_query):
+    """
+    Divide o filter_query nas expressões unidas por '&&', ignorando separadores
+    que estejam entre aspas.
+
+    :param filter_query: Texto do filtro gerado pela DataTable
+    :return: Lista de expressões, sem espaços nas extremidades
+    """
+    partes = []
+    atual = []
+    aspas = None
+    i = 0
+    while i < len(filter_query):
+        caractere = filter_query[i]
+        if aspas:
+            atual.append(caractere)
+            if caractere == '\\' and i + 1 < len(filter_query):
+                atual.append(filter_query[i + 1])
+                i += 1
+            elif caractere == aspas:
+                aspas = None
+        elif caractere in _ASPAS:
+            aspas = caractere
+            atual.append(caractere)
+        elif filter_query.startswith('&&', i):
+            partes.append(''.join(atual).strip())
+            atual = []
+            i += 1
+        elif filter_query.startswith('||', i):
+            raise ValueError('Filtros com "||" não são suportados.')
+        else:
+            atual.append(caractere)
+        i += 1
+
+    partes.append(''.join(atual).strip())
+    return [parte for parte in partes if parte]
+
+
+def interpretar_valor(texto):
+    """
+    Converte o valor digitado no filtro: textos entre aspas perdem as aspas e os
+    demais viram números quando possível.
+
+    :param texto: Valor como aparece no filter_query
+    :return: Texto ou número
+    """
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] in _ASPAS and texto[-1] == texto[0]:
+        return texto[1:-1].replace('\\' + texto[0], texto[0])
+
+    try:
+        return float(texto)
+    except ValueError:
+        return texto
+
+
+def _escapar_like(valor):
+    """
+    Escapa os curingas do LIKE para que o texto seja procurado literalmente.
+    """
+    return (
+        valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    )
+
+
+def traduzir_expressao(expressao, colunas):
+    """
+    Traduz uma única expressão do filter_query (ex.: '{valor} > 100').
+
+    :param expressao: Expressão no formato '{coluna} operador valor'
+    :param colunas: Dicionário com as colunas permitidas
+    :return: Tupla (cláusula SQL, lista de parâmetros, id da coluna)
+    """
+    encontrada = _PADRAO_EXPRESSAO.match(expressao)
+    if not encontrada:
+        raise ValueError(f'Filtro inválido: {expressao}')
+
+    coluna_id = encontrada.group('coluna')
+    if coluna_id not in colunas:
+        raise ValueError(f'Coluna não permitida no filtro: {coluna_id}')
+
+    coluna = colunas[coluna_id]
+    sql = coluna['expressao']
+    resto = encontrada.group('resto').strip()
+
+    if _PADRAO_VAZIO.match(resto):
+        if coluna.get('numerica'):
+            return f'{sql} IS NULL', [], coluna_id
+        return f"({sql} IS NULL OR {sql} = '')", [], coluna_id
+
+    operacao = _PADRAO_OPERADOR.match(resto)
+    if not operacao or not operacao.group('valor').strip():
+        raise ValueError(f'Filtro inválido: {expressao}')
+
+    caso = operacao.group('caso')
+    operador = operacao.group('operador')
+    valor = interpretar_valor(operacao.group('valor'))
+    if 'converter' in coluna:
+        valor = coluna['converter'](valor)
+
+    if operador in OPERADORES_RELACIONAIS:
+        simbolo = OPERADORES_RELACIONAIS[operador]
+        if coluna.get('numerica'):
+            if not isinstance(valor, (int, float)):
+                raise ValueError(
+                    f'A coluna {coluna_id} aceita apenas valores numéricos.'
+                )
+            return f'{sql} {simbolo} ?', [valor], coluna_id
+        if caso == 'i':
+            return f'{sql} {simbolo} ? COLLATE NOCASE', [str(valor)], coluna_id
+        return f'{sql} {simbolo} ?', [str(valor)], coluna_id
+
+    if coluna.get('numerica'):
+        raise ValueError(
+            f'O operador {operador} não se aplica à coluna {coluna_id}.'
+        )
+
+    valor = str(valor)
+    if operador == 'datestartswith':
+        return f"{sql} LIKE ? ESCAPE '\\'", [_escapar_like(valor) + '%'], coluna_id
+
+    # contains: o LIKE do SQLite ignora maiúsculas; instr() as diferencia
+    if caso == 'i':
+        return (
+            f"{sql} LIKE ? ESCAPE '\\'",
+            ['%' + _escapar_like(valor) + '%'],
+            coluna_id,
+        )
+    return f'instr({sql}, ?) > 0', [valor], coluna_id
+
+
+def traduzir_filter_query(filter_query, colunas):
+    """
+    Traduz o filter_query completo de uma DataTable em condições WHERE.
+
+    :param filter_query: Texto do filtro gerado pela DataTable (pode ser vazio)
+    :param colunas: Dicionário com as colunas permitidas
+    :return: Tupla (lista de condições, lista de parâmetros, lista de JOINs)
+    """
+    clausulas = []
+    params = []
+    juncoes = []
+
+    for expressao in dividir_filter_query(filter_query or ''):
+        clausula, parametros, coluna_id = traduzir_expressao(expressao, colunas)
+        clausulas.append(clausula)
+        params.extend(parametros)
+
+        juncao = colunas[coluna_id].get('juncao')
+        if juncao and juncao not in juncoes:
+            juncoes.append(juncao)
+
+    return clausulas, params, juncoes
+
+
+def traduzir_sort_by(sort_by, colunas):
+    """
+    Traduz o sort_by de uma DataTable em termos de ORDER BY.
+
+    :param sort_by: Lista de dicionários com 'column_id' e 'direction'
+    :param colunas: Dicionário com as colunas permitidas
+    :return: Lista de termos (ex.: ['t.valor DESC']) na ordem de prioridade
+    """
+    termos = []
+    for ordem in sort_by or []:
+        coluna_id = ordem.get('column_id')
+        if coluna_id not in colunas:
+            raise ValueError(f'Coluna não permitida na ordenação: {coluna_id}')
+
+        direcao = ordem.get('direction', 'asc')
+        if direcao not in ('asc', 'desc'):
+            raise ValueError(f'Direção de ordenação inválida: {direcao}')
+
+        termos.append(f"{colunas[coluna_id]['expressao']} {direcao.upper()}")
+
+    return termos
@@ -0,0 +1,140 @@
+"""
+Este módulo define as funções de consulta das faturas dos cartões de crédito.
+
+Os totais das faturas e o limite disponível do cartão são mantidos pelos
+triggers a cada escrita em transacoes (veja models/faturas.py), de modo que
+consultar uma fatura ou o limite disponível é a leitura de uma única linha, sem
+somar as transações do cartão.
+"""
+
+import sqlite3
+from models.ciclos_fatura import tabela_ciclos
+from models.database import conexao_leitura
+from models.dimensoes import obter_dimensoes
+from models.dinheiro import para_centavos, para_reais
+
+COLUNAS_FATURA = (
+    'id',
+    'conta_id',
+    'mes',
+    'ano',
+    'valor_total',
+    'data_fechamento',
+    'data_vencimento',
+    'limite_disponivel',
+    'valor_pago',
+    'status',
+)
+
+CONSULTA_FATURAS = f"SELECT {', '.join(COLUNAS_FATURA)} FROM faturas"
+
+
+def _fatura_em_reais(linha):
+    fatura = dict(zip(COLUNAS_FATURA, linha))
+    for campo in ('valor_total', 'limite_disponivel', 'valor_pago'):
+        fatura[campo] = para_reais(fatura[campo])
+    return fatura
+
+
+def _cartao(conta_id):
+    """
+    Retorna a conta em memória se ela for um cartão com os dias cadastrados.
+    """
+    conta = obter_dimensoes().obter('contas', conta_id)
+    if (
+        not conta
+        or conta['tipo'] != 'cartao'
+        or not conta['dia_fechamento']
+        or not conta['dia_vencimento']
+    ):
+        return None
+    return conta
+
+
+def obter_fatura(conta_id, data, uow=None):
+    """
+    Obtém a fatura em que entra uma compra feita na data informada.
+
+    :param conta_id: ID da conta do cartão
+    :param data: Data da compra no formato 'YYYY-MM-DD'
+    :param uow: Unidade de trabalho em andamento (opcional)
+    :return: Dicionário com resultado e a fatura (None se ainda não houver
+        transações nela)
+    """
+    conta = _cartao(conta_id)
+    if conta is None:
+        return {'success': False, 'error': 'A conta não é um cartão de crédito'}
+
+    tabela = tabela_ciclos(
+        conta_id, conta['dia_fechamento'], conta['dia_vencimento'], [data]
+    )
+    fechamento = tabela.ciclo(data)[0]
+    try:
+        with conexao_leitura(uow) as conn:
+            linha = conn.execute(
+                CONSULTA_FATURAS + ' WHERE conta_id = ? AND ano = ? AND mes = ?',
+                (conta_id, int(fechamento[:4]), int(fechamento[5:7])),
+            ).fetchone()
+        return {
+            'success': True,
+            'fatura': _fatura_em_reais(linha) if linha else None,
+        }
+    except sqlite3.Error as e:
+        return {'success': False, 'error': str(e)}
+
+
+def listar_faturas(conta_id, uow=None):
+    """
+    Lista as faturas de um cartão, da mais recente para a mais antiga.
+
+    :param conta_id: ID da conta do cartão
+    :param uow: Unidade de trabalho em andamento (opcional)
+    :return: Dicionário com resultado e a lista de faturas
+    """
+    try:
+        with conexao_leitura(uow) as conn:
+            linhas = conn.execute(
+                CONSULTA_FATURAS + ' WHERE conta_id = ? ORDER BY ano DESC, mes DESC',
+                (conta_id,),
+            ).fetchall()
+        return {
+            'success': True,
+            'faturas': [_fatura_em_reais(linha) for linha in linhas],
+        }
+    except sqlite3.Error as e:
+        return {'success': False, 'error': str(e)}
+
+
+def verificar_limite(conta_id, valor, uow=None):
+    """
+    Verifica se uma compra cabe no limite disponível do cartão.
+
+    O limite disponível desconta o que falta pagar de todas as faturas do
+    cartão e está gravado em cada uma delas; basta ler a mais recente.
+
+    :param conta_id: ID da conta do cartão
+    :param valor: Valor total da compra em reais (todas as parcelas)
+    :param uow: Unidade de trabalho em andamento (opcional)
+    :return: Dicionário com resultado, se a compra cabe e o limite disponível
+    """
+    conta = _cartao(conta_id)
+    if conta is None:
+        return {'success': False, 'error': 'A conta não é um cartão de crédito'}
+
+    try:
+        with conexao_leitura(uow) as conn:
+            linha = conn.execute(
+                'SELECT limite_disponivel FROM faturas WHERE conta_id = ? '
+                'ORDER BY ano DESC, mes DESC LIMIT 1',
+                (conta_id,),
+            ).fetchone()
+    except sqlite3.Error as e:
+        return {'success': False, 'error': str(e)}
+
+    # Sem faturas, nada foi gasto: todo o limite está disponível
+    disponivel = linha[0] if linha else conta['limite_credito'] or 0
+    return {
+        'success': True,
+        'cabe': para_centavos(abs(valor)) <= disponivel,
+        'limite_disponivel': para_reais(disponivel),
+    }
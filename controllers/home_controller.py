@@ -1,23 +1,55 @@
 from dash import dcc, html
 from views.transacoes_view import transacoes_layout
 from views.cadastros_view import cadastros_layout
+from views.visualizar_transacoes_view import (
+    get_layout as visualizar_transacoes_layout,
+)
+
+# Valor de cada aba, rótulo e função que monta o seu conteúdo
+ABAS = (
+    ('transacoes', 'Inserir Transações', transacoes_layout),
+    ('visualizar-transacoes', 'Visualizar Transações', visualizar_transacoes_layout),
+    ('cadastros', 'Cadastros', cadastros_layout),
+)
+
+ABA_INICIAL = 'transacoes'
+
+
+def id_conteudo_aba(valor):
+    """
+    Retorna o id do contêiner com o conteúdo da aba.
+    """
+    return f'conteudo-{valor}'
 
 
 def layout():
+    """
+    Monta as abas com o conteúdo de todas elas já montado.
+
+    O conteúdo de cada aba é montado uma única vez, junto com o layout da
+    aplicação, e fica no navegador; trocar de aba apenas mostra o contêiner da
+    aba escolhida e esconde os demais (callback clientside em app.py). Os dados
+    de cada aba são carregados pelos callbacks que têm a aba como entrada.
+    """
     return html.Div(
         [
             dcc.Tabs(
                 id='tabs',
-                value='transacoes',
+                value=ABA_INICIAL,
                 children=[
-                    dcc.Tab(label='Inserir Transações', value='transacoes'),
-                    dcc.Tab(
-                        label='Visualizar Transações',
-                        value='visualizar-transacoes',
-                    ),
-                    dcc.Tab(label='Cadastros', value='cadastros'),
+                    dcc.Tab(label=rotulo, value=valor) for valor, rotulo, _ in ABAS
+                ],
+            ),
+            html.Div(
+                [
+                    html.Div(
+                        montar(),
+                        id=id_conteudo_aba(valor),
+                        style=None if valor == ABA_INICIAL else {'display': 'none'},
+                    )
+                    for valor, _, montar in ABAS
                 ],
+                id='tabs-content',
             ),
-            html.Div(id='tabs-content'),
         ]
     )
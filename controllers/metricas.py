@@ -0,0 +1,79 @@
+"""
+Este módulo instrumenta os callbacks do Dash e expõe as métricas em /metrics.
+
+Todo callback de servidor é atendido por uma requisição a
+/_dash-update-component; a medição (models.metricas) é aberta antes dessa
+requisição e registrada depois que a resposta é montada, com o nome do callback
+(módulo e função) que a atendeu. Assim, todos os callbacks registrados, em
+callbacks/ ou em controllers/cadastro_controller.py, são medidos sem precisar
+decorar cada um.
+
+Com SQL_RASTREAMENTO=1 no arquivo .env, as medições também rastreiam cada
+instrução SQL (models.rastreamento_sql), e as instruções repetidas e conexões
+extras de cada callback são registradas no log.
+"""
+
+from flask import Response, g, request
+
+from models.metricas import (
+    encerrar_medicao,
+    exportar_metricas,
+    iniciar_medicao,
+    registrar_medicao,
+)
+from models.rastreamento_sql import rastreamento_ativado
+
+ROTA_CALLBACKS = '_dash-update-component'
+ROTA_METRICAS = '/metrics'
+
+
+def nome_callback(app, corpo):
+    """
+    Identifica o callback de uma requisição a partir das saídas pedidas.
+
+    :param app: Aplicação Dash
+    :param corpo: Corpo JSON da requisição
+    :return: 'modulo.funcao' do callback, ou as saídas se ele não for encontrado
+    """
+    saida = (corpo or {}).get('output', '')
+    registro = app.callback_map.get(saida)
+    if not registro or 'callback' not in registro:
+        return saida
+    funcao = registro['callback']
+    return f'{funcao.__module__}.{funcao.__name__}'
+
+
+def instrumentar_app(app):
+    """
+    Mede cada callback da aplicação e publica os histogramas em /metrics.
+
+    :param app: Aplicação Dash
+    """
+    server = app.server
+    rastrear = rastreamento_ativado()
+
+    @server.before_request
+    def _iniciar_medicao():
+        if request.path.endswith(ROTA_CALLBACKS):
+            g.medicao, g.token_medicao = iniciar_medicao(rastrear)
+
+    @server.after_request
+    def _registrar_medicao(resposta):
+        medicao = g.pop('medicao', None)
+        if medicao is not None:
+            registrar_medicao(
+                nome_callback(app, request.get_json(silent=True)),
+                medicao,
+                len(resposta.get_data()),
+            )
+        return resposta
+
+    @server.teardown_request
+    def _encerrar_medicao(_erro):
+        token = g.pop('token_medicao', None)
+        if token is not None:
+            encerrar_medicao(token)
+
+    @server.route(ROTA_METRICAS)
+    def metricas():
+        return Response(exportar_metricas(), mimetype='text/plain; version=0.0.4')
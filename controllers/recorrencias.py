@@ -0,0 +1,520 @@
+"""
+Este módulo implementa as recorrências virtuais.
+
+Uma recorrência grava apenas a regra (tabela recorrencias) e a transação modelo,
+que é a sua primeira ocorrência. As demais ocorrências não são gravadas no
+cadastro: elas são calculadas sob demanda para qualquer janela de datas
+(expandir_ocorrencias) e só viram linhas de transacoes quando vencem
+(materializar_recorrencias, que avança recorrencias.proxima_execucao) ou quando
+o usuário edita uma delas (materializar_ocorrencia).
+
+Cada ocorrência é identificada pela recorrência e pelo seu número (de 1 a
+recorrencias.ocorrencias). Nas listagens, as ocorrências ainda não gravadas têm
+um id negativo (id_virtual); as que o usuário exclui ficam registradas em
+recorrencias_excecoes para não serem geradas de novo.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from controllers.transacoes_controller import (
+    calcular_vencimentos,
+    gerar_cronograma,
+    obter_dias_cartao,
+)
+from models import database
+from models.cache import CacheResultados
+from models.database import conectar
+from models.faturas import atribuir_faturas
+
+# Os ids virtuais são -(recorrencia_id * FATOR_ID_VIRTUAL + número da ocorrência)
+FATOR_ID_VIRTUAL = 1_000_000
+
+# Colunas de uma ocorrência, na ordem das tuplas devolvidas por este módulo
+COLUNAS_OCORRENCIA = (
+    'id',
+    'data',
+    'data_vencimento',
+    'valor',
+    'tipo',
+    'descricao',
+    'status',
+    'parcelamento_id',
+    'conta_id',
+    'categoria_id',
+    'responsavel_id',
+    'pagamento_id',
+    'data_efetiva',
+    'recorrencia_id',
+    'ocorrencia',
+)
+
+# Origem (FROM) que une as transações gravadas às ocorrências virtuais, recebidas
+# como um único parâmetro JSON (lista de listas na ordem de COLUNAS_OCORRENCIA).
+# Os filtros da consulta externa são aplicados a cada lado da união pelo SQLite.
+ORIGEM_COM_OCORRENCIAS = (
+    '(SELECT {colunas} FROM transacoes '
+    'UNION ALL SELECT {extracoes} FROM json_each(?))'
+).format(
+    colunas=', '.join(COLUNAS_OCORRENCIA),
+    extracoes=', '.join(
+        f"json_extract(value, '$[{indice}]') AS {coluna}"
+        for indice, coluna in enumerate(COLUNAS_OCORRENCIA)
+    ),
+)
+
+# Regras com ocorrências ainda não gravadas, com os dados da transação modelo
+CONSULTA_REGRAS = """
+SELECT
+    r.id,
+    r.frequencia,
+    r.data_inicio,
+    r.ocorrencias,
+    r.proxima_execucao,
+    t.valor,
+    t.tipo,
+    t.descricao,
+    t.conta_id,
+    t.categoria_id,
+    t.responsavel_id,
+    t.pagamento_id
+FROM recorrencias r
+JOIN transacoes t ON t.id = r.transacao_id
+WHERE r.proxima_execucao IS NOT NULL
+"""
+
+# Grava uma ocorrência a partir da sua tupla, sem o id e a data_efetiva (que é
+# mantida pelos triggers); a ocorrência já gravada é ignorada
+INSERIR_OCORRENCIA = """
+INSERT OR IGNORE INTO transacoes
+(data, data_vencimento, valor, tipo, descricao, status, parcelamento_id,
+ conta_id, categoria_id, responsavel_id, pagamento_id, recorrencia_id, ocorrencia)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# O vencimento (data efetiva) de uma compra no cartão cai no máximo cerca de dois
+# meses depois dela; as datas das ocorrências de cartão são buscadas a partir
+# dessa margem antes do início da janela
+MARGEM_VENCIMENTO_DIAS = 75
+
+# Sem filtro de período, as listagens incluem as ocorrências virtuais apenas até
+# este horizonte, em meses a partir de hoje (variável RECORRENCIAS_HORIZONTE_MESES
+# do arquivo .env); as posteriores aparecem ao filtrar o mês ou o ano delas
+HORIZONTE_PADRAO_MESES = 12
+
+# Ocorrências virtuais por janela de datas, recalculadas a cada escrita no banco
+_cache = CacheResultados(tamanho_maximo=16, peso=len)
+
+# Último (banco, dia) em que as ocorrências vencidas foram gravadas
+_ultima_materializacao = None
+_materializacao_lock = threading.Lock()
+
+
+def hoje():
+    """
+    Retorna a data atual no formato 'YYYY-MM-DD'.
+    """
+    return date.today().isoformat()
+
+
+def horizonte_listagem():
+    """
+    Retorna a data ('YYYY-MM-DD', exclusive) até a qual as ocorrências virtuais
+    entram nas listagens sem filtro de período.
+    """
+    meses = int(os.getenv('RECORRENCIAS_HORIZONTE_MESES', HORIZONTE_PADRAO_MESES))
+    return (date.fromisoformat(hoje()) + relativedelta(months=meses)).isoformat()
+
+
+def id_virtual(recorrencia_id, numero):
+    """
+    Retorna o id (negativo) de uma ocorrência ainda não gravada.
+    """
+    return -(recorrencia_id * FATOR_ID_VIRTUAL + numero)
+
+
+def decompor_id_virtual(transacao_id):
+    """
+    Retorna (recorrencia_id, número da ocorrência) de um id virtual, ou None se
+    o id for de uma transação gravada.
+    """
+    transacao_id = int(transacao_id)
+    if transacao_id >= 0:
+        return None
+    return divmod(-transacao_id, FATOR_ID_VIRTUAL)
+
+
+def _numeros_ocupados(cursor, recorrencia_id=None):
+    """
+    Retorna {recorrencia_id: números} das ocorrências já gravadas ou excluídas
+    das regras com ocorrências pendentes.
+    """
+    condicao = 'IN (SELECT id FROM recorrencias WHERE proxima_execucao IS NOT NULL)'
+    params = []
+    if recorrencia_id is not None:
+        condicao = '= ?'
+        params = [recorrencia_id, recorrencia_id]
+
+    cursor.execute(
+        f"""
+        SELECT recorrencia_id, ocorrencia FROM transacoes
+        WHERE recorrencia_id {condicao}
+        UNION ALL
+        SELECT recorrencia_id, ocorrencia FROM recorrencias_excecoes
+        WHERE recorrencia_id {condicao}
+        """,
+        params,
+    )
+    ocupados = {}
+    for regra_id, numero in cursor.fetchall():
+        ocupados.setdefault(regra_id, set()).add(numero)
+    return ocupados
+
+
+def _montar_ocorrencias(regra, indices, datas, dias_cartao):
+    """
+    Monta as tuplas (na ordem de COLUNAS_OCORRENCIA) das ocorrências pedidas.
+    """
+    (
+        recorrencia_id,
+        _,
+        _,
+        quantidade,
+        _,
+        valor,
+        tipo,
+        descricao,
+        *relacionados,
+    ) = regra
+    datas_escolhidas = [datas[i] for i in indices]
+    vencimentos = calcular_vencimentos(
+        datas_escolhidas, dias_cartao, relacionados[0]
+    )
+    return [
+        (
+            id_virtual(recorrencia_id, i + 1),
+            data_ocorrencia,
+            vencimento,
+            valor,
+            tipo,
+            f'{descricao} ({i + 1}/{quantidade})',
+            'pendente',
+            None,
+            *relacionados,
+            vencimento or data_ocorrencia,
+            recorrencia_id,
+            i + 1,
+        )
+        for i, data_ocorrencia, vencimento in zip(
+            indices, datas_escolhidas, vencimentos
+        )
+    ]
+
+
+def _colunas_gravadas(ocorrencia):
+    # Todas as colunas, exceto id (posição 0) e data_efetiva (posição 12)
+    return ocorrencia[1:12] + ocorrencia[13:]
+
+
+def _pendentes(regra, datas, ocupados, ate=None):
+    """
+    Retorna as posições (na lista de datas) das ocorrências ainda não gravadas
+    nem excluídas, a partir da próxima execução e até a data `ate`, inclusive.
+    """
+    inicio = bisect_left(datas, regra[4])
+    fim = bisect_right(datas, ate) if ate else len(datas)
+    return [i for i in range(inicio, fim) if i + 1 not in ocupados]
+
+
+def _janela(datas, regra, inicio, fim, dias_cartao):
+    """
+    Retorna o intervalo de posições (na lista de datas, ordenada) das
+    ocorrências pendentes da regra cuja data efetiva pode cair em [inicio, fim).
+    """
+    desde = regra[4]
+    if inicio:
+        if dias_cartao:
+            # A data efetiva é o vencimento, posterior à data da compra
+            inicio = (
+                date.fromisoformat(inicio) - timedelta(days=MARGEM_VENCIMENTO_DIAS)
+            ).isoformat()
+        desde = max(desde, inicio)
+    return bisect_left(datas, desde), bisect_left(datas, fim) if fim else len(datas)
+
+
+def expandir_ocorrencias(inicio=None, fim=None, cursor=None):
+    """
+    Calcula as ocorrências ainda não gravadas de todas as recorrências cuja data
+    efetiva cai na janela informada.
+
+    Apenas as ocorrências da janela são montadas: as posições de cada regra são
+    localizadas por busca binária no cronograma de datas.
+
+    :param inicio: Data efetiva mínima ('YYYY-MM-DD'), inclusive
+    :param fim: Data efetiva máxima ('YYYY-MM-DD'), exclusive
+    :param cursor: Cursor de uma conexão aberta (opcional)
+    :return: Lista de tuplas na ordem de COLUNAS_OCORRENCIA
+    """
+    conn = None
+    if cursor is None:
+        conn = conectar()
+        cursor = conn.cursor()
+
+    try:
+        cursor.execute(CONSULTA_REGRAS)
+        regras = cursor.fetchall()
+        if not regras:
+            return []
+
+        ocupados = _numeros_ocupados(cursor)
+        dias_por_conta = {}
+        ocorrencias = []
+        for regra in regras:
+            conta_id = regra[8]
+            if conta_id not in dias_por_conta:
+                dias_por_conta[conta_id] = obter_dias_cartao(cursor, conta_id)
+            dias_cartao = dias_por_conta[conta_id]
+
+            datas = gerar_cronograma(regra[2], regra[3], regra[1])
+            primeira, ultima = _janela(datas, regra, inicio, fim, dias_cartao)
+            ocupadas = ocupados.get(regra[0], ())
+            indices = [i for i in range(primeira, ultima) if i + 1 not in ocupadas]
+            ocorrencias.extend(
+                _montar_ocorrencias(regra, indices, datas, dias_cartao)
+            )
+    finally:
+        if conn is not None:
+            conn.close()
+
+    if any(dias_por_conta.values()):
+        # Ocorrências de cartão trazidas pela margem: confere a data efetiva
+        ocorrencias = [
+            ocorrencia
+            for ocorrencia in ocorrencias
+            if (inicio is None or ocorrencia[12] >= inicio)
+            and (fim is None or ocorrencia[12] < fim)
+        ]
+    return ocorrencias
+
+
+def ocorrencias_virtuais(inicio=None, fim=None):
+    """
+    Retorna as ocorrências ainda não gravadas com data efetiva em [inicio, fim),
+    reaproveitando o cálculo de cada janela enquanto o banco não for alterado.
+
+    :param inicio: Data efetiva mínima ('YYYY-MM-DD'), inclusive (opcional)
+    :param fim: Data efetiva máxima ('YYYY-MM-DD'), exclusive (opcional)
+    :return: Tupla de tuplas na ordem de COLUNAS_OCORRENCIA
+    """
+    try:
+        return _cache.obter_ou_calcular(
+            ('virtuais', inicio, fim),
+            lambda: tuple(expandir_ocorrencias(inicio, fim)),
+        )
+    except sqlite3.Error:
+        return ()
+
+
+def _ocorrencia_pendente(cursor, recorrencia_id, numero):
+    """
+    Monta a ocorrência informada, se ela ainda não foi gravada nem excluída.
+
+    :return: Tupla na ordem de COLUNAS_OCORRENCIA, ou None
+    """
+    cursor.execute(CONSULTA_REGRAS + ' AND r.id = ?', (recorrencia_id,))
+    regra = cursor.fetchone()
+    if not regra or not 1 <= numero <= regra[3]:
+        return None
+    if numero in _numeros_ocupados(cursor, recorrencia_id).get(recorrencia_id, ()):
+        return None
+
+    datas = gerar_cronograma(regra[2], numero, regra[1])
+    (ocorrencia,) = _montar_ocorrencias(
+        regra, [numero - 1], datas, obter_dias_cartao(cursor, regra[8])
+    )
+    return ocorrencia
+
+
+def obter_ocorrencia_virtual(transacao_id, cursor=None):
+    """
+    Retorna a ocorrência virtual com o id informado, ou None.
+
+    :param transacao_id: Id virtual da ocorrência
+    :param cursor: Cursor de uma conexão aberta (opcional)
+    """
+    conn = None
+    if cursor is None:
+        conn = conectar()
+        cursor = conn.cursor()
+    try:
+        return _ocorrencia_pendente(cursor, *decompor_id_virtual(transacao_id))
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def origem_com_ocorrencias(ocorrencias):
+    """
+    Retorna a origem (FROM, com alias a definir) e os parâmetros de uma consulta
+    sobre as transações gravadas e as ocorrências informadas.
+
+    :param ocorrencias: Tuplas na ordem de COLUNAS_OCORRENCIA
+    :return: Tupla (SQL, lista de parâmetros)
+    """
+    if not ocorrencias:
+        return 'transacoes', []
+    return ORIGEM_COM_OCORRENCIAS, [json.dumps(ocorrencias)]
+
+
+def _ajustar_saldos(cursor, alteracoes):
+    cursor.executemany(
+        'UPDATE contas SET saldo = saldo + ? WHERE id = ?',
+        [
+            (valor, conta_id)
+            for conta_id, valor in alteracoes.items()
+            if conta_id and valor
+        ],
+    )
+
+
+def materializar_vencidas(cursor, ate, recorrencia_id=None):
+    """
+    Grava as ocorrências com data até `ate` e avança a próxima execução das
+    regras, sem confirmar a transação.
+
+    O saldo de cada conta recebe uma única atualização com o valor das
+    ocorrências gravadas.
+
+    :param cursor: Cursor de uma conexão aberta
+    :param ate: Data limite ('YYYY-MM-DD'), inclusive
+    :param recorrencia_id: Restringe a uma única recorrência (opcional)
+    :return: Quantidade de ocorrências gravadas
+    """
+    query = CONSULTA_REGRAS + ' AND r.proxima_execucao <= ?'
+    params = [ate]
+    if recorrencia_id is not None:
+        query += ' AND r.id = ?'
+        params.append(recorrencia_id)
+
+    cursor.execute(query, params)
+    regras = cursor.fetchall()
+    if not regras:
+        return 0
+
+    ocupados = _numeros_ocupados(cursor, recorrencia_id)
+    alteracoes_saldo = {}
+    gravadas = 0
+    for regra in regras:
+        datas = gerar_cronograma(regra[2], regra[3], regra[1])
+        indices = _pendentes(regra, datas, ocupados.get(regra[0], ()), ate)
+        conta_id = regra[8]
+        dias_cartao = obter_dias_cartao(cursor, conta_id)
+        ocorrencias = _montar_ocorrencias(regra, indices, datas, dias_cartao)
+        cursor.executemany(
+            INSERIR_OCORRENCIA, [_colunas_gravadas(o) for o in ocorrencias]
+        )
+        gravadas += len(ocorrencias)
+        if ocorrencias and dias_cartao:
+            atribuir_faturas(
+                cursor,
+                't.recorrencia_id = ? AND t.fatura_id IS NULL',
+                (regra[0],),
+            )
+        alteracoes_saldo[conta_id] = (
+            alteracoes_saldo.get(conta_id, 0) + regra[5] * len(ocorrencias)
+        )
+
+        seguinte = bisect_right(datas, ate)
+        cursor.execute(
+            'UPDATE recorrencias SET proxima_execucao = ? WHERE id = ?',
+            (datas[seguinte] if seguinte < len(datas) else None, regra[0]),
+        )
+
+    _ajustar_saldos(cursor, alteracoes_saldo)
+    return gravadas
+
+
+def materializar_recorrencias(ate=None):
+    """
+    Grava as ocorrências vencidas de todas as recorrências.
+
+    :param ate: Data limite ('YYYY-MM-DD'), inclusive; padrão: hoje
+    :return: Dicionário com resultado e a quantidade de ocorrências gravadas
+    """
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+        quantidade = materializar_vencidas(cursor, ate or hoje())
+        conn.commit()
+        return {'success': True, 'quantidade': quantidade}
+
+    except sqlite3.Error as e:
+        conn.rollback()
+        return {'success': False, 'error': str(e)}
+    finally:
+        conn.close()
+
+
+def materializar_se_necessario():
+    """
+    Grava as ocorrências vencidas uma vez por dia (e por arquivo de banco).
+
+    Chamada antes das listagens, custa apenas uma comparação depois da primeira
+    execução do dia.
+    """
+    global _ultima_materializacao
+    marca = (str(database.DB_PATH), hoje())
+    if _ultima_materializacao == marca:
+        return
+    with _materializacao_lock:
+        if _ultima_materializacao == marca:
+            return
+        if materializar_recorrencias(marca[1])['success']:
+            _ultima_materializacao = marca
+
+
+def materializar_ocorrencia(cursor, transacao_id):
+    """
+    Grava uma ocorrência virtual (para que possa ser editada), sem confirmar a
+    transação. O valor da ocorrência é somado ao saldo da conta.
+
+    :param cursor: Cursor de uma conexão aberta
+    :param transacao_id: Id virtual da ocorrência
+    :return: Id da transação gravada, ou None se a ocorrência não existir
+    """
+    recorrencia_id, numero = decompor_id_virtual(transacao_id)
+
+    cursor.execute(
+        'SELECT id FROM transacoes WHERE recorrencia_id = ? AND ocorrencia = ?',
+        (recorrencia_id, numero),
+    )
+    gravada = cursor.fetchone()
+    if gravada:
+        return gravada[0]
+
+    ocorrencia = _ocorrencia_pendente(cursor, recorrencia_id, numero)
+    if ocorrencia is None:
+        return None
+    cursor.execute(INSERIR_OCORRENCIA, _colunas_gravadas(ocorrencia))
+    novo_id = cursor.lastrowid
+    atribuir_faturas(cursor, 't.id = ?', (novo_id,))
+    _ajustar_saldos(cursor, {ocorrencia[8]: ocorrencia[3]})
+    return novo_id
+
+
+def excluir_ocorrencia(cursor, recorrencia_id, numero):
+    """
+    Registra a exclusão de uma ocorrência para que ela não seja mais expandida
+    nem gravada, sem confirmar a transação.
+    """
+    cursor.execute(
+        'INSERT OR IGNORE INTO recorrencias_excecoes (recorrencia_id, ocorrencia) '
+        'VALUES (?, ?)',
+        (recorrencia_id, numero),
+    )
@@ -0,0 +1,301 @@
+"""
+Este módulo define as funções de controller para o cadastro de transações,
+incluindo parcelamentos e recorrências.
+
+Um parcelamento é calculado por inteiro antes de ser gravado: as datas e os
+vencimentos são gerados de uma vez e as parcelas são inseridas com um único
+executemany. Uma recorrência grava apenas a regra e a primeira ocorrência; as
+demais são expandidas sob demanda (veja controllers/recorrencias.py).
+"""
+
+import sqlite3
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from models.calendario import proximo_dia_util
+from models.ciclos_fatura import tabela_ciclos, vencimento_da_fatura
+from models.database import unidade_de_trabalho
+from models.faturas import atribuir_faturas
+from models.dinheiro import dividir_em_parcelas
+
+# Intervalo entre duas ocorrências de cada frequência de recorrência
+INCREMENTOS_FREQUENCIA = {
+    'semanal': relativedelta(weeks=1),
+    'mensal': relativedelta(months=1),
+    'trimestral': relativedelta(months=3),
+    'semestral': relativedelta(months=6),
+    'anual': relativedelta(years=1),
+}
+
+INSERIR_TRANSACAO = """
+INSERT INTO transacoes
+(data, valor, tipo, descricao, conta_id, categoria_id, responsavel_id,
+ pagamento_id, status, parcelamento_id, data_vencimento)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pendente', ?, ?)
+"""
+
+
+def calcular_data_vencimento(
+    data_compra_str: str, dia_fechamento: int, dia_vencimento: int
+) -> str:
+    """
+    Calcula a data de vencimento da fatura do cartão com base na data da compra,
+    no dia de fechamento e no dia de vencimento.
+
+    Se a data de vencimento calculada não for um dia útil (fim de semana ou feriado),
+    a data é ajustada para o próximo dia útil.
+
+    :param data_compra_str: Data da compra no formato 'YYYY-MM-DD'
+    :param dia_fechamento: Dia do mês em que a fatura fecha (1-31)
+    :param dia_vencimento: Dia do mês em que a fatura vence (1-31)
+    :return: Data de vencimento no formato 'YYYY-MM-DD'
+    """
+    data_vencimento = vencimento_da_fatura(
+        data_compra_str, dia_fechamento, dia_vencimento
+    )
+    return proximo_dia_util(data_vencimento).strftime('%Y-%m-%d')
+
+
+def data_ocorrencia(data, indice, frequencia='mensal'):
+    """
+    Calcula a data de uma ocorrência da série, sem gerar as anteriores.
+
+    :param data: Data inicial no formato 'YYYY-MM-DD'
+    :param indice: Posição da ocorrência na série (a data inicial é 0)
+    :param frequencia: Chave de INCREMENTOS_FREQUENCIA (padrão mensal)
+    :return: Data no formato 'YYYY-MM-DD'
+    """
+    incremento = INCREMENTOS_FREQUENCIA.get(
+        frequencia, INCREMENTOS_FREQUENCIA['mensal']
+    )
+    inicio = datetime.strptime(data, '%Y-%m-%d')
+    return (inicio + incremento * indice).strftime('%Y-%m-%d')
+
+
+def gerar_cronograma(data, quantidade, frequencia='mensal'):
+    """
+    Gera as datas de uma série de transações a partir da data inicial.
+
+    Cada data é calculada a partir da inicial (e não da anterior), para que uma
+    série iniciada no dia 31 volte ao dia 31 nos meses que o têm.
+
+    :param data: Data inicial no formato 'YYYY-MM-DD'
+    :param quantidade: Quantidade de datas
+    :param frequencia: Chave de INCREMENTOS_FREQUENCIA (padrão mensal)
+    :return: Lista de datas no formato 'YYYY-MM-DD'
+    """
+    inicio = datetime.strptime(data, '%Y-%m-%d')
+    incremento = INCREMENTOS_FREQUENCIA.get(
+        frequencia, INCREMENTOS_FREQUENCIA['mensal']
+    )
+    return [
+        (inicio + incremento * i).strftime('%Y-%m-%d') for i in range(quantidade)
+    ]
+
+
+def calcular_vencimentos(datas, dias_cartao, conta_id=None):
+    """
+    Calcula o vencimento da fatura de cada data da série, consultando a tabela
+    de ciclos do cartão (models.ciclos_fatura).
+
+    :param datas: Lista de datas no formato 'YYYY-MM-DD'
+    :param dias_cartao: Tupla (dia_fechamento, dia_vencimento) ou None
+    :param conta_id: ID da conta do cartão
+    :return: Lista de vencimentos ('YYYY-MM-DD'), ou de None se não for cartão
+    """
+    if not dias_cartao:
+        return [None] * len(datas)
+
+    return tabela_ciclos(conta_id, *dias_cartao, datas).vencimentos_de(datas)
+
+
+def obter_dias_cartao(cursor, conta_id):
+    """
+    Retorna (dia_fechamento, dia_vencimento) se a conta for um cartão com os
+    dois dias cadastrados, ou None.
+    """
+    cursor.execute(
+        """
+        SELECT dia_fechamento, dia_vencimento
+        FROM contas
+        WHERE id = ? AND tipo = 'cartao'
+        """,
+        (conta_id,),
+    )
+    info_cartao = cursor.fetchone()
+    if info_cartao and info_cartao[0] and info_cartao[1]:
+        return info_cartao
+    return None
+
+
+def cadastrar_transacao(
+    valor,
+    data,
+    tipo,
+    descricao,
+    conta_id=None,
+    categoria_id=None,
+    responsavel_id=None,
+    pagamento_id=None,
+    tipo_conta=None,
+    num_parcelas=None,
+    frequencia=None,
+    ocorrencias=None,
+    dias_cartao=None,
+    uow=None,
+):
+    """
+    Cadastra uma transação simples, parcelada ou recorrente.
+
+    Parcelas não alteram o saldo da conta (ele só muda quando a parcela é paga);
+    as demais transações somam seu valor ao saldo. De uma recorrência, apenas as
+    ocorrências gravadas (a primeira e as que já venceram) alteram o saldo.
+
+    :param valor: Valor em centavos, já negativo para despesas
+    :param data: Data da transação no formato 'YYYY-MM-DD'
+    :param tipo: 'receita' ou 'despesa'
+    :param tipo_conta: Tipo da conta; vencimentos só são calculados para 'cartao'
+    :param num_parcelas: Quantidade de parcelas (>= 2) para um parcelamento
+    :param frequencia: Frequência da recorrência (chave de INCREMENTOS_FREQUENCIA)
+    :param ocorrencias: Quantidade de ocorrências (>= 1) para uma recorrência
+    :param dias_cartao: (dia_fechamento, dia_vencimento) do cartão, se já
+        conhecidos; quando omitidos, são lidos da conta
+    :param uow: Unidade de trabalho em andamento (opcional)
+    :return: Dicionário com resultado e a quantidade de transações gravadas
+    """
+    # Importação local: controllers.recorrencias depende deste módulo
+    from controllers.recorrencias import hoje, materializar_vencidas
+
+    try:
+        with unidade_de_trabalho(uow) as uow:
+            cursor = uow.cursor()
+
+            if tipo_conta != 'cartao' or not conta_id:
+                dias_cartao = None
+            elif dias_cartao is None:
+                dias_cartao = obter_dias_cartao(cursor, conta_id)
+            elif not all(dias_cartao):
+                dias_cartao = None
+
+            relacionados = (conta_id, categoria_id, responsavel_id, pagamento_id)
+
+            if num_parcelas and num_parcelas >= 2:
+                datas = gerar_cronograma(data, num_parcelas)
+                vencimentos = calcular_vencimentos(datas, dias_cartao, conta_id)
+
+                cursor.execute(
+                    """
+                    INSERT INTO parcelamentos
+                    (descricao, valor_total, parcelas, data_compra, data_vencimento,
+                     conta_id, categoria_id, responsavel_id, pagamento_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        descricao,
+                        abs(valor),
+                        num_parcelas,
+                        data,
+                        vencimentos[0],
+                        conta_id,
+                        categoria_id,
+                        responsavel_id,
+                        pagamento_id,
+                    ),
+                )
+                parcelamento_id = cursor.lastrowid
+
+                # Centavos restantes da divisão vão para as primeiras parcelas
+                valores = dividir_em_parcelas(valor, num_parcelas)
+                cursor.executemany(
+                    INSERIR_TRANSACAO,
+                    [
+                        (
+                            datas[i],
+                            valores[i],
+                            tipo,
+                            f'{descricao} ({i + 1}/{num_parcelas})',
+                            *relacionados,
+                            parcelamento_id,
+                            vencimentos[i],
+                        )
+                        for i in range(num_parcelas)
+                    ],
+                )
+                quantidade = num_parcelas
+                alteracao_saldo = 0
+                transacoes_gravadas = ('t.parcelamento_id = ?', (parcelamento_id,))
+
+            elif frequencia and ocorrencias and ocorrencias >= 1:
+                # Apenas a transação modelo (ocorrência 1) e a regra são gravadas
+                cursor.execute(
+                    INSERIR_TRANSACAO,
+                    (
+                        data,
+                        valor,
+                        tipo,
+                        descricao,
+                        *relacionados,
+                        None,
+                        calcular_vencimentos([data], dias_cartao, conta_id)[0],
+                    ),
+                )
+                primeira_transacao_id = cursor.lastrowid
+
+                cursor.execute(
+                    """
+                    INSERT INTO recorrencias
+                    (transacao_id, frequencia, data_inicio, data_fim, proxima_execucao, ocorrencias)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        primeira_transacao_id,
+                        frequencia,
+                        data,
+                        data_ocorrencia(data, ocorrencias - 1, frequencia),
+                        data_ocorrencia(data, 1, frequencia)
+                        if ocorrencias > 1
+                        else None,
+                        ocorrencias,
+                    ),
+                )
+                recorrencia_id = cursor.lastrowid
+                cursor.execute(
+                    'UPDATE transacoes SET recorrencia_id = ?, ocorrencia = 1 '
+                    'WHERE id = ?',
+                    (recorrencia_id, primeira_transacao_id),
+                )
+
+                # Ocorrências que já venceram (série iniciada no passado)
+                quantidade = 1 + materializar_vencidas(cursor, hoje(), recorrencia_id)
+                alteracao_saldo = valor
+                transacoes_gravadas = ('t.id = ?', (primeira_transacao_id,))
+
+            else:
+                cursor.execute(
+                    INSERIR_TRANSACAO,
+                    (
+                        data,
+                        valor,
+                        tipo,
+                        descricao,
+                        *relacionados,
+                        None,
+                        calcular_vencimentos([data], dias_cartao, conta_id)[0],
+                    ),
+                )
+                quantidade = 1
+                alteracao_saldo = valor
+                transacoes_gravadas = ('t.id = ?', (cursor.lastrowid,))
+
+            if dias_cartao:
+                atribuir_faturas(cursor, *transacoes_gravadas)
+
+            if conta_id and alteracao_saldo:
+                cursor.execute(
+                    'UPDATE contas SET saldo = saldo + ? WHERE id = ?',
+                    (alteracao_saldo, conta_id),
+                )
+
+        return {'success': True, 'quantidade': quantidade}
+
+    except sqlite3.Error as e:
+        return {'success': False, 'error': str(e)}
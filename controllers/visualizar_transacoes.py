@@ -4,7 +4,212 @@ Segue o padrão MVC e implementa o design pattern Repository para acesso ao banc
 """
 
 import sqlite3
-from models.database import conectar
+from functools import lru_cache
+from models.cache import CacheResultados
+from models.database import conectar, conexao_leitura, unidade_de_trabalho
+from models.dimensoes import obter_dimensoes
+from models.dinheiro import para_centavos, para_reais
+from models.faturas import atribuir_faturas
+from controllers.consulta_tabela import traduzir_filter_query, traduzir_sort_by
+from controllers.recorrencias import (
+    decompor_id_virtual,
+    excluir_ocorrencia,
+    horizonte_listagem,
+    materializar_ocorrencia,
+    materializar_se_necessario,
+    obter_ocorrencia_virtual,
+    ocorrencias_virtuais,
+    origem_com_ocorrencias,
+)
+
+
+# Consulta base das transações. Os nomes de conta, categoria, responsável e forma
+# de pagamento são resolvidos em memória (models.dimensoes), sem JOIN. A origem é
+# a tabela transacoes ou, havendo ocorrências virtuais, a sua união com elas
+# (veja TransacoesRepository.montar_origem).
+CONSULTA_TRANSACOES = """
+SELECT
+    t.id,
+    t.data,
+    t.data_vencimento,
+    t.valor,
+    t.tipo,
+    t.descricao,
+    t.status,
+    CASE WHEN par.id IS NOT NULL THEN 'Sim' ELSE 'Não' END as parcelada,
+    CASE WHEN rec.id IS NOT NULL THEN rec.frequencia ELSE 'Não' END as recorrente,
+    t.conta_id,
+    t.categoria_id,
+    t.responsavel_id,
+    t.pagamento_id,
+    t.data_efetiva
+FROM {origem} t
+LEFT JOIN parcelamentos par ON t.parcelamento_id = par.id
+LEFT JOIN recorrencias rec ON rec.id = t.recorrencia_id
+"""
+
+# Ordenação padrão da tabela (a mesma usada pelo cursor da paginação keyset). A
+# data é a efetiva, a mesma exibida, filtrada e ordenada na coluna 'data'
+ORDENACAO_PADRAO = 't.data_efetiva DESC, t.id DESC'
+
+# Colunas da tabela de visualização que podem ser ordenadas e filtradas no banco.
+# Os valores são exibidos em reais e sem sinal, e tipo/status capitalizados.
+# Conta e categoria são buscadas por subconsulta pela chave primária, apenas
+# quando o usuário ordena ou filtra por elas.
+COLUNAS_TABELA = {
+    'id': {'expressao': 't.id', 'numerica': True},
+    'data': {'expressao': 't.data_efetiva'},
+    'valor': {
+        'expressao': 'ABS(t.valor)',
+        'numerica': True,
+        'converter': lambda v: para_centavos(abs(v))
+        if isinstance(v, (int, float))
+        else v,
+    },
+    'tipo': {'expressao': 't.tipo', 'converter': lambda v: str(v).lower()},
+    'descricao': {'expressao': 't.descricao'},
+    'conta': {
+        'expressao': '(SELECT c.nome FROM contas c WHERE c.id = t.conta_id)'
+    },
+    'categoria': {
+        'expressao': '(SELECT cat.nome FROM categorias cat '
+        'WHERE cat.id = t.categoria_id)'
+    },
+    'status': {'expressao': 't.status', 'converter': lambda v: str(v).lower()},
+}
+
+
+@lru_cache(maxsize=64)
+def _capitalizar(texto):
+    # tipo, status e frequência têm poucos valores distintos: reaproveita as strings
+    return texto.capitalize()
+
+
+def _conta_tipo(t, d):
+    conta = d.obter('contas', t[9])
+    return conta['tipo'] if conta else None
+
+
+# Campos disponíveis em cada transação, calculados apenas quando são pedidos a
+# partir de uma linha de CONSULTA_TRANSACOES (t) e das dimensões em memória (d)
+CAMPOS_TRANSACAO = {
+    'id': lambda t, d: t[0],
+    # Para cartões de crédito, a data efetiva é a data de vencimento
+    'data': lambda t, d: t[13],
+    'data_original': lambda t, d: t[1],
+    'data_vencimento': lambda t, d: t[2],
+    'valor': lambda t, d: para_reais(abs(t[3])),  # Valor absoluto para exibição
+    'valor_original': lambda t, d: para_reais(t[3]),  # Valor original para cálculos
+    'tipo': lambda t, d: _capitalizar(t[4]),
+    'descricao': lambda t, d: t[5],
+    'conta': lambda t, d: d.nomes['contas'].get(t[9]),
+    'conta_tipo': _conta_tipo,
+    'categoria': lambda t, d: d.nomes['categorias'].get(t[10]),
+    'responsavel': lambda t, d: d.nomes['responsaveis'].get(t[11]),
+    'forma_pagamento': lambda t, d: d.nomes['pagamentos'].get(t[12]),
+    'status': lambda t, d: _capitalizar(t[6]),
+    'parcelada': lambda t, d: t[7],
+    'recorrente': lambda t, d: _capitalizar(t[8]) if t[8] != 'Não' else 'Não',
+    'conta_id': lambda t, d: t[9],
+    'categoria_id': lambda t, d: t[10],
+    'responsavel_id': lambda t, d: t[11],
+    'pagamento_id': lambda t, d: t[12],
+}
+
+
+class TransacaoRegistro:
+    """
+    Uma transação de um LoteTransacoes, acessada como um dicionário somente leitura.
+
+    Guarda apenas a linha original do banco; cada campo é calculado ao ser lido.
+    """
+
+    __slots__ = ('_linha', '_dimensoes')
+
+    def __init__(self, linha, dimensoes):
+        self._linha = linha
+        self._dimensoes = dimensoes
+
+    def __getitem__(self, campo):
+        return CAMPOS_TRANSACAO[campo](self._linha, self._dimensoes)
+
+    def get(self, campo, padrao=None):
+        if campo not in CAMPOS_TRANSACAO:
+            return padrao
+        return self[campo]
+
+    def keys(self):
+        return CAMPOS_TRANSACAO.keys()
+
+    def para_dicionario(self, campos=None):
+        """
+        Converte a transação em um dicionário com os campos pedidos (ou todos).
+        """
+        return {campo: self[campo] for campo in campos or CAMPOS_TRANSACAO}
+
+
+class LoteTransacoes:
+    """
+    Resultado de uma consulta de transações, guardado como as tuplas lidas do banco.
+
+    Em vez de um dicionário com todos os campos por linha, os campos são
+    materializados sob demanda: por registro (iteração e índice), por coluna
+    (`coluna`) ou já no formato de linhas de tabela (`para_dicionarios`). Os
+    nomes vêm do retrato das dimensões tirado junto com a consulta.
+    """
+
+    __slots__ = ('linhas', 'dimensoes')
+
+    def __init__(self, linhas, dimensoes=None):
+        self.linhas = linhas
+        self.dimensoes = dimensoes
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def __bool__(self):
+        return bool(self.linhas)
+
+    def __iter__(self):
+        return (TransacaoRegistro(linha, self.dimensoes) for linha in self.linhas)
+
+    def __getitem__(self, indice):
+        return TransacaoRegistro(self.linhas[indice], self.dimensoes)
+
+    def coluna(self, campo):
+        """
+        Retorna os valores de um único campo de todas as transações.
+        """
+        extrair = CAMPOS_TRANSACAO[campo]
+        dimensoes = self.dimensoes
+        return [extrair(linha, dimensoes) for linha in self.linhas]
+
+    def para_dicionarios(self, campos=None):
+        """
+        Monta, em uma única passada, uma lista de dicionários apenas com os campos
+        pedidos (ou todos), no formato esperado pelas DataTables.
+
+        :param campos: Sequência com os nomes dos campos
+        :return: Lista de dicionários
+        """
+        campos = tuple(campos or CAMPOS_TRANSACAO)
+        extrair = [CAMPOS_TRANSACAO[campo] for campo in campos]
+        dimensoes = self.dimensoes
+        return [
+            dict(zip(campos, [f(linha, dimensoes) for f in extrair]))
+            for linha in self.linhas
+        ]
+
+
+# Resultados recentes das consultas de listagem, descartados a cada escrita no banco.
+# O peso de cada resultado é a quantidade de transações que ele guarda.
+_cache = CacheResultados(
+    peso=lambda resultado: max(1, len(resultado.get('transacoes', ())))
+)
+
+
+def _sucesso(resultado):
+    return resultado['success']
 
 
 class TransacoesRepository:
@@ -13,196 +218,411 @@ class TransacoesRepository:
     Implementa o padrão Repository para abstrair o acesso ao banco de dados.
     """
 
+    @staticmethod
+    def intervalo_periodo(filtros):
+        """
+        Converte o filtro de período em um intervalo semiaberto de datas.
+
+        :param filtros: Dicionário com as chaves 'periodo', 'mes' e 'ano'
+        :return: Tupla (data_inicio, data_fim) ou None se não houver filtro de período
+        """
+        if (
+            filtros.get('periodo') == 'mes'
+            and filtros.get('mes')
+            and filtros.get('ano')
+        ):
+            mes = int(filtros['mes'])
+            ano = int(filtros['ano'])
+
+            # Determinar a data de início e fim do mês
+            if mes == 12:
+                proximo_mes = 1
+                proximo_ano = ano + 1
+            else:
+                proximo_mes = mes + 1
+                proximo_ano = ano
+
+            data_inicio = f'{ano}-{mes:02d}-01'
+            data_fim = f'{proximo_ano}-{proximo_mes:02d}-01'
+            return data_inicio, data_fim
+
+        if filtros.get('periodo') == 'ano' and filtros.get('ano'):
+            ano = int(filtros['ano'])
+            return f'{ano}-01-01', f'{ano + 1}-01-01'
+
+        return None
+
+    @staticmethod
+    def montar_filtros(filtros):
+        """
+        Monta a cláusula WHERE (sobre a tabela transacoes, com alias t) para os filtros.
+
+        :param filtros: Dicionário com os filtros a serem aplicados
+        :return: Tupla (lista de condições, lista de parâmetros)
+        """
+        where_clauses = []
+        params = []
+
+        if not filtros:
+            return where_clauses, params
+
+        # Filtro de período (data_efetiva já considera o vencimento dos cartões)
+        intervalo = TransacoesRepository.intervalo_periodo(filtros)
+        if intervalo:
+            where_clauses.append('t.data_efetiva >= ? AND t.data_efetiva < ?')
+            params.extend(intervalo)
+
+        # Filtro de conta
+        if filtros.get('conta_id'):
+            where_clauses.append('t.conta_id = ?')
+            params.append(filtros['conta_id'])
+
+        # Filtro de categoria
+        if filtros.get('categoria_id'):
+            where_clauses.append('t.categoria_id = ?')
+            params.append(filtros['categoria_id'])
+
+        # Filtro de tipo (receita/despesa)
+        if filtros.get('tipo') and filtros['tipo'] != 'todas':
+            where_clauses.append('t.tipo = ?')
+            params.append(filtros['tipo'])
+
+        # Filtro de status
+        if filtros.get('status') and filtros['status'] != 'todos':
+            where_clauses.append('t.status = ?')
+            params.append(filtros['status'])
+
+        return where_clauses, params
+
+    @staticmethod
+    def montar_origem(filtros):
+        """
+        Monta a origem (FROM) das consultas de listagem: a tabela transacoes ou,
+        se alguma ocorrência virtual de recorrência atende aos filtros, a união
+        da tabela com essas ocorrências.
+
+        Apenas as ocorrências do período filtrado são expandidas (sem período,
+        as que vencem até o horizonte de recorrencias.horizonte_listagem); os
+        demais filtros são aplicados a elas antes de serem enviadas ao banco.
+
+        :param filtros: Dicionário com os filtros a serem aplicados
+        :return: Tupla (SQL da origem, lista de parâmetros)
+        """
+        intervalo = TransacoesRepository.intervalo_periodo(filtros or {})
+        inicio, fim = intervalo or (None, horizonte_listagem())
+        ocorrencias = ocorrencias_virtuais(inicio, fim)
+        if ocorrencias and filtros:
+            conta_id = filtros.get('conta_id')
+            categoria_id = filtros.get('categoria_id')
+            tipo = filtros.get('tipo')
+            status = filtros.get('status')
+            ocorrencias = [
+                o
+                for o in ocorrencias
+                if (not conta_id or str(o[8]) == str(conta_id))
+                and (not categoria_id or str(o[9]) == str(categoria_id))
+                and (not tipo or tipo == 'todas' or o[4] == tipo)
+                and (not status or status == 'todos' or o[6] == status)
+            ]
+        return origem_com_ocorrencias(ocorrencias)
+
+    @staticmethod
+    def calcular_totais(cursor, filtros=None, filter_query=None):
+        """
+        Conta as transações e soma receitas e despesas em uma única consulta
+        agregada, sem trazer as linhas para o Python.
+
+        Com apenas o filtro de período (e/ou tipo), a consulta é respondida
+        inteiramente pelo índice idx_transacoes_efetiva_tipo_valor, sem ler a
+        tabela.
+
+        :param cursor: Cursor de uma conexão aberta
+        :param filtros: Dicionário com os filtros a serem aplicados
+        :param filter_query: Filtro digitado nas colunas da DataTable
+        :return: Tupla (total de registros, receitas, despesas), em centavos
+        """
+        origem, params = TransacoesRepository.montar_origem(filtros)
+        where_clauses, params_filtros = TransacoesRepository.montar_filtros(filtros)
+        params.extend(params_filtros)
+        clausulas_tabela, params_tabela, juncoes = traduzir_filter_query(
+            filter_query, COLUNAS_TABELA
+        )
+        where_clauses.extend(clausulas_tabela)
+        params.extend(params_tabela)
+
+        # Só junta contas/categorias quando o filtro da tabela usa seus nomes
+        query = f"""
+        SELECT
+            COUNT(*),
+            COALESCE(SUM(CASE WHEN t.tipo = 'receita' THEN t.valor ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN t.tipo != 'receita' THEN -t.valor ELSE 0 END), 0)
+        FROM {origem} t
+        """
+        if juncoes:
+            query += ' ' + ' '.join(juncoes)
+        if where_clauses:
+            query += ' WHERE ' + ' AND '.join(where_clauses)
+
+        cursor.execute(query, params)
+        return cursor.fetchone()
+
+    @staticmethod
+    def normalizar_filtros(filtros):
+        """
+        Reduz os filtros ao que de fato altera a consulta, para uso como chave de
+        cache: filtros equivalentes (ex.: mês '3' e 3, tipo None e 'todas')
+        geram a mesma chave.
+
+        :param filtros: Dicionário com os filtros a serem aplicados
+        :return: Tupla hashable
+        """
+        if not filtros:
+            return ()
+
+        tipo = filtros.get('tipo')
+        status = filtros.get('status')
+        return (
+            TransacoesRepository.intervalo_periodo(filtros),
+            str(filtros['conta_id']) if filtros.get('conta_id') else None,
+            str(filtros['categoria_id']) if filtros.get('categoria_id') else None,
+            tipo if tipo and tipo != 'todas' else None,
+            status if status and status != 'todos' else None,
+        )
+
     @staticmethod
     def buscar_transacoes(filtros=None):
         """
-        Busca transações com base nos filtros fornecidos.
+        Busca transações com base nos filtros fornecidos, reaproveitando o
+        resultado em cache enquanto o banco não for alterado.
 
         :param filtros: Dicionário com os filtros a serem aplicados
         :return: Dicionário com resultado e dados
         """
+        chave = (
+            'transacoes',
+            TransacoesRepository.normalizar_filtros(filtros),
+        )
+        return _cache.obter_ou_calcular(
+            chave,
+            lambda: TransacoesRepository._consultar_transacoes(filtros),
+            _sucesso,
+        )
+
+    @staticmethod
+    def _consultar_transacoes(filtros=None):
+        """
+        Executa a consulta de buscar_transacoes no banco de dados.
+        """
         try:
             conn = conectar()
             cursor = conn.cursor()
 
-            # Construir a query SQL base
-            query = """
-            SELECT 
-                t.id,
-                t.data,
-                t.data_vencimento,
-                t.valor,
-                t.tipo,
-                t.descricao,
-                c.nome as conta_nome,
-                c.tipo as conta_tipo,
-                cat.nome as categoria_nome,
-                r.nome as responsavel_nome,
-                p.tipo as pagamento_tipo,
-                t.status,
-                CASE WHEN par.id IS NOT NULL THEN 'Sim' ELSE 'Não' END as parcelada,
-                CASE WHEN rec.id IS NOT NULL THEN rec.frequencia ELSE 'Não' END as recorrente,
-                t.conta_id,
-                t.categoria_id,
-                t.responsavel_id,
-                t.pagamento_id
-            FROM transacoes t
-            LEFT JOIN contas c ON t.conta_id = c.id
-            LEFT JOIN categorias cat ON t.categoria_id = cat.id
-            LEFT JOIN responsaveis r ON t.responsavel_id = r.id
-            LEFT JOIN pagamentos p ON t.pagamento_id = p.id
-            LEFT JOIN parcelamentos par ON t.parcelamento_id = par.id
-            LEFT JOIN recorrencias rec ON rec.transacao_id = t.id
-            """
+            origem, params = TransacoesRepository.montar_origem(filtros)
+            query = CONSULTA_TRANSACOES.format(origem=origem)
 
             # Aplicar filtros
-            where_clauses = []
-            params = []
+            where_clauses, params_filtros = TransacoesRepository.montar_filtros(
+                filtros
+            )
+            params.extend(params_filtros)
+            if where_clauses:
+                query += ' WHERE ' + ' AND '.join(where_clauses)
 
-            if filtros:
-                # Filtro de período
-                if (
-                    filtros.get('periodo') == 'mes'
-                    and filtros.get('mes')
-                    and filtros.get('ano')
-                ):
-                    # Construir as datas de início e fim do mês
-                    mes = int(filtros['mes'])
-                    ano = int(filtros['ano'])
-
-                    # Determinar a data de início e fim do mês
-                    if mes == 12:
-                        proximo_mes = 1
-                        proximo_ano = ano + 1
-                    else:
-                        proximo_mes = mes + 1
-                        proximo_ano = ano
-
-                    data_inicio = f'{ano}-{mes:02d}-01'
-                    data_fim = f'{proximo_ano}-{proximo_mes:02d}-01'
-
-                    # Modificar a lógica para considerar data_vencimento para transações de cartão
-                    where_clauses.append(
-                        """
-                        ((c.tipo = 'cartao' AND t.data_vencimento IS NOT NULL AND 
-                          t.data_vencimento >= ? AND t.data_vencimento < ?) 
-                         OR
-                         ((c.tipo != 'cartao' OR t.data_vencimento IS NULL) AND 
-                          t.data >= ? AND t.data < ?))
-                    """
-                    )
-                    params.extend(
-                        [data_inicio, data_fim, data_inicio, data_fim]
-                    )
+            # Ordenação
+            query += ' ORDER BY ' + ORDENACAO_PADRAO
 
-                elif filtros.get('periodo') == 'ano' and filtros.get('ano'):
-                    ano = int(filtros['ano'])
-                    data_inicio = f'{ano}-01-01'
-                    data_fim = f'{ano + 1}-01-01'
-
-                    # Modificar a lógica para considerar data_vencimento para transações de cartão
-                    where_clauses.append(
-                        """
-                        ((c.tipo = 'cartao' AND t.data_vencimento IS NOT NULL AND 
-                          t.data_vencimento >= ? AND t.data_vencimento < ?) OR
-                         (c.tipo != 'cartao' OR t.data_vencimento IS NULL) AND 
-                          t.data >= ? AND t.data < ?)
-                    """
-                    )
-                    params.extend(
-                        [data_inicio, data_fim, data_inicio, data_fim]
-                    )
+            # Executar a query
+            cursor.execute(query, params)
+            resultado = LoteTransacoes(cursor.fetchall(), obter_dimensoes())
+
+            # Os totais vêm da consulta agregada, já em centavos
+            _, total_receitas, total_despesas = (
+                TransacoesRepository.calcular_totais(cursor, filtros)
+            )
+
+            return {
+                'success': True,
+                'transacoes': resultado,
+                'total_receitas': para_reais(total_receitas),
+                'total_despesas': para_reais(total_despesas),
+                'saldo': para_reais(total_receitas - total_despesas),
+            }
+
+        except sqlite3.Error as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'transacoes': LoteTransacoes([]),
+                'total_receitas': 0,
+                'total_despesas': 0,
+                'saldo': 0,
+            }
+        finally:
+            conn.close()
+
+    @staticmethod
+    def buscar_pagina(
+        filtros=None,
+        tamanho_pagina=15,
+        pagina=0,
+        apos=None,
+        sort_by=None,
+        filter_query=None,
+    ):
+        """
+        Busca uma única página de transações.
+
+        O resultado fica em cache enquanto o banco não for alterado; veja
+        _consultar_pagina para os parâmetros.
+        """
+        # Com cursor (e na ordem padrão), a página depende apenas dele
+        if apos and not sort_by:
+            posicao = ('apos', tuple(apos))
+        else:
+            posicao = ('pagina', pagina)
+
+        chave = (
+            'pagina',
+            TransacoesRepository.normalizar_filtros(filtros),
+            tamanho_pagina,
+            posicao,
+            tuple((o.get('column_id'), o.get('direction')) for o in sort_by or []),
+            (filter_query or '').strip(),
+        )
+        return _cache.obter_ou_calcular(
+            chave,
+            lambda: TransacoesRepository._consultar_pagina(
+                filtros, tamanho_pagina, pagina, apos, sort_by, filter_query
+            ),
+            _sucesso,
+        )
+
+    @staticmethod
+    def _consultar_pagina(
+        filtros=None,
+        tamanho_pagina=15,
+        pagina=0,
+        apos=None,
+        sort_by=None,
+        filter_query=None,
+    ):
+        """
+        Consulta uma única página de transações no banco de dados.
 
-                # Filtro de conta
-                if filtros.get('conta_id'):
-                    where_clauses.append('t.conta_id = ?')
-                    params.append(filtros['conta_id'])
+        Sem `sort_by`, a ordem é por data efetiva e id decrescentes e, quando
+        `apos` é informado, a página é obtida por keyset, continuando a partir da
+        última linha da página anterior, sem precisar descartar as linhas
+        anteriores como o OFFSET faz. Com outra ordenação, ou sem `apos`, usa OFFSET.
 
-                # Filtro de categoria
-                if filtros.get('categoria_id'):
-                    where_clauses.append('t.categoria_id = ?')
-                    params.append(filtros['categoria_id'])
+        :param filtros: Dicionário com os filtros a serem aplicados
+        :param tamanho_pagina: Quantidade de linhas por página
+        :param pagina: Índice da página (a partir de 0), usado sem `apos`
+        :param apos: Par [data efetiva, id] da última linha da página anterior
+        :param sort_by: Ordenação pedida pela DataTable
+        :param filter_query: Filtro digitado nas colunas da DataTable
+        :return: Dicionário com as transações da página e o cursor da última linha
+        """
+        try:
+            conn = conectar()
+            cursor = conn.cursor()
 
-                # Filtro de tipo (receita/despesa)
-                if filtros.get('tipo') and filtros['tipo'] != 'todas':
-                    where_clauses.append('t.tipo = ?')
-                    params.append(filtros['tipo'])
+            origem, params = TransacoesRepository.montar_origem(filtros)
+            where_clauses, params_filtros = TransacoesRepository.montar_filtros(
+                filtros
+            )
+            params.extend(params_filtros)
+            clausulas_tabela, params_tabela, _ = traduzir_filter_query(
+                filter_query, COLUNAS_TABELA
+            )
+            where_clauses.extend(clausulas_tabela)
+            params.extend(params_tabela)
 
-                # Filtro de status
-                if filtros.get('status') and filtros['status'] != 'todos':
-                    where_clauses.append('t.status = ?')
-                    params.append(filtros['status'])
+            termos_ordenacao = traduzir_sort_by(sort_by, COLUNAS_TABELA)
+            usar_keyset = apos and not termos_ordenacao
+            if usar_keyset:
+                where_clauses.append('(t.data_efetiva, t.id) < (?, ?)')
+                params.extend(apos)
 
-            # Adicionar cláusulas WHERE à query
+            query = CONSULTA_TRANSACOES.format(origem=origem)
             if where_clauses:
                 query += ' WHERE ' + ' AND '.join(where_clauses)
 
-            # Ordenação
-            query += ' ORDER BY t.data DESC'
+            # O id desempata linhas iguais e mantém as páginas estáveis
+            if termos_ordenacao:
+                query += ' ORDER BY ' + ', '.join(termos_ordenacao + ['t.id DESC'])
+            else:
+                query += ' ORDER BY ' + ORDENACAO_PADRAO
+            query += ' LIMIT ?'
+            params.append(tamanho_pagina)
+
+            if not usar_keyset and pagina:
+                query += ' OFFSET ?'
+                params.append(pagina * tamanho_pagina)
 
-            # Executar a query
             cursor.execute(query, params)
-            transacoes = cursor.fetchall()
-
-            # Formatar os resultados
-            resultado = []
-            total_receitas = 0
-            total_despesas = 0
-
-            for t in transacoes:
-                # Converter valores para exibição
-                valor = t[3]
-                data_exibir = t[1]
-
-                # Se for cartão de crédito e tiver data de vencimento, usar a data de vencimento
-                if t[7] == 'cartao' and t[2]:
-                    data_exibir = t[2]
-
-                # Acumular totais
-                if t[4] == 'receita':
-                    total_receitas += valor
-                else:  # despesa
-                    total_despesas += abs(valor)
-
-                transacao = {
-                    'id': t[0],
-                    'data': data_exibir,
-                    'data_original': t[1],
-                    'data_vencimento': t[2],
-                    'valor': abs(valor),  # Valor absoluto para exibição
-                    'valor_original': valor,  # Valor original para cálculos
-                    'tipo': t[4].capitalize(),
-                    'descricao': t[5],
-                    'conta': t[6],
-                    'conta_tipo': t[7],
-                    'categoria': t[8],
-                    'responsavel': t[9],
-                    'forma_pagamento': t[10],
-                    'status': t[11].capitalize(),
-                    'parcelada': t[12],
-                    'recorrente': t[13].capitalize()
-                    if t[13] != 'Não'
-                    else 'Não',
-                    'conta_id': t[14],
-                    'categoria_id': t[15],
-                    'responsavel_id': t[16],
-                    'pagamento_id': t[17],
-                }
-                resultado.append(transacao)
+            linhas = cursor.fetchall()
 
             return {
                 'success': True,
-                'transacoes': resultado,
-                'total_receitas': total_receitas,
-                'total_despesas': total_despesas,
-                'saldo': total_receitas - total_despesas,
+                'transacoes': LoteTransacoes(linhas, obter_dimensoes()),
+                'cursor': [linhas[-1][13], linhas[-1][0]] if linhas else None,
             }
 
-        except sqlite3.Error as e:
+        except (sqlite3.Error, ValueError) as e:
             return {
                 'success': False,
                 'error': str(e),
-                'transacoes': [],
+                'transacoes': LoteTransacoes([]),
+            }
+        finally:
+            conn.close()
+
+    @staticmethod
+    def resumir_transacoes(filtros=None, filter_query=None):
+        """
+        Conta as transações que atendem aos filtros e soma receitas e despesas.
+
+        :param filtros: Dicionário com os filtros a serem aplicados
+        :param filter_query: Filtro digitado nas colunas da DataTable
+        :return: Dicionário com o total de registros e os totais do período
+        """
+        chave = (
+            'resumo',
+            TransacoesRepository.normalizar_filtros(filtros),
+            (filter_query or '').strip(),
+        )
+        return _cache.obter_ou_calcular(
+            chave,
+            lambda: TransacoesRepository._consultar_resumo(filtros, filter_query),
+            _sucesso,
+        )
+
+    @staticmethod
+    def _consultar_resumo(filtros=None, filter_query=None):
+        """
+        Executa a consulta de resumir_transacoes no banco de dados.
+        """
+        try:
+            conn = conectar()
+            cursor = conn.cursor()
+
+            total_registros, total_receitas, total_despesas = (
+                TransacoesRepository.calcular_totais(cursor, filtros, filter_query)
+            )
+
+            return {
+                'success': True,
+                'total_registros': total_registros,
+                'total_receitas': para_reais(total_receitas),
+                'total_despesas': para_reais(total_despesas),
+                'saldo': para_reais(total_receitas - total_despesas),
+            }
+
+        except (sqlite3.Error, ValueError) as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'total_registros': 0,
                 'total_receitas': 0,
                 'total_despesas': 0,
                 'saldo': 0,
@@ -211,41 +631,67 @@ class TransacoesRepository:
             conn.close()
 
     @staticmethod
-    def obter_transacao(transacao_id):
+    def obter_transacao(transacao_id, uow=None):
         """
         Obtém uma transação específica pelo ID.
 
+        Ocorrências virtuais de recorrências (id negativo) são calculadas, sem
+        consultar a tabela.
+
         :param transacao_id: ID da transação
+        :param uow: Unidade de trabalho em andamento (opcional)
         :return: Dicionário com dados da transação
         """
+        if decompor_id_virtual(transacao_id):
+            ocorrencia = obter_ocorrencia_virtual(
+                int(transacao_id), uow.cursor() if uow else None
+            )
+            if not ocorrencia:
+                return {'success': False, 'error': 'Transação não encontrada'}
+            return {
+                'success': True,
+                'transacao': {
+                    'id': ocorrencia[0],
+                    'data': ocorrencia[1],
+                    'valor': para_reais(abs(ocorrencia[3])),
+                    'tipo': ocorrencia[4],
+                    'descricao': ocorrencia[5],
+                    'conta_id': ocorrencia[8],
+                    'categoria_id': ocorrencia[9],
+                    'responsavel_id': ocorrencia[10],
+                    'pagamento_id': ocorrencia[11],
+                    'status': ocorrencia[6],
+                },
+            }
+
         try:
-            conn = conectar()
-            cursor = conn.cursor()
+            with conexao_leitura(uow) as conn:
+                cursor = conn.cursor()
+
+                query = """
+                SELECT
+                    t.id,
+                    t.data,
+                    t.valor,
+                    t.tipo,
+                    t.descricao,
+                    t.conta_id,
+                    t.categoria_id,
+                    t.responsavel_id,
+                    t.pagamento_id,
+                    t.status
+                FROM transacoes t
+                WHERE t.id = ?
+                """
 
-            query = """
-            SELECT
-                t.id,
-                t.data,
-                t.valor,
-                t.tipo,
-                t.descricao,
-                t.conta_id,
-                t.categoria_id,
-                t.responsavel_id,
-                t.pagamento_id,
-                t.status
-            FROM transacoes t
-            WHERE t.id = ?
-            """
-
-            cursor.execute(query, (transacao_id,))
-            t = cursor.fetchone()
+                cursor.execute(query, (transacao_id,))
+                t = cursor.fetchone()
 
             if not t:
                 return {'success': False, 'error': 'Transação não encontrada'}
 
-            # Obter o valor absoluto (para edição)
-            valor_abs = abs(t[2])
+            # Obter o valor absoluto em reais (para edição)
+            valor_abs = para_reais(abs(t[2]))
 
             transacao = {
                 'id': t[0],
@@ -264,160 +710,265 @@ class TransacoesRepository:
 
         except sqlite3.Error as e:
             return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def obter_linha(transacao_id, filtros=None, filter_query=None):
+        """
+        Obtém uma transação gravada no formato das linhas da listagem, desde
+        que ela atenda aos filtros, e informa se ela também atende ao filtro das
+        colunas da tabela.
+
+        :param transacao_id: ID da transação
+        :param filtros: Dicionário com os filtros a serem aplicados
+        :param filter_query: Filtro digitado nas colunas da DataTable
+        :return: Dicionário com resultado, um lote com a transação (vazio se
+            ela não atender aos filtros) e `na_tabela`
+        """
+        try:
+            conn = conectar()
+            cursor = conn.cursor()
+
+            where_clauses, params = TransacoesRepository.montar_filtros(filtros)
+            where_clauses.insert(0, 't.id = ?')
+            params.insert(0, transacao_id)
+            query = (
+                CONSULTA_TRANSACOES.format(origem='transacoes')
+                + ' WHERE '
+                + ' AND '.join(where_clauses)
+            )
+
+            cursor.execute(query, params)
+            linhas = cursor.fetchall()
+
+            # Os totais seguem apenas os filtros; a tabela, também o das colunas
+            na_tabela = bool(linhas)
+            clausulas_tabela, params_tabela, juncoes = traduzir_filter_query(
+                filter_query, COLUNAS_TABELA
+            )
+            if linhas and clausulas_tabela:
+                cursor.execute(
+                    f"SELECT 1 FROM transacoes t {' '.join(juncoes)} "
+                    f"WHERE t.id = ? AND {' AND '.join(clausulas_tabela)}",
+                    [transacao_id] + params_tabela,
+                )
+                na_tabela = cursor.fetchone() is not None
+
+            return {
+                'success': True,
+                'transacoes': LoteTransacoes(linhas, obter_dimensoes()),
+                'na_tabela': na_tabela,
+            }
+
+        except (sqlite3.Error, ValueError) as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'transacoes': LoteTransacoes([]),
+                'na_tabela': False,
+            }
         finally:
             conn.close()
 
     @staticmethod
-    def atualizar_transacao(transacao_id, dados):
+    def atualizar_transacao(transacao_id, dados, uow=None):
         """
         Atualiza uma transação existente.
 
+        Uma ocorrência virtual de recorrência é gravada antes de ser alterada.
+
         :param transacao_id: ID da transação a ser atualizada
         :param dados: Dicionário com os novos dados
-        :return: Dicionário com resultado da operação
+        :param uow: Unidade de trabalho em andamento (opcional)
+        :return: Dicionário com resultado da operação, o ID gravado (o de uma
+            ocorrência virtual muda ao ser gravada), o tipo e valor anteriores,
+            em centavos, e o ID da recorrência, se a transação for o modelo de
+            uma (as ocorrências virtuais mudam junto com ela)
         """
         try:
-            conn = conectar()
-            cursor = conn.cursor()
+            with unidade_de_trabalho(uow) as uow:
+                cursor = uow.cursor()
 
-            # Obter dados atuais da transação para verificar mudanças no saldo
-            cursor.execute(
-                'SELECT valor, conta_id, tipo FROM transacoes WHERE id = ?',
-                (transacao_id,),
-            )
-            transacao_atual = cursor.fetchone()
+                if decompor_id_virtual(transacao_id):
+                    transacao_id = materializar_ocorrencia(cursor, transacao_id)
+                    if transacao_id is None:
+                        return {'success': False, 'error': 'Transação não encontrada'}
 
-            if not transacao_atual:
-                return {'success': False, 'error': 'Transação não encontrada'}
+                # Obter dados atuais da transação para verificar mudanças no saldo
+                # (e se ela é o modelo de uma recorrência)
+                cursor.execute(
+                    'SELECT t.valor, t.conta_id, t.tipo, t.data, r.id '
+                    'FROM transacoes t '
+                    'LEFT JOIN recorrencias r ON r.transacao_id = t.id '
+                    'WHERE t.id = ?',
+                    (transacao_id,),
+                )
+                transacao_atual = cursor.fetchone()
 
-            valor_atual = transacao_atual[0]
-            conta_id_atual = transacao_atual[1]
-            tipo_atual = transacao_atual[2]
+                if not transacao_atual:
+                    return {'success': False, 'error': 'Transação não encontrada'}
 
-            # Preparar o novo valor com base no tipo
-            valor_novo = dados['valor']
-            if dados['tipo'] == 'despesa' and valor_novo > 0:
-                valor_novo = -valor_novo
+                valor_atual = transacao_atual[0]
+                conta_id_atual = transacao_atual[1]
+                tipo_atual = transacao_atual[2]
 
-            # Atualizar a transação
-            cursor.execute(
-                """
-                UPDATE transacoes
-                SET data = ?, valor = ?, tipo = ?, descricao = ?,
-                    conta_id = ?, categoria_id = ?, responsavel_id = ?,
-                    pagamento_id = ?, status = ?
-                WHERE id = ?
-                """,
-                (
-                    dados['data'],
-                    valor_novo,
-                    dados['tipo'],
-                    dados['descricao'],
-                    dados['conta_id'],
-                    dados['categoria_id'],
-                    dados['responsavel_id'],
-                    dados['pagamento_id'],
-                    dados['status'],
-                    transacao_id,
-                ),
-            )
+                # Preparar o novo valor, em centavos, com base no tipo
+                valor_novo = para_centavos(dados['valor'])
+                if dados['tipo'] == 'despesa' and valor_novo > 0:
+                    valor_novo = -valor_novo
 
-            # Atualizar saldos das contas se necessário
-            # Se a conta mudou ou o valor mudou
-            if (
-                conta_id_atual != dados['conta_id']
-                or valor_atual != valor_novo
-            ) and dados['status'] != 'cancelado':
-                # Reverter o efeito no saldo da conta antiga
-                if conta_id_atual:
-                    cursor.execute(
-                        'UPDATE contas SET saldo = saldo - ? WHERE id = ?',
-                        (valor_atual, conta_id_atual),
-                    )
+                # Atualizar a transação
+                cursor.execute(
+                    """
+                    UPDATE transacoes
+                    SET data = ?, valor = ?, tipo = ?, descricao = ?,
+                        conta_id = ?, categoria_id = ?, responsavel_id = ?,
+                        pagamento_id = ?, status = ?
+                    WHERE id = ?
+                    """,
+                    (
+                        dados['data'],
+                        valor_novo,
+                        dados['tipo'],
+                        dados['descricao'],
+                        dados['conta_id'],
+                        dados['categoria_id'],
+                        dados['responsavel_id'],
+                        dados['pagamento_id'],
+                        dados['status'],
+                        transacao_id,
+                    ),
+                )
 
-                # Aplicar o efeito no saldo da nova conta
-                if dados['conta_id']:
+                # Com outra data ou conta, a transação pode pertencer a outra fatura
+                if (
+                    conta_id_atual != dados['conta_id']
+                    or transacao_atual[3] != dados['data']
+                ):
                     cursor.execute(
-                        'UPDATE contas SET saldo = saldo + ? WHERE id = ?',
-                        (valor_novo, dados['conta_id']),
+                        'UPDATE transacoes SET fatura_id = NULL, data_vencimento = NULL '
+                        'WHERE id = ?',
+                        (transacao_id,),
                     )
+                    atribuir_faturas(cursor, 't.id = ?', (transacao_id,))
 
-            conn.commit()
+                # Atualizar saldos das contas se necessário
+                # Se a conta mudou ou o valor mudou
+                if (
+                    conta_id_atual != dados['conta_id']
+                    or valor_atual != valor_novo
+                ) and dados['status'] != 'cancelado':
+                    # Reverter o efeito no saldo da conta antiga
+                    if conta_id_atual:
+                        cursor.execute(
+                            'UPDATE contas SET saldo = saldo - ? WHERE id = ?',
+                            (valor_atual, conta_id_atual),
+                        )
+
+                    # Aplicar o efeito no saldo da nova conta
+                    if dados['conta_id']:
+                        cursor.execute(
+                            'UPDATE contas SET saldo = saldo + ? WHERE id = ?',
+                            (valor_novo, dados['conta_id']),
+                        )
 
             return {
                 'success': True,
                 'message': 'Transação atualizada com sucesso',
+                'transacao_id': transacao_id,
+                'anterior': {'tipo': tipo_atual, 'valor': valor_atual},
+                'recorrencia_id': transacao_atual[4],
             }
 
         except sqlite3.Error as e:
-            conn.rollback()
             return {'success': False, 'error': str(e)}
-        finally:
-            conn.close()
 
     @staticmethod
-    def excluir_transacao(transacao_id):
+    def excluir_transacao(transacao_id, uow=None):
         """
         Exclui uma transação.
 
+        Excluir a transação modelo de uma recorrência exclui a recorrência; as
+        demais ocorrências (gravadas ou virtuais) são excluídas individualmente.
+
         :param transacao_id: ID da transação a ser excluída
-        :return: Dicionário com resultado da operação
+        :param uow: Unidade de trabalho em andamento (opcional)
+        :return: Dicionário com resultado da operação, o tipo e valor da
+            transação excluída, em centavos, e o ID da recorrência, se a
+            transação era o modelo de uma (excluída junto com as ocorrências)
         """
         try:
-            conn = conectar()
-            cursor = conn.cursor()
-
-            # Verificar se a transação existe e obter informações para atualizar saldo
-            cursor.execute(
-                'SELECT valor, conta_id, status FROM transacoes WHERE id = ?',
-                (transacao_id,),
-            )
-            transacao = cursor.fetchone()
-
-            if not transacao:
-                return {'success': False, 'error': 'Transação não encontrada'}
+            with unidade_de_trabalho(uow) as uow:
+                cursor = uow.cursor()
+
+                ocorrencia_virtual = decompor_id_virtual(transacao_id)
+                if ocorrencia_virtual:
+                    ocorrencia = obter_ocorrencia_virtual(int(transacao_id), cursor)
+                    if not ocorrencia:
+                        return {'success': False, 'error': 'Transação não encontrada'}
+                    excluir_ocorrencia(cursor, *ocorrencia_virtual)
+                    return {
+                        'success': True,
+                        'message': 'Transação excluída com sucesso',
+                        'excluida': {'tipo': ocorrencia[4], 'valor': ocorrencia[3]},
+                        'recorrencia_id': None,
+                    }
+
+                # Verificar se a transação existe e obter informações para atualizar saldo
+                cursor.execute(
+                    'SELECT valor, conta_id, status, recorrencia_id, ocorrencia, tipo '
+                    'FROM transacoes WHERE id = ?',
+                    (transacao_id,),
+                )
+                transacao = cursor.fetchone()
 
-            valor = transacao[0]
-            conta_id = transacao[1]
-            status = transacao[2]
+                if not transacao:
+                    return {'success': False, 'error': 'Transação não encontrada'}
 
-            # Verificar se a transação faz parte de uma recorrência
-            cursor.execute(
-                'SELECT id FROM recorrencias WHERE transacao_id = ?',
-                (transacao_id,),
-            )
-            recorrencia = cursor.fetchone()
+                valor = transacao[0]
+                conta_id = transacao[1]
+                status = transacao[2]
 
-            # Excluir recorrência se existir
-            if recorrencia:
+                # Verificar se a transação faz parte de uma recorrência
                 cursor.execute(
-                    'DELETE FROM recorrencias WHERE id = ?', (recorrencia[0],)
+                    'SELECT id FROM recorrencias WHERE transacao_id = ?',
+                    (transacao_id,),
                 )
+                recorrencia = cursor.fetchone()
 
-            # Excluir a transação
-            cursor.execute(
-                'DELETE FROM transacoes WHERE id = ?', (transacao_id,)
-            )
+                # Excluir recorrência se existir
+                if recorrencia:
+                    cursor.execute(
+                        'DELETE FROM recorrencias_excecoes WHERE recorrencia_id = ?',
+                        (recorrencia[0],),
+                    )
+                    cursor.execute(
+                        'DELETE FROM recorrencias WHERE id = ?', (recorrencia[0],)
+                    )
+                elif transacao[3]:
+                    # Ocorrência de uma recorrência: não deve ser gravada de novo
+                    excluir_ocorrencia(cursor, transacao[3], transacao[4])
 
-            # Atualizar saldo da conta se a transação não estava cancelada
-            if conta_id and status != 'cancelado':
+                # Excluir a transação
                 cursor.execute(
-                    'UPDATE contas SET saldo = saldo - ? WHERE id = ?',
-                    (valor, conta_id),
+                    'DELETE FROM transacoes WHERE id = ?', (transacao_id,)
                 )
 
-            conn.commit()
+                # Atualizar saldo da conta se a transação não estava cancelada
+                if conta_id and status != 'cancelado':
+                    cursor.execute(
+                        'UPDATE contas SET saldo = saldo - ? WHERE id = ?',
+                        (valor, conta_id),
+                    )
 
             return {
                 'success': True,
                 'message': 'Transação excluída com sucesso',
+                'excluida': {'tipo': transacao[5], 'valor': valor},
+                'recorrencia_id': recorrencia[0] if recorrencia else None,
             }
 
         except sqlite3.Error as e:
-            conn.rollback()
             return {'success': False, 'error': str(e)}
-        finally:
-            conn.close()
 
 
 # Funções de interface para o controller
@@ -430,35 +981,99 @@ def listar_transacoes(filtros=None):
     :param filtros: Dicionário com os filtros a serem aplicados
     :return: Dicionário com resultado e dados
     """
+    materializar_se_necessario()
     return TransacoesRepository.buscar_transacoes(filtros)
 
 
-def obter_transacao(transacao_id):
+def listar_pagina_transacoes(
+    filtros=None,
+    tamanho_pagina=15,
+    pagina=0,
+    apos=None,
+    sort_by=None,
+    filter_query=None,
+):
+    """
+    Lista uma página de transações com base nos filtros fornecidos.
+
+    :param filtros: Dicionário com os filtros a serem aplicados
+    :param tamanho_pagina: Quantidade de linhas por página
+    :param pagina: Índice da página (a partir de 0)
+    :param apos: Par [data efetiva, id] da última linha da página anterior, se conhecido
+    :param sort_by: Ordenação pedida pela DataTable
+    :param filter_query: Filtro digitado nas colunas da DataTable
+    :return: Dicionário com resultado e dados da página
+    """
+    materializar_se_necessario()
+    return TransacoesRepository.buscar_pagina(
+        filtros, tamanho_pagina, pagina, apos, sort_by, filter_query
+    )
+
+
+def resumir_transacoes(filtros=None, filter_query=None):
+    """
+    Retorna a quantidade de transações e os totais para os filtros fornecidos.
+
+    :param filtros: Dicionário com os filtros a serem aplicados
+    :param filter_query: Filtro digitado nas colunas da DataTable
+    :return: Dicionário com o total de registros e os totais do período
+    """
+    materializar_se_necessario()
+    return TransacoesRepository.resumir_transacoes(filtros, filter_query)
+
+
+def estatisticas_cache():
+    """
+    Retorna os acertos, falhas e ocupação do cache das consultas de transações.
+
+    :return: Dicionário com as estatísticas do cache
+    """
+    return _cache.estatisticas()
+
+
+def obter_transacao(transacao_id, uow=None):
     """
     Obtém uma transação específica pelo ID.
 
     :param transacao_id: ID da transação
+    :param uow: Unidade de trabalho em andamento (opcional)
     :return: Dicionário com dados da transação
     """
-    return TransacoesRepository.obter_transacao(transacao_id)
+    return TransacoesRepository.obter_transacao(transacao_id, uow)
+
+
+def obter_linha_transacao(transacao_id, filtros=None, filter_query=None):
+    """
+    Obtém uma transação no formato das linhas da listagem, se ela atender aos
+    filtros.
+
+    :param transacao_id: ID da transação
+    :param filtros: Dicionário com os filtros a serem aplicados
+    :param filter_query: Filtro digitado nas colunas da DataTable
+    :return: Dicionário com resultado, um lote com a transação e se ela também
+        atende ao filtro das colunas (`na_tabela`)
+    """
+    return TransacoesRepository.obter_linha(transacao_id, filtros, filter_query)
 
 
-def editar_transacao(transacao_id, dados):
+def editar_transacao(transacao_id, dados, uow=None):
     """
     Edita uma transação existente.
 
     :param transacao_id: ID da transação
     :param dados: Dicionário com os novos dados
+    :param uow: Unidade de trabalho em andamento (opcional)
     :return: Dicionário com resultado da operação
     """
-    return TransacoesRepository.atualizar_transacao(transacao_id, dados)
+    return TransacoesRepository.atualizar_transacao(transacao_id, dados, uow)
 
 
-def excluir_transacao(transacao_id):
+def excluir_transacao(transacao_id, uow=None):
     """
     Exclui uma transação existente.
 
     :param transacao_id: ID da transação
+    :param uow: Unidade de trabalho em andamento (opcional)
     :return: Dicionário com resultado da operação
     """
-    return TransacoesRepository.excluir_transacao(transacao_id)
+    return TransacoesRepository.excluir_transacao(transacao_id, uow)
@@ -0,0 +1,137 @@
+"""
+Este módulo define um cache LRU de resultados de consultas, invalidado pelas
+escritas no banco de dados.
+
+Cada resultado fica associado à versão dos dados (models.database.versao_dados)
+em que foi calculado. Quando alguma transação confirma alterações, neste ou em
+outro processo, a versão muda e todo o cache é descartado na próxima consulta.
+"""
+
+import threading
+from collections import OrderedDict
+
+from models.database import versao_dados
+
+# Limites padrão: quantidade de resultados e soma dos seus pesos (ex.: linhas)
+CACHE_TAMANHO_MAXIMO = 64
+CACHE_PESO_MAXIMO = 100_000
+
+
+class CacheResultados:
+    """
+    Cache LRU com memória limitada e contadores de acertos e falhas.
+
+    O peso de cada resultado é calculado pela função `peso` (por padrão, 1) e a
+    soma dos pesos nunca passa de `peso_maximo`; os resultados usados há mais
+    tempo são descartados primeiro. Os resultados são compartilhados entre as
+    chamadas e não devem ser modificados por quem os recebe.
+    """
+
+    def __init__(
+        self,
+        tamanho_maximo=CACHE_TAMANHO_MAXIMO,
+        peso_maximo=CACHE_PESO_MAXIMO,
+        peso=None,
+    ):
+        self.tamanho_maximo = tamanho_maximo
+        self.peso_maximo = peso_maximo
+        self._peso = peso or (lambda resultado: 1)
+        self._entradas = OrderedDict()
+        self._peso_total = 0
+        self._versao = None
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def _validar_versao(self):
+        """
+        Descarta todas as entradas se os dados mudaram desde que foram guardadas.
+        """
+        versao = versao_dados()
+        if versao != self._versao:
+            self._entradas.clear()
+            self._peso_total = 0
+            self._versao = versao
+        return versao
+
+    def obter(self, chave):
+        """
+        Retorna o resultado guardado para a chave, ou None se não houver.
+        """
+        with self._lock:
+            self._validar_versao()
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[0]
+
+    def guardar(self, chave, resultado, versao):
+        """
+        Guarda o resultado calculado na versão dos dados informada.
+
+        A versão deve ser lida antes da consulta: se uma escrita aconteceu
+        durante a consulta, o resultado já nasce desatualizado e é ignorado.
+        """
+        peso = self._peso(resultado)
+        with self._lock:
+            if self._validar_versao() != versao or peso > self.peso_maximo:
+                return
+
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._peso_total -= anterior[1]
+
+            self._entradas[chave] = (resultado, peso)
+            self._peso_total += peso
+            while (
+                len(self._entradas) > self.tamanho_maximo
+                or self._peso_total > self.peso_maximo
+            ):
+                _, (_, peso_removido) = self._entradas.popitem(last=False)
+                self._peso_total -= peso_removido
+
+    def obter_ou_calcular(self, chave, calcular, armazenar=None):
+        """
+        Retorna o resultado em cache ou o calcula e guarda.
+
+        :param chave: Chave hashable que identifica a consulta
+        :param calcular: Função sem argumentos que executa a consulta
+        :param armazenar: Função que decide se o resultado pode ser guardado
+        :return: Resultado da consulta
+        """
+        resultado = self.obter(chave)
+        if resultado is not None:
+            return resultado
+
+        versao = versao_dados()
+        resultado = calcular()
+        if armazenar is None or armazenar(resultado):
+            self.guardar(chave, resultado, versao)
+        return resultado
+
+    def limpar(self):
+        """
+        Remove todas as entradas e zera os contadores.
+        """
+        with self._lock:
+            self._entradas.clear()
+            self._peso_total = 0
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self):
+        """
+        Retorna um resumo do uso do cache.
+        """
+        with self._lock:
+            return {
+                'entradas': len(self._entradas),
+                'peso_total': self._peso_total,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'tamanho_maximo': self.tamanho_maximo,
+                'peso_maximo': self.peso_maximo,
+            }
@@ -0,0 +1,146 @@
+"""
+Este módulo define o calendário de dias úteis usado nos vencimentos.
+
+Os feriados nacionais de cada ano (fixos e móveis, calculados a partir da Páscoa)
+são gerados uma única vez e guardados em cache. O próximo dia útil pode ser
+obtido para uma única data (proximo_dia_util) ou para uma lista inteira de datas
+em uma só chamada ao NumPy (ajustar_dias_uteis).
+"""
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+# Feriados nacionais fixos (mês, dia)
+FERIADOS_FIXOS = (
+    (1, 1),  # Ano Novo (1º de janeiro)
+    (4, 21),  # Tiradentes (21 de abril)
+    (5, 1),  # Dia do Trabalho (1º de maio)
+    (9, 7),  # Independência (7 de setembro)
+    (10, 12),  # Nossa Senhora Aparecida (12 de outubro)
+    (11, 2),  # Finados (2 de novembro)
+    (11, 15),  # Proclamação da República (15 de novembro)
+    (11, 20),  # Dia Nacional de Zumbi e da Consciência Negra (desde 2024)
+    (12, 25),  # Natal (25 de dezembro)
+)
+
+# Feriados móveis: distância, em dias, do domingo de Páscoa
+FERIADOS_MOVEIS = (
+    -48,  # Segunda-feira de Carnaval
+    -47,  # Terça-feira de Carnaval
+    -2,  # Sexta-feira Santa
+    60,  # Corpus Christi
+)
+
+# Ano a partir do qual a Consciência Negra é feriado nacional (Lei 14.759/2023)
+ANO_CONSCIENCIA_NEGRA = 2024
+
+
+def data_pascoa(ano):
+    """
+    Calcula o domingo de Páscoa do ano (algoritmo de Meeus/Jones/Butcher).
+
+    :param ano: Ano no calendário gregoriano
+    :return: Objeto date
+    """
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    semana = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * semana) // 451
+    mes, dia = divmod(h + semana - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+@lru_cache(maxsize=None)
+def feriados_do_ano(ano):
+    """
+    Retorna os feriados nacionais do ano, calculados uma única vez por ano.
+
+    :param ano: Ano desejado
+    :return: frozenset de objetos date
+    """
+    feriados = {
+        date(ano, mes, dia)
+        for mes, dia in FERIADOS_FIXOS
+        if (mes, dia) != (11, 20) or ano >= ANO_CONSCIENCIA_NEGRA
+    }
+    pascoa = data_pascoa(ano)
+    feriados.update(pascoa + timedelta(days=dias) for dias in FERIADOS_MOVEIS)
+    return frozenset(feriados)
+
+
+def _como_date(data):
+    return data.date() if isinstance(data, datetime) else data
+
+
+def eh_feriado(data):
+    """
+    Verifica se a data é um feriado nacional brasileiro (fixo ou móvel).
+
+    :param data: Objeto date ou datetime
+    :return: True se for feriado, False caso contrário
+    """
+    data = _como_date(data)
+    return data in feriados_do_ano(data.year)
+
+
+def eh_dia_util(data):
+    """
+    Verifica se a data é um dia útil (nem fim de semana nem feriado).
+
+    :param data: Objeto date ou datetime
+    :return: True se for dia útil
+    """
+    return data.weekday() < 5 and not eh_feriado(data)
+
+
+def proximo_dia_util(data):
+    """
+    Retorna o próximo dia útil a partir da data fornecida (ela própria, se já
+    for um dia útil).
+
+    :param data: Objeto date ou datetime
+    :return: Objeto do mesmo tipo representando o próximo dia útil
+    """
+    while not eh_dia_util(data):
+        data += timedelta(days=1)
+    return data
+
+
+@lru_cache(maxsize=16)
+def _calendario_numpy(ano_inicio, ano_fim):
+    """
+    Monta o busdaycalendar do NumPy com os feriados dos anos informados.
+    """
+    feriados = sorted(
+        feriado
+        for ano in range(ano_inicio, ano_fim + 1)
+        for feriado in feriados_do_ano(ano)
+    )
+    return np.busdaycalendar(
+        weekmask='1111100', holidays=np.array(feriados, dtype='datetime64[D]')
+    )
+
+
+def ajustar_dias_uteis(datas):
+    """
+    Ajusta cada data para o próximo dia útil, com uma única chamada vetorizada.
+
+    :param datas: Sequência de datas no formato 'YYYY-MM-DD'
+    :return: Lista de datas ajustadas, no mesmo formato
+    """
+    if not datas:
+        return []
+
+    valores = np.array(datas, dtype='datetime64[D]')
+    anos = valores.astype('datetime64[Y]').astype(int) + 1970
+    # Um ano a mais: o ajuste de 31 de dezembro pode cair no ano seguinte
+    calendario = _calendario_numpy(int(anos.min()), int(anos.max()) + 1)
+    ajustadas = np.busday_offset(valores, 0, roll='forward', busdaycal=calendario)
+    return np.datetime_as_string(ajustadas, unit='D').tolist()
@@ -0,0 +1,189 @@
+"""
+Este módulo mantém, para cada cartão de crédito, a tabela dos ciclos das suas
+faturas: a data de fechamento e o vencimento (já ajustado para um dia útil) de
+cada mês de uma janela de anos.
+
+O vencimento da fatura de uma compra é obtido por busca binária na lista de
+fechamentos, sem interpretar a data nem somar meses a cada chamada. A tabela de
+um cartão é gerada na primeira consulta e só é gerada de novo quando os dias de
+fechamento/vencimento mudam (editar_conta chama invalidar_ciclos) ou quando uma
+data cai fora da janela, que então é ampliada.
+"""
+
+import threading
+from bisect import bisect_left
+from datetime import date, datetime
+
+from dateutil.relativedelta import relativedelta
+
+from models.calendario import ajustar_dias_uteis
+
+# Janela padrão da tabela, em anos antes e depois do ano atual
+ANOS_ANTES = 2
+ANOS_DEPOIS = 10
+
+
+def vencimento_da_fatura(data_compra_str, dia_fechamento, dia_vencimento):
+    """
+    Calcula o vencimento nominal da fatura em que a compra entra, sem ajustá-lo
+    para um dia útil.
+
+    :param data_compra_str: Data da compra no formato 'YYYY-MM-DD'
+    :param dia_fechamento: Dia do mês em que a fatura fecha (1-31)
+    :param dia_vencimento: Dia do mês em que a fatura vence (1-31)
+    :return: Objeto datetime
+    """
+    data_compra = datetime.fromisoformat(data_compra_str)
+
+    # Compra depois do fechamento entra na fatura do mês seguinte
+    meses = 1 if data_compra.day > dia_fechamento else 0
+    data_fechamento = data_compra.replace(day=1) + relativedelta(
+        months=meses, day=dia_fechamento
+    )
+    data_vencimento = data_fechamento + relativedelta(day=dia_vencimento)
+    # Se o dia de vencimento é menor que o dia de fechamento, avança mais um mês
+    if dia_vencimento < dia_fechamento:
+        data_vencimento = data_vencimento + relativedelta(months=1)
+    return data_vencimento
+
+
+class TabelaCiclos:
+    """
+    Fechamentos e vencimentos de um cartão, mês a mês, de `ano_inicio` a
+    `ano_fim` (inclusive), como listas paralelas de datas 'YYYY-MM-DD'.
+    """
+
+    __slots__ = (
+        'dia_fechamento',
+        'dia_vencimento',
+        'ano_inicio',
+        'ano_fim',
+        'fechamentos',
+        'vencimentos',
+    )
+
+    def __init__(self, dia_fechamento, dia_vencimento, ano_inicio, ano_fim):
+        self.dia_fechamento = dia_fechamento
+        self.dia_vencimento = dia_vencimento
+        self.ano_inicio = ano_inicio
+        self.ano_fim = ano_fim
+
+        # Nos meses mais curtos, o fechamento é o último dia do mês
+        self.fechamentos = [
+            (date(ano, mes, 1) + relativedelta(day=dia_fechamento)).isoformat()
+            for ano in range(ano_inicio, ano_fim + 1)
+            for mes in range(1, 13)
+        ]
+        self.vencimentos = ajustar_dias_uteis(
+            [
+                vencimento_da_fatura(
+                    fechamento, dia_fechamento, dia_vencimento
+                ).strftime('%Y-%m-%d')
+                for fechamento in self.fechamentos
+            ]
+        )
+
+    def cobre(self, datas):
+        """
+        Verifica se todas as datas têm o seu ciclo na tabela.
+        """
+        inicio = f'{self.ano_inicio:04d}-01-01'
+        return all(inicio <= data <= self.fechamentos[-1] for data in datas)
+
+    def vencimento(self, data):
+        """
+        Retorna o vencimento da fatura de uma compra feita na data informada.
+        """
+        # O ciclo da compra é o primeiro que fecha na data da compra ou depois
+        return self.vencimentos[bisect_left(self.fechamentos, data)]
+
+    def ciclo(self, data):
+        """
+        Retorna (fechamento, vencimento) da fatura de uma compra feita na data.
+        """
+        indice = bisect_left(self.fechamentos, data)
+        return self.fechamentos[indice], self.vencimentos[indice]
+
+    def vencimentos_de(self, datas):
+        """
+        Retorna o vencimento da fatura de cada data.
+        """
+        fechamentos = self.fechamentos
+        vencimentos = self.vencimentos
+        return [vencimentos[bisect_left(fechamentos, data)] for data in datas]
+
+
+class CacheCiclos:
+    """
+    Guarda a tabela de ciclos de cada cartão, identificada pelo id da conta.
+    """
+
+    def __init__(self):
+        self._tabelas = {}
+        self._lock = threading.Lock()
+        self.geracoes = 0
+
+    def obter(self, conta_id, dia_fechamento, dia_vencimento, datas=()):
+        """
+        Retorna a tabela do cartão, gerando-a se não existir, se os dias
+        mudaram ou se alguma das datas estiver fora da janela.
+        """
+        with self._lock:
+            tabela = self._tabelas.get(conta_id)
+            mesmos_dias = tabela is not None and (
+                tabela.dia_fechamento,
+                tabela.dia_vencimento,
+            ) == (dia_fechamento, dia_vencimento)
+            if mesmos_dias and tabela.cobre(datas):
+                return tabela
+
+            ano_atual = date.today().year
+            anos = [int(data[:4]) for data in datas]
+            ano_inicio = min([ano_atual - ANOS_ANTES] + anos)
+            # Compras depois do fechamento de dezembro caem no ano seguinte
+            ano_fim = max([ano_atual + ANOS_DEPOIS] + [ano + 1 for ano in anos])
+            if mesmos_dias:
+                # Apenas amplia a janela
+                ano_inicio = min(ano_inicio, tabela.ano_inicio)
+                ano_fim = max(ano_fim, tabela.ano_fim)
+
+            tabela = TabelaCiclos(dia_fechamento, dia_vencimento, ano_inicio, ano_fim)
+            self._tabelas[conta_id] = tabela
+            self.geracoes += 1
+            return tabela
+
+    def invalidar(self, conta_id=None):
+        """
+        Descarta a tabela de um cartão (ou de todos).
+        """
+        with self._lock:
+            if conta_id is None:
+                self._tabelas.clear()
+            else:
+                self._tabelas.pop(conta_id, None)
+
+
+_cache = CacheCiclos()
+
+
+def tabela_ciclos(conta_id, dia_fechamento, dia_vencimento, datas=()):
+    """
+    Retorna a tabela de ciclos do cartão, cobrindo as datas informadas.
+
+    :param conta_id: ID da conta do cartão
+    :param dia_fechamento: Dia do mês em que a fatura fecha (1-31)
+    :param dia_vencimento: Dia do mês em que a fatura vence (1-31)
+    :param datas: Datas ('YYYY-MM-DD') que serão consultadas
+    :return: TabelaCiclos
+    """
+    return _cache.obter(conta_id, dia_fechamento, dia_vencimento, datas)
+
+
+def invalidar_ciclos(conta_id=None):
+    """
+    Descarta a tabela de ciclos de um cartão (ou de todos).
+
+    Deve ser chamada quando o dia de fechamento ou de vencimento de um cartão
+    for alterado.
+    """
+    _cache.invalidar(conta_id)
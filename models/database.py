@@ -3,194 +3,524 @@ Este módulo define as funções para criar e conectar ao banco de dados SQLite.
 
 O banco de dados é criado no diretório 'data' com o nome 'database.db'.
 
-As tabelas são criadas com as seguintes colunas:
+A estrutura das tabelas é definida pelas migrações em models/migracoes.py.
 """
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from models.metricas import medicao_atual
+from models.perfil_sqlite import aplicar_perfil, inspecionar_conexao, obter_perfil
 
 DB_PATH = Path(__file__).parent.parent / 'data' / 'database.db'
 
+# Quantidade máxima de conexões ociosas mantidas no pool
+POOL_TAMANHO_MAXIMO = 8
+
+# Versão dos dados: incrementada a cada transação confirmada que alterou linhas
+_versao_dados = 0
+_versao_lock = threading.Lock()
+
+# Conexão dedicada à leitura de PRAGMA data_version, fora do pool. O valor muda
+# sempre que outra conexão, deste ou de outro processo, confirma alterações
+_sentinela = None
+_sentinela_caminho = None
+_sentinela_lock = threading.Lock()
+
+
+def _versao_arquivo():
+    """
+    Retorna o PRAGMA data_version do arquivo do banco, ou None se ele não puder
+    ser aberto.
+    """
+    global _sentinela, _sentinela_caminho
+    with _sentinela_lock:
+        try:
+            if _sentinela is None or _sentinela_caminho != DB_PATH:
+                _fechar_sentinela()
+                _sentinela = sqlite3.connect(
+                    Path(DB_PATH).absolute().as_uri() + '?mode=rw',
+                    uri=True,
+                    check_same_thread=False,
+                )
+                _sentinela_caminho = DB_PATH
+            return _sentinela.execute('PRAGMA data_version').fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+
+def _fechar_sentinela():
+    global _sentinela
+    if _sentinela is not None:
+        _sentinela.close()
+        _sentinela = None
+
+
+def versao_dados():
+    """
+    Retorna a versão atual dos dados do banco.
+
+    A versão combina o contador deste processo, incrementado pelas conexões do
+    pool, com o PRAGMA data_version do arquivo, que também muda quando outro
+    processo (outro worker do servidor, um script) confirma alterações.
+    Resultados guardados em cache só são válidos enquanto a versão não muda.
+    """
+    return (_versao_dados, _versao_arquivo())
+
+
+def registrar_alteracao():
+    """
+    Incrementa a versão dos dados, invalidando os resultados em cache.
+
+    É chamada automaticamente por toda conexão do pool que confirma alterações e
+    ao fechar o pool; as escritas de outras conexões no mesmo arquivo são
+    percebidas pelo PRAGMA data_version (veja versao_dados).
+    """
+    global _versao_dados
+    with _versao_lock:
+        _versao_dados += 1
+
+
+class CursorMedido(sqlite3.Cursor):
+    """
+    Cursor que, durante uma medição (models.metricas), soma a ela cada instrução
+    executada e o tempo gasto executando-a e lendo as suas linhas.
+
+    O início de cada execute/executemany também é informado à medição, para que
+    o rastreamento SQL (models.rastreamento_sql) atribua a ela as linhas que o
+    trace callback recebe até o fim da execução.
+    """
+
+    def execute(self, sql, parametros=()):
+        medicao = medicao_atual()
+        if medicao is None:
+            return super().execute(sql, parametros)
+        medicao.iniciar_instrucao()
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            medicao.registrar_instrucao(time.perf_counter() - inicio)
+
+    def executemany(self, sql, parametros):
+        medicao = medicao_atual()
+        if medicao is None:
+            return super().executemany(sql, parametros)
+        medicao.iniciar_instrucao(lote=True)
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            medicao.registrar_instrucao(time.perf_counter() - inicio)
+
+    def executescript(self, script):
+        medicao = medicao_atual()
+        if medicao is None:
+            return super().executescript(script)
+        inicio = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            medicao.registrar_instrucao(time.perf_counter() - inicio)
+
+    def _ler(self, leitura, *args):
+        medicao = medicao_atual()
+        if medicao is None:
+            return leitura(*args)
+        inicio = time.perf_counter()
+        try:
+            return leitura(*args)
+        finally:
+            medicao.registrar_leitura(time.perf_counter() - inicio)
+
+    def fetchone(self):
+        return self._ler(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._ler(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._ler(super().fetchall)
+
+
+class ConexaoPooled(sqlite3.Connection):
+    """
+    Conexão SQLite que, ao ser fechada, volta para o pool em vez de ser destruída.
+
+    Como é uma subclasse de sqlite3.Connection, o código existente que faz
+    `conn = conectar()` ... `conn.close()` continua funcionando sem alterações.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.caminho = None
+        self.em_uso = False
+        self.rastreamento = None
+        self._alteracoes_registradas = 0
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    # Os atalhos da conexão passam pelo cursor, para que também sejam medidos
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+    def commit(self):
+        """
+        Confirma a transação e, se ela alterou linhas, incrementa a versão dos dados.
+        """
+        medicao = medicao_atual()
+        if medicao is None:
+            super().commit()
+        else:
+            inicio = time.perf_counter()
+            try:
+                super().commit()
+            finally:
+                medicao.registrar_instrucao(time.perf_counter() - inicio)
+        if self.total_changes != self._alteracoes_registradas:
+            self._alteracoes_registradas = self.total_changes
+            registrar_alteracao()
+
+    def rollback(self):
+        """
+        Desfaz a transação; as alterações descartadas não mudam a versão dos dados.
+        """
+        super().rollback()
+        self._alteracoes_registradas = self.total_changes
+
+    def close(self):
+        """
+        Devolve a conexão ao pool, descartando qualquer transação não confirmada.
+        """
+        if not self.em_uso:
+            return
+        _pool.devolver(self)
+
+    def fechar_definitivamente(self):
+        """
+        Fecha de fato a conexão com o banco de dados.
+        """
+        self.em_uso = False
+        super().close()
+
+
+class PoolConexoes:
+    """
+    Pool de conexões SQLite reutilizáveis.
+
+    Cada conexão é entregue a uma única thread por vez (check-out/check-in), o que
+    torna o uso seguro sob servidores multi-thread como o waitress, e as conexões
+    ociosas são reaproveitadas na ordem LIFO para manter o cache de páginas quente.
+    """
+
+    def __init__(self, tamanho_maximo=POOL_TAMANHO_MAXIMO):
+        self.tamanho_maximo = tamanho_maximo
+        self._ociosas = []
+        self._lock = threading.Lock()
+        self.criadas = 0
+        self.reutilizadas = 0
+
+    def obter(self):
+        """
+        Retorna uma conexão ociosa do pool ou cria uma nova.
+        """
+        caminho = str(DB_PATH)
+        with self._lock:
+            while self._ociosas:
+                conn = self._ociosas.pop()
+                if conn.caminho == caminho:
+                    conn.em_uso = True
+                    self.reutilizadas += 1
+                    return conn
+                # O caminho do banco mudou (ex.: testes); descarta a conexão antiga
+                conn.fechar_definitivamente()
+            self.criadas += 1
+
+        conn = sqlite3.connect(
+            caminho, factory=ConexaoPooled, check_same_thread=False
+        )
+        conn.caminho = caminho
+        conn.em_uso = True
+        try:
+            aplicar_perfil(conn)
+        except BaseException:
+            conn.fechar_definitivamente()
+            raise
+        return conn
+
+    def devolver(self, conn):
+        """
+        Devolve a conexão ao pool, fechando-a se o pool já estiver cheio.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            _parar_rastreamento(conn)
+            conn.fechar_definitivamente()
+            return
+        _parar_rastreamento(conn)
+
+        conn.em_uso = False
+        with self._lock:
+            if len(self._ociosas) < self.tamanho_maximo:
+                self._ociosas.append(conn)
+                return
+        conn.fechar_definitivamente()
+
+    def fechar_todas(self):
+        """
+        Fecha todas as conexões ociosas do pool.
+        """
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn in ociosas:
+            conn.fechar_definitivamente()
+
+    def estatisticas(self):
+        """
+        Retorna um resumo do uso do pool.
+        """
+        with self._lock:
+            return {
+                'ociosas': len(self._ociosas),
+                'criadas': self.criadas,
+                'reutilizadas': self.reutilizadas,
+                'tamanho_maximo': self.tamanho_maximo,
+            }
+
+
+_pool = PoolConexoes()
+
+
+def _iniciar_rastreamento(conn):
+    """
+    Se a medição atual rastreia o SQL, passa a registrar as instruções da conexão.
+    """
+    medicao = medicao_atual()
+    if medicao is not None and medicao.rastreamento is not None:
+        conn.rastreamento = medicao.rastreamento
+        conn.rastreamento.acompanhar_conexao(conn)
+
+
+def _parar_rastreamento(conn):
+    """
+    Deixa de registrar as instruções da conexão, se ela estava sendo rastreada.
+    """
+    if conn.rastreamento is not None:
+        conn.rastreamento.liberar_conexao(conn)
+        conn.rastreamento = None
+
 
 def conectar():
     """
-    Conecta ao banco de dados SQLite.
+    Obtém uma conexão com o banco de dados SQLite a partir do pool.
+
+    Chamar `close()` na conexão a devolve ao pool.
+    """
+    conn = _pool.obter()
+    _iniciar_rastreamento(conn)
+    return conn
+
+
+@contextmanager
+def conexao():
+    """
+    Context manager que obtém uma conexão do pool e a devolve ao final.
+
+    Confirma a transação se o bloco terminar sem erros e desfaz em caso de exceção.
+
+    Exemplo:
+        with conexao() as conn:
+            conn.execute('UPDATE contas SET saldo = ? WHERE id = ?', (0, 1))
+    """
+    conn = conectar()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+class UnidadeDeTrabalho:
+    """
+    Uma conexão e uma transação (BEGIN IMMEDIATE ... COMMIT) compartilhadas por
+    várias operações dos controllers.
+
+    Os controllers que aceitam o parâmetro `uow` executam as suas instruções na
+    conexão da unidade, cada chamada em um SAVEPOINT: uma operação que falha
+    desfaz apenas as próprias alterações e retorna o erro como de costume, e as
+    demais são confirmadas de uma vez ao final do bloco. Uma exceção que escapa
+    do bloco desfaz a unidade inteira.
+
+    Exemplo:
+        with UnidadeDeTrabalho() as uow:
+            for linha in linhas:
+                cadastrar_transacao(*linha, uow=uow)
+    """
+
+    def __init__(self):
+        self.conn = None
+        self._operacoes = 0
+        self._apos_confirmar = {}
+
+    def __enter__(self):
+        self.conn = conectar()
+        try:
+            # Reserva a escrita já no início, em vez de na primeira alteração
+            self.conn.execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self.conn.close()
+            raise
+        return self
+
+    def __exit__(self, tipo, erro, rastreio):
+        try:
+            if tipo is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+        if tipo is None:
+            for funcao, args in self._apos_confirmar:
+                funcao(*args)
+        return False
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def ao_confirmar(self, funcao, *args):
+        """
+        Agenda uma chamada (ex.: invalidar um cache) para depois do COMMIT.
+
+        Chamadas repetidas com os mesmos argumentos são feitas uma única vez.
+        """
+        self._apos_confirmar.setdefault((funcao, args))
+
+    @contextmanager
+    def operacao(self):
+        """
+        Context manager que executa o bloco em um SAVEPOINT da unidade,
+        desfazendo apenas as alterações do bloco em caso de exceção.
+        """
+        self._operacoes += 1
+        nome = f'operacao_{self._operacoes}'
+        self.conn.execute(f'SAVEPOINT {nome}')
+        try:
+            yield self
+        except BaseException:
+            # Alguns erros do SQLite já desfazem a transação inteira
+            if self.conn.in_transaction:
+                self.conn.execute(f'ROLLBACK TO {nome}')
+                self.conn.execute(f'RELEASE {nome}')
+            raise
+        self.conn.execute(f'RELEASE {nome}')
+
+
+@contextmanager
+def unidade_de_trabalho(uow=None):
+    """
+    Context manager das escritas dos controllers.
+
+    Dentro da unidade de trabalho informada, executa o bloco em um SAVEPOINT
+    dela; sem unidade, abre uma só para o bloco, confirmada ao final.
+
+    :param uow: UnidadeDeTrabalho em andamento, ou None
+    :return: A unidade de trabalho em uso
     """
-    return sqlite3.connect(DB_PATH)
+    if uow is not None:
+        with uow.operacao():
+            yield uow
+        return
+    with UnidadeDeTrabalho() as uow:
+        yield uow
 
 
-def criar_tabelas():
+@contextmanager
+def conexao_leitura(uow=None):
     """
-    Cria as tabelas no banco de dados SQLite.
+    Context manager das leituras dos controllers.
+
+    Usa a conexão da unidade de trabalho informada, que enxerga as alterações
+    ainda não confirmadas; sem unidade, obtém uma conexão do pool e a devolve
+    ao final.
+
+    :param uow: UnidadeDeTrabalho em andamento, ou None
+    :return: Conexão aberta
     """
+    if uow is not None:
+        yield uow.conn
+        return
     conn = conectar()
-    cursor = conn.cursor()
-
-    # Contas
-    cursor.execute(
-        """CREATE TABLE IF NOT EXISTS contas (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nome TEXT NOT NULL,
-        tipo TEXT NOT NULL, -- ex: 'cartao', 'conta', 'investimento'
-        saldo REAL DEFAULT 0.0,
-        dia_fechamento INTEGER,
-        dia_vencimento INTEGER,
-        limite_credito REAL
-        )"""
-    )
-
-    # Parcelamentos
-    cursor.execute(
-        """ CREATE TABLE IF NOT EXISTS parcelamentos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            descricao TEXT,
-            valor_total REAL,
-            parcelas INTEGER,
-            data_compra TEXT,
-            data_vencimento TEXT,
-            conta_id INTEGER,
-            categoria_id INTEGER,
-            responsavel_id INTEGER,
-            pagamento_id INTEGER,
-            FOREIGN KEY (conta_id) REFERENCES contas(id),
-            FOREIGN KEY (categoria_id) REFERENCES categorias(id),
-            FOREIGN KEY (responsavel_id) REFERENCES responsaveis(id),
-            FOREIGN KEY (pagamento_id) REFERENCES pagamentos(id)
-        )"""
-    )
-
-    # Categorias
-    cursor.execute(
-        """CREATE TABLE IF NOT EXISTS categorias (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL
-        )"""
-    )
-
-    # Responsáveis
-    cursor.execute(
-        """CREATE TABLE IF NOT EXISTS responsaveis (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL
-        )"""
-    )
-
-    # Pagamentos
-    cursor.execute(
-        """ CREATE TABLE IF NOT EXISTS pagamentos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tipo TEXT NOT NULL
-        )"""
-    )
-
-    # Transações
-    cursor.execute(
-        """CREATE TABLE IF NOT EXISTS transacoes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT NOT NULL,
-            valor REAL NOT NULL,
-            tipo TEXT NOT NULL, -- "receita" ou "despesa"
-            conta_id INTEGER,
-            parcelamento_id INTEGER,
-            categoria_id INTEGER,
-            responsavel_id INTEGER,
-            pagamento_id INTEGER,
-            descricao TEXT,
-            status TEXT NOT NULL DEFAULT 'pendente',
-                -- ex: 'pendente', 'paga', 'vencida'
-            FOREIGN KEY (conta_id) REFERENCES contas(id),
-            FOREIGN KEY (parcelamento_id) REFERENCES parcelamentos(id),
-            FOREIGN KEY (categoria_id) REFERENCES categorias(id),
-            FOREIGN KEY (responsavel_id) REFERENCES responsaveis(id),
-            FOREIGN KEY (pagamento_id) REFERENCES pagamentos(id)
-        )"""
-    )
-
-    # Recorrências
-    cursor.execute(
-        """ CREATE TABLE IF NOT EXISTS recorrencias (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            transacao_id INTEGER,
-            frequencia TEXT NOT NULL,
-                -- ex: 'semanal', 'mensal', 'anual', 'semestral', 'trimestral'
-            data_inicio TEXT NOT NULL,
-            data_fim TEXT,
-            proxima_execucao TEXT,
-            ocorrencias INTEGER,
-            usar_valor_fixo BOOLEAN DEFAULT TRUE,
-            FOREIGN KEY (transacao_id) REFERENCES transacoes(id)
-        )"""
-    )
-
-    # Faturas
-    cursor.execute(
-        """CREATE TABLE IF NOT EXISTS faturas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            conta_id INTEGER,
-            mes INTEGER,
-            ano INTEGER,
-            valor_total REAL,
-            data_fechamento TEXT,
-            data_vencimento TEXT,
-            limite_disponivel REAL,
-            valor_pago REAL,
-            status TEXT NOT NULL, -- ex: 'pendente', 'paga', 'vencida'
-            FOREIGN KEY (conta_id) REFERENCES contas(id)
-        )"""
-    )
-
-    conn.commit()
-    conn.close()
-
-
-def atualizar_estrutura_banco():
-    """
-    Atualiza a estrutura do banco de dados adicionando colunas que possam estar faltando
-    em tabelas existentes.
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def fechar_conexoes():
+    """
+    Fecha todas as conexões ociosas do pool.
+    """
+    _pool.fechar_todas()
+    with _sentinela_lock:
+        _fechar_sentinela()
+    # O arquivo pode ser trocado enquanto não há conexões; invalida os caches
+    registrar_alteracao()
+
+
+def inspecionar_desempenho():
+    """
+    Retorna o perfil de desempenho configurado, os valores efetivos em uma
+    conexão do pool e as estatísticas do pool.
     """
+    conn = conectar()
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-
-        # Verificar se a coluna 'ocorrencias' existe na tabela 'recorrencias'
-        cursor.execute('PRAGMA table_info(recorrencias)')
-        colunas = cursor.fetchall()
-        colunas_nomes = [col[1] for col in colunas]
-
-        if 'ocorrencias' not in colunas_nomes:
-            cursor.execute(
-                'ALTER TABLE recorrencias ADD COLUMN ocorrencias INTEGER DEFAULT 0'
-            )
-            print("Coluna 'ocorrencias' adicionada à tabela 'recorrencias'.")
-
-        # Verificar se a coluna 'data_vencimento' existe na tabela 'transacoes'
-        cursor.execute('PRAGMA table_info(transacoes)')
-        colunas = cursor.fetchall()
-        colunas_nomes = [col[1] for col in colunas]
-
-        if 'data_vencimento' not in colunas_nomes:
-            cursor.execute(
-                'ALTER TABLE transacoes ADD COLUMN data_vencimento TEXT'
-            )
-            print("Coluna 'data_vencimento' adicionada à tabela 'transacoes'.")
-
-        # Verificar se a coluna 'data_vencimento' existe na tabela 'parcelamentos'
-        cursor.execute('PRAGMA table_info(parcelamentos)')
-        colunas = cursor.fetchall()
-        colunas_nomes = [col[1] for col in colunas]
-
-        if 'data_vencimento' not in colunas_nomes:
-            cursor.execute(
-                'ALTER TABLE parcelamentos ADD COLUMN data_vencimento TEXT'
-            )
-            print(
-                "Coluna 'data_vencimento' adicionada à tabela 'parcelamentos'."
-            )
+        efetivo = inspecionar_conexao(conn)
+    finally:
+        conn.close()
 
-        conn.commit()
+    return {
+        'perfil': obter_perfil(),
+        'efetivo': efetivo,
+        'pool': _pool.estatisticas(),
+    }
+
+
+def criar_tabelas(progresso=None):
+    """
+    Cria as tabelas no banco de dados SQLite, aplicando todas as migrações.
+    """
+    from models.migracoes import migrar
+
+    return migrar(progresso)
+
+
+def atualizar_estrutura_banco(progresso=None):
+    """
+    Atualiza a estrutura do banco de dados aplicando as migrações pendentes.
+
+    Quando o esquema já está na versão mais recente, apenas compara a versão
+    gravada no banco com a esperada pelo código.
+    """
+    from models.migracoes import migrar
+
+    try:
+        migrar(progresso)
         return True
     except sqlite3.Error as e:
         print(f'Erro ao atualizar a estrutura do banco: {e}')
         return False
-    finally:
-        conn.close()
@@ -0,0 +1,163 @@
+"""
+Este módulo mantém em memória as tabelas de cadastro (contas, categorias,
+responsáveis e formas de pagamento).
+
+Essas tabelas são pequenas e lidas o tempo todo: nas opções dos dropdowns e nos
+nomes exibidos ao lado de cada transação. Elas são carregadas juntas, com uma
+única conexão, e só são lidas de novo depois que um controller de cadastro
+chama invalidar_dimensoes().
+"""
+
+import threading
+
+from models import database
+
+# Consulta de cada tabela de cadastro e a coluna usada como nome de exibição
+TABELAS_DIMENSAO = {
+    'contas': (
+        'SELECT id, nome, tipo, dia_fechamento, dia_vencimento, limite_credito '
+        'FROM contas ORDER BY nome ASC',
+        'nome',
+    ),
+    'categorias': ('SELECT id, nome FROM categorias ORDER BY nome ASC', 'nome'),
+    'responsaveis': (
+        'SELECT id, nome FROM responsaveis ORDER BY nome ASC',
+        'nome',
+    ),
+    'pagamentos': ('SELECT id, tipo FROM pagamentos ORDER BY tipo ASC', 'tipo'),
+}
+
+
+class Dimensoes:
+    """
+    Retrato imutável das tabelas de cadastro em um determinado momento.
+
+    Para cada tabela, `registros[tabela]` mapeia id -> dicionário com as colunas
+    (na ordem de exibição) e `nomes[tabela]` mapeia id -> nome de exibição.
+    """
+
+    __slots__ = ('registros', 'nomes')
+
+    def __init__(self, registros):
+        self.registros = registros
+        self.nomes = {
+            tabela: {
+                registro_id: registro[TABELAS_DIMENSAO[tabela][1]]
+                for registro_id, registro in por_id.items()
+            }
+            for tabela, por_id in registros.items()
+        }
+
+    def listar(self, tabela):
+        """
+        Retorna os registros da tabela, ordenados pelo nome.
+        """
+        return list(self.registros[tabela].values())
+
+    def obter(self, tabela, registro_id):
+        """
+        Retorna o registro com o id informado, ou None.
+        """
+        return self.registros[tabela].get(registro_id)
+
+    def nome(self, tabela, registro_id):
+        """
+        Retorna o nome de exibição do registro com o id informado, ou None.
+        """
+        return self.nomes[tabela].get(registro_id)
+
+    def opcoes(self, tabela):
+        """
+        Retorna as opções de um dropdown (label/value) para a tabela.
+
+        As contas são rotuladas com o tipo, ex.: 'Nubank (cartao)'.
+        """
+        if tabela == 'contas':
+            return [
+                {'label': f"{conta['nome']} ({conta['tipo']})", 'value': conta['id']}
+                for conta in self.registros['contas'].values()
+            ]
+        return [
+            {'label': nome, 'value': registro_id}
+            for registro_id, nome in self.nomes[tabela].items()
+        ]
+
+    def metadados_contas(self):
+        """
+        Retorna o tipo de cada conta, para que o formulário mostre as opções de
+        parcelamento sem consultar o servidor. O cadastro usa sempre os dados da
+        conta no servidor, e não estes.
+
+        As chaves são os ids em texto, como ficam depois de serializados em JSON.
+        """
+        return {
+            str(conta_id): {'tipo': conta['tipo']}
+            for conta_id, conta in self.registros['contas'].items()
+        }
+
+
+class CacheDimensoes:
+    """
+    Guarda o último retrato das tabelas de cadastro e o recarrega quando
+    invalidado ou quando o arquivo do banco muda.
+    """
+
+    def __init__(self):
+        self._dimensoes = None
+        self._caminho = None
+        self._lock = threading.Lock()
+        self.carregamentos = 0
+
+    def obter(self):
+        """
+        Retorna o retrato atual, carregando-o do banco se necessário.
+        """
+        caminho = str(database.DB_PATH)
+        with self._lock:
+            if self._dimensoes is None or self._caminho != caminho:
+                self._dimensoes = self._carregar()
+                self._caminho = caminho
+                self.carregamentos += 1
+            return self._dimensoes
+
+    def invalidar(self):
+        """
+        Descarta o retrato atual; o próximo acesso lê as tabelas novamente.
+        """
+        with self._lock:
+            self._dimensoes = None
+
+    @staticmethod
+    def _carregar():
+        conn = database.conectar()
+        try:
+            registros = {}
+            for tabela, (consulta, _) in TABELAS_DIMENSAO.items():
+                cursor = conn.execute(consulta)
+                colunas = [descricao[0] for descricao in cursor.description]
+                registros[tabela] = {
+                    linha[0]: dict(zip(colunas, linha)) for linha in cursor
+                }
+            return Dimensoes(registros)
+        finally:
+            conn.close()
+
+
+_cache = CacheDimensoes()
+
+
+def obter_dimensoes():
+    """
+    Retorna o retrato atual das tabelas de cadastro.
+    """
+    return _cache.obter()
+
+
+def invalidar_dimensoes():
+    """
+    Descarta o retrato das tabelas de cadastro.
+
+    Deve ser chamada depois de toda escrita confirmada em contas, categorias,
+    responsaveis ou pagamentos.
+    """
+    _cache.invalidar()
@@ -0,0 +1,54 @@
+"""
+Este módulo define as funções de conversão de valores monetários.
+
+Os valores são gravados no banco como inteiros em centavos, o que torna somas e
+comparações exatas. A conversão para reais acontece apenas na borda da aplicação
+(formulários e tabelas).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+
+def para_centavos(valor):
+    """
+    Converte um valor em reais (int, float, str ou Decimal) para centavos.
+
+    :param valor: Valor em reais ou None
+    :return: Inteiro em centavos ou None
+    """
+    if valor is None or valor == '':
+        return None
+    reais = Decimal(str(valor)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return int(reais * 100)
+
+
+def para_reais(centavos):
+    """
+    Converte um valor em centavos para reais, para exibição.
+
+    :param centavos: Inteiro em centavos ou None
+    :return: Valor em reais (float) ou None
+    """
+    if centavos is None:
+        return None
+    return centavos / 100
+
+
+def dividir_em_parcelas(total_centavos, num_parcelas):
+    """
+    Divide um valor em parcelas inteiras cuja soma é exatamente o total.
+
+    Os centavos que sobram da divisão são distribuídos, um a um, nas primeiras
+    parcelas. Ex.: 100,00 em 3 parcelas -> 33,34 + 33,33 + 33,33.
+
+    :param total_centavos: Valor total em centavos (pode ser negativo)
+    :param num_parcelas: Quantidade de parcelas (>= 1)
+    :return: Lista com o valor de cada parcela em centavos
+    """
+    if num_parcelas < 1:
+        raise ValueError('O número de parcelas deve ser maior que zero.')
+
+    sinal = -1 if total_centavos < 0 else 1
+    base, resto = divmod(abs(total_centavos), num_parcelas)
+    return [
+        sinal * (base + 1 if i < resto else base) for i in range(num_parcelas)
+    ]
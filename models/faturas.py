@@ -0,0 +1,138 @@
+"""
+Este módulo associa as transações de cartão de crédito às suas faturas.
+
+A fatura de uma compra é o ciclo da tabela do cartão (models.ciclos_fatura) que
+fecha na data da compra ou depois; cada fatura é uma linha de `faturas`,
+identificada pela conta e pelo mês/ano de fechamento. atribuir_faturas deve ser
+chamada sempre que transações de cartão forem gravadas ou mudarem de data ou de
+conta: ela cria as faturas que faltam, grava o vencimento da fatura em cada
+transação e preenche transacoes.fatura_id.
+
+Os totais da fatura (valor_total e limite_disponivel) não são recalculados aqui:
+os triggers criados pelas migrações 7 e 8 os ajustam a cada inserção, alteração
+ou exclusão de uma transação com fatura_id. limite_disponivel é o limite do
+cartão, igual em todas as suas faturas; as faturas novas já nascem com ele.
+"""
+
+from collections import defaultdict
+
+from models.ciclos_fatura import tabela_ciclos
+
+# Transações de cartão (com os dias de fechamento e vencimento da conta)
+CONSULTA_TRANSACOES_CARTAO = """
+SELECT t.id, t.conta_id, t.data, c.dia_fechamento, c.dia_vencimento
+FROM transacoes t
+JOIN contas c ON c.id = t.conta_id
+WHERE c.tipo = 'cartao'
+  AND c.dia_fechamento IS NOT NULL
+  AND c.dia_vencimento IS NOT NULL
+  AND ({condicao})
+"""
+
+
+def atribuir_faturas(cursor, condicao, params=()):
+    """
+    Associa as transações de cartão que atendem à condição às suas faturas, sem
+    confirmar a transação do banco.
+
+    :param cursor: Cursor (ou conexão) aberto
+    :param condicao: Condição SQL sobre transacoes (alias t), ex.: 't.id = ?'
+    :param params: Parâmetros da condição
+    :return: Quantidade de transações associadas
+    """
+    linhas = cursor.execute(
+        CONSULTA_TRANSACOES_CARTAO.format(condicao=condicao), params
+    ).fetchall()
+    if not linhas:
+        return 0
+
+    por_conta = defaultdict(list)
+    for linha in linhas:
+        por_conta[(linha[1], linha[3], linha[4])].append(linha)
+
+    atualizacoes = []
+    for (conta_id, dia_fechamento, dia_vencimento), transacoes in por_conta.items():
+        datas = [transacao[2] for transacao in transacoes]
+        tabela = tabela_ciclos(conta_id, dia_fechamento, dia_vencimento, datas)
+
+        ciclos = [tabela.ciclo(data) for data in datas]
+        faturas = _obter_faturas(cursor, conta_id, dict(ciclos))
+        for transacao, (fechamento, vencimento) in zip(transacoes, ciclos):
+            atualizacoes.append((vencimento, faturas[fechamento[:7]], transacao[0]))
+
+    cursor.executemany(
+        'UPDATE transacoes SET data_vencimento = ?, fatura_id = ? WHERE id = ?',
+        atualizacoes,
+    )
+    return len(atualizacoes)
+
+
+def _obter_faturas(cursor, conta_id, ciclos):
+    """
+    Retorna os ids das faturas dos ciclos de uma conta, criando (zeradas) as que
+    ainda não existem.
+
+    :param ciclos: Dicionário {data de fechamento: data de vencimento}
+    :return: Dicionário {'YYYY-MM' do fechamento: id da fatura}
+    """
+    cursor.executemany(
+        """
+        INSERT OR IGNORE INTO faturas
+        (conta_id, mes, ano, valor_total, data_fechamento, data_vencimento,
+         limite_disponivel, valor_pago, status)
+        SELECT id, ?, ?, 0, ?, ?,
+               COALESCE(limite_credito, 0) - (
+                   SELECT COALESCE(SUM(valor_total - valor_pago), 0)
+                   FROM faturas WHERE conta_id = contas.id
+               ),
+               0, 'pendente'
+        FROM contas WHERE id = ?
+        """,
+        [
+            (int(fechamento[5:7]), int(fechamento[:4]), fechamento, vencimento, conta_id)
+            for fechamento, vencimento in ciclos.items()
+        ],
+    )
+
+    # Uma única consulta para todas as faturas, pelo índice (conta_id, ano, mes)
+    anos = [int(fechamento[:4]) for fechamento in ciclos]
+    linhas = cursor.execute(
+        'SELECT id, ano, mes FROM faturas WHERE conta_id = ? AND ano BETWEEN ? AND ?',
+        (conta_id, min(anos), max(anos)),
+    ).fetchall()
+    return {f'{ano:04d}-{mes:02d}': fatura_id for fatura_id, ano, mes in linhas}
+
+
+def reatribuir_faturas_da_conta(cursor, conta_id):
+    """
+    Associa de novo às faturas as transações em aberto de um cartão, depois que
+    os dias de fechamento/vencimento (ou o tipo) da conta mudaram, sem confirmar
+    a transação do banco.
+
+    As transações pagas ou canceladas ficam nas faturas em que estavam. As
+    faturas que ficarem vazias e sem pagamento são excluídas, para que as dos
+    novos ciclos sejam criadas com as datas de fechamento e vencimento novas.
+
+    :param cursor: Cursor (ou conexão) aberto
+    :param conta_id: ID da conta do cartão
+    :return: Quantidade de transações associadas
+    """
+    condicao = "t.conta_id = ? AND t.status NOT IN ('pago', 'cancelado')"
+    # Tirar as transações das faturas antigas faz os triggers descontarem os totais
+    cursor.execute(
+        f"""
+        UPDATE transacoes SET fatura_id = NULL
+        WHERE id IN (SELECT t.id FROM transacoes t WHERE {condicao})
+          AND fatura_id IS NOT NULL
+        """,
+        (conta_id,),
+    )
+    cursor.execute(
+        """
+        DELETE FROM faturas
+        WHERE conta_id = ? AND valor_pago = 0
+          AND NOT EXISTS (SELECT 1 FROM transacoes t WHERE t.fatura_id = faturas.id)
+        """,
+        (conta_id,),
+    )
+    return atribuir_faturas(cursor, condicao, (conta_id,))
@@ -0,0 +1,282 @@
+"""
+Este módulo mede o custo de cada requisição atendida pelo servidor: tempo total,
+tempo gasto no banco, quantidade de instruções SQL e tamanho da resposta.
+
+Uma medição é aberta no início da requisição (iniciar_medicao) e fica associada
+ao contexto de execução atual; as conexões do pool (models.database) somam a ela
+o tempo de cada instrução executada. Ao final, a medição é registrada nos
+histogramas do nome informado (em geral, o callback do Dash), exportados no
+formato texto do Prometheus por exportar_metricas.
+
+O limite a partir do qual uma requisição é registrada no log como lenta vem da
+variável CALLBACK_LENTO_MS do arquivo .env (padrão: 500 ms).
+
+Uma medição também pode rastrear cada instrução SQL executada
+(models.rastreamento_sql); os padrões suspeitos encontrados são registrados no
+log junto com a medição.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from models.rastreamento_sql import Rastreamento
+
+logger = logging.getLogger(__name__)
+
+LIMITE_LENTO_PADRAO_MS = 500
+
+# Limites superiores das faixas de cada histograma
+FAIXAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+FAIXAS_INSTRUCOES = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+FAIXAS_BYTES = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+
+# Histogramas mantidos para cada callback: nome da métrica, faixas e ajuda
+METRICAS = (
+    (
+        'myfinance_callback_duracao_segundos',
+        FAIXAS_SEGUNDOS,
+        'Tempo total de execução do callback',
+    ),
+    (
+        'myfinance_callback_banco_segundos',
+        FAIXAS_SEGUNDOS,
+        'Tempo gasto em instruções SQL durante o callback',
+    ),
+    (
+        'myfinance_callback_instrucoes_sql',
+        FAIXAS_INSTRUCOES,
+        'Quantidade de instruções SQL executadas pelo callback',
+    ),
+    (
+        'myfinance_callback_resposta_bytes',
+        FAIXAS_BYTES,
+        'Tamanho da resposta do callback',
+    ),
+)
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+
+class Medicao:
+    """
+    Custos acumulados de uma requisição em andamento.
+    """
+
+    __slots__ = ('inicio', 'tempo_banco', 'instrucoes', 'rastreamento')
+
+    def __init__(self, rastrear=False):
+        self.inicio = time.perf_counter()
+        self.tempo_banco = 0.0
+        self.instrucoes = 0
+        self.rastreamento = Rastreamento() if rastrear else None
+
+    def iniciar_instrucao(self, lote=False):
+        """
+        Marca o início da execução de uma instrução SQL no cursor.
+        """
+        if self.rastreamento is not None:
+            self.rastreamento.iniciar_instrucao(lote)
+
+    def registrar_instrucao(self, segundos):
+        """
+        Soma uma instrução SQL executada e o seu tempo.
+        """
+        self.instrucoes += 1
+        self.tempo_banco += segundos
+        if self.rastreamento is not None:
+            self.rastreamento.encerrar_instrucao(segundos)
+
+    def registrar_leitura(self, segundos):
+        """
+        Soma o tempo de leitura das linhas de uma instrução já contada.
+        """
+        self.tempo_banco += segundos
+        if self.rastreamento is not None:
+            self.rastreamento.somar_tempo(segundos)
+
+    def duracao(self):
+        return time.perf_counter() - self.inicio
+
+
+def medicao_atual():
+    """
+    Retorna a medição da requisição em andamento, ou None.
+    """
+    return _medicao_atual.get()
+
+
+def iniciar_medicao(rastrear=False):
+    """
+    Abre uma medição para o contexto atual.
+
+    :param rastrear: Se cada instrução SQL executada deve ser rastreada
+    :return: Tupla (medição, token para encerrar_medicao)
+    """
+    medicao = Medicao(rastrear)
+    return medicao, _medicao_atual.set(medicao)
+
+
+def encerrar_medicao(token):
+    """
+    Desassocia a medição do contexto atual.
+    """
+    _medicao_atual.reset(token)
+
+
+@contextmanager
+def rastrear_sql():
+    """
+    Context manager que rastreia as instruções SQL executadas no bloco.
+
+    Exemplo:
+        with rastrear_sql() as rastreamento:
+            editar_conta(1, 'Nubank')
+        print(rastreamento.relatorio())
+    """
+    medicao, token = iniciar_medicao(rastrear=True)
+    try:
+        yield medicao.rastreamento
+    finally:
+        encerrar_medicao(token)
+
+
+class Histograma:
+    """
+    Histograma cumulativo com faixas fixas, no modelo do Prometheus.
+    """
+
+    __slots__ = ('faixas', 'contagens', 'soma', 'total')
+
+    def __init__(self, faixas):
+        self.faixas = faixas
+        # Uma contagem por faixa e uma para os valores acima da última
+        self.contagens = [0] * (len(faixas) + 1)
+        self.soma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.faixas, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def acumulados(self):
+        """
+        Retorna pares (limite, quantidade de observações <= limite).
+        """
+        pares = []
+        acumulado = 0
+        for limite, contagem in zip(self.faixas + ('+Inf',), self.contagens):
+            acumulado += contagem
+            pares.append((limite, acumulado))
+        return pares
+
+
+def _limite_lento():
+    try:
+        return float(os.getenv('CALLBACK_LENTO_MS', LIMITE_LENTO_PADRAO_MS)) / 1000
+    except ValueError:
+        return LIMITE_LENTO_PADRAO_MS / 1000
+
+
+class RegistroMetricas:
+    """
+    Histogramas de cada callback, identificados pelo nome.
+    """
+
+    def __init__(self):
+        self._histogramas = {}
+        self._lock = threading.Lock()
+        self.limite_lento = _limite_lento()
+
+    def registrar(self, nome, medicao, tamanho_resposta):
+        """
+        Registra os custos de uma requisição encerrada.
+
+        :param nome: Nome do callback
+        :param medicao: Medição da requisição
+        :param tamanho_resposta: Tamanho da resposta em bytes
+        """
+        duracao = medicao.duracao()
+        valores = (
+            duracao,
+            medicao.tempo_banco,
+            medicao.instrucoes,
+            tamanho_resposta,
+        )
+        with self._lock:
+            histogramas = self._histogramas.get(nome)
+            if histogramas is None:
+                histogramas = self._histogramas[nome] = [
+                    Histograma(faixas) for _, faixas, _ in METRICAS
+                ]
+            for histograma, valor in zip(histogramas, valores):
+                histograma.observar(valor)
+
+        if duracao >= self.limite_lento:
+            logger.warning(
+                'Callback lento: %s levou %.0f ms (banco: %.0f ms em %d '
+                'instruções SQL, resposta: %d bytes)',
+                nome,
+                duracao * 1000,
+                medicao.tempo_banco * 1000,
+                medicao.instrucoes,
+                tamanho_resposta,
+            )
+
+        if medicao.rastreamento is not None:
+            for alerta in medicao.rastreamento.alertas():
+                logger.warning('SQL suspeito em %s: %s', nome, alerta)
+
+    def exportar(self):
+        """
+        Exporta os histogramas no formato texto do Prometheus.
+        """
+        with self._lock:
+            copia = {
+                nome: [
+                    (h.acumulados(), h.soma, h.total) for h in histogramas
+                ]
+                for nome, histogramas in sorted(self._histogramas.items())
+            }
+
+        linhas = []
+        for indice, (metrica, _, ajuda) in enumerate(METRICAS):
+            linhas.append(f'# HELP {metrica} {ajuda}')
+            linhas.append(f'# TYPE {metrica} histogram')
+            for nome, histogramas in copia.items():
+                acumulados, soma, total = histogramas[indice]
+                rotulo = nome.replace('\\', '\\\\').replace('"', '\\"')
+                for limite, quantidade in acumulados:
+                    linhas.append(
+                        f'{metrica}_bucket{{callback="{rotulo}",le="{limite}"}} '
+                        f'{quantidade}'
+                    )
+                linhas.append(f'{metrica}_sum{{callback="{rotulo}"}} {soma}')
+                linhas.append(f'{metrica}_count{{callback="{rotulo}"}} {total}')
+        return '\n'.join(linhas) + '\n'
+
+    def limpar(self):
+        with self._lock:
+            self._histogramas.clear()
+
+
+_registro = RegistroMetricas()
+
+
+def registrar_medicao(nome, medicao, tamanho_resposta):
+    """
+    Registra os custos de uma requisição nos histogramas do callback.
+    """
+    _registro.registrar(nome, medicao, tamanho_resposta)
+
+
+def exportar_metricas():
+    """
+    Retorna os histogramas de todos os callbacks no formato do Prometheus.
+    """
+    return _registro.exportar()
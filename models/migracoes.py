@@ -0,0 +1,1011 @@
+"""
+Este módulo implementa as migrações versionadas do esquema do banco de dados.
+
+A versão do esquema fica gravada em `PRAGMA user_version`. Cada migração tem um
+número sequencial e só é executada uma vez; quando o banco já está na versão mais
+recente, `migrar()` se resume a ler e comparar um inteiro.
+
+Para adicionar uma migração, basta criar uma função decorada com `@migracao`
+usando o próximo número de versão:
+
+    @migracao(2, 'Descrição da mudança')
+    def _v2(conn, progresso):
+        conn.execute('ALTER TABLE ...')
+"""
+import re
+import sqlite3
+
+from models.database import conectar
+
+
+# Tamanho padrão dos lotes usados nas migrações de dados
+TAMANHO_LOTE = 5000
+
+MIGRACOES = []
+
+
+def migracao(versao, descricao):
+    """
+    Registra uma função como a migração de número `versao`.
+    """
+
+    def registrar(funcao):
+        if MIGRACOES and versao != MIGRACOES[-1][0] + 1:
+            raise ValueError(
+                f'Migração {versao} fora de ordem; esperado {MIGRACOES[-1][0] + 1}.'
+            )
+        MIGRACOES.append((versao, descricao, funcao))
+        return funcao
+
+    return registrar
+
+
+def versao_atual(conn):
+    """
+    Retorna a versão do esquema gravada no banco.
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def versao_mais_recente():
+    """
+    Retorna a versão do esquema esperada pelo código.
+    """
+    return MIGRACOES[-1][0] if MIGRACOES else 0
+
+
+def migrar(progresso=None):
+    """
+    Aplica, em ordem, as migrações ainda não executadas no banco.
+
+    Cada migração roda em sua própria transação (BEGIN IMMEDIATE), junto com a
+    atualização de `user_version`, de forma que uma falha não deixa o esquema
+    pela metade. A exceção são os preenchimentos com
+    `executar_em_lotes(confirmar_por_lote=True)`, que confirmam cada lote antes
+    de `user_version` ser atualizado: a migração que os usa deve criar antes do
+    preenchimento tudo de que as escritas feitas entre os lotes dependem (como os
+    triggers) e ser segura para executar de novo, pois uma falha no meio faz a
+    próxima execução retomá-la do início, pulando as linhas já processadas.
+
+    :param progresso: Função opcional chamada como progresso(mensagem, feitos, total)
+    :return: Versão do esquema após a execução
+    """
+    alvo = versao_mais_recente()
+    conn = conectar()
+    try:
+        versao = versao_atual(conn)
+        if versao >= alvo:
+            return versao
+
+        for numero, descricao, funcao in MIGRACOES:
+            if numero <= versao:
+                continue
+
+            conn.execute('BEGIN IMMEDIATE')
+            # Outro processo pode ter migrado enquanto aguardávamos o bloqueio
+            versao = versao_atual(conn)
+            if numero <= versao:
+                conn.commit()
+                continue
+
+            if progresso:
+                progresso(f'Migração {numero}: {descricao}', 0, None)
+            funcao(conn, progresso)
+            conn.execute(f'PRAGMA user_version = {int(numero)}')
+            conn.commit()
+            versao = numero
+
+        return versao
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def executar_em_lotes(
+    conn,
+    tabela,
+    comando,
+    condicao='1',
+    tamanho_lote=TAMANHO_LOTE,
+    progresso=None,
+    descricao=None,
+    confirmar_por_lote=False,
+):
+    """
+    Executa `comando` sobre as linhas de `tabela` em lotes de rowid.
+
+    O comando deve terminar de forma que seja possível acrescentar uma cláusula
+    WHERE, por exemplo 'UPDATE transacoes SET x = y' ou
+    'INSERT INTO nova SELECT ... FROM transacoes'.
+
+    Com `confirmar_por_lote=True`, cada lote é confirmado separadamente, liberando
+    o banco para outras conexões entre os lotes. Nesse caso `condicao` deve
+    excluir as linhas já processadas, para que a migração possa ser retomada, e
+    o que foi feito antes da chamada também é confirmado no primeiro lote (veja
+    migrar).
+
+    :return: Quantidade de linhas processadas
+    """
+    descricao = descricao or f'Processando {tabela}'
+    total = conn.execute(
+        f'SELECT COUNT(*) FROM {tabela} WHERE {condicao}'
+    ).fetchone()[0]
+
+    processados = 0
+    ultimo_rowid = None
+    while True:
+        if ultimo_rowid is None:
+            ids = conn.execute(
+                f'SELECT rowid FROM {tabela} WHERE {condicao} '
+                'ORDER BY rowid LIMIT ?',
+                (tamanho_lote,),
+            ).fetchall()
+        else:
+            ids = conn.execute(
+                f'SELECT rowid FROM {tabela} WHERE rowid > ? AND ({condicao}) '
+                'ORDER BY rowid LIMIT ?',
+                (ultimo_rowid, tamanho_lote),
+            ).fetchall()
+        if not ids:
+            break
+
+        primeiro_rowid, ultimo_rowid = ids[0][0], ids[-1][0]
+        conn.execute(
+            f'{comando} WHERE {tabela}.rowid BETWEEN ? AND ? AND ({condicao})',
+            (primeiro_rowid, ultimo_rowid),
+        )
+        processados += len(ids)
+
+        if confirmar_por_lote:
+            conn.commit()
+            conn.execute('BEGIN IMMEDIATE')
+
+        if progresso:
+            progresso(descricao, processados, total)
+
+    return processados
+
+
+def exibir_progresso(mensagem, feitos, total):
+    """
+    Função de progresso que imprime o andamento das migrações no terminal.
+    """
+    if total is None:
+        print(mensagem)
+    elif total:
+        print(f'{mensagem}: {feitos}/{total} ({feitos * 100 // total}%)')
+
+
+def _adicionar_coluna_se_ausente(conn, tabela, coluna, definicao):
+    colunas = [col[1] for col in conn.execute(f'PRAGMA table_info({tabela})')]
+    if coluna not in colunas:
+        conn.execute(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}')
+
+
+@migracao(1, 'Estrutura inicial')
+def _v1_estrutura_inicial(conn, progresso):
+    """
+    Cria as tabelas originais e adiciona as colunas que bancos antigos, anteriores
+    ao versionamento do esquema, podem não ter.
+    """
+    # Contas
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS contas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        tipo TEXT NOT NULL, -- ex: 'cartao', 'conta', 'investimento'
+        saldo REAL DEFAULT 0.0,
+        dia_fechamento INTEGER,
+        dia_vencimento INTEGER,
+        limite_credito REAL
+        )"""
+    )
+
+    # Parcelamentos
+    conn.execute(
+        """ CREATE TABLE IF NOT EXISTS parcelamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descricao TEXT,
+            valor_total REAL,
+            parcelas INTEGER,
+            data_compra TEXT,
+            data_vencimento TEXT,
+            conta_id INTEGER,
+            categoria_id INTEGER,
+            responsavel_id INTEGER,
+            pagamento_id INTEGER,
+            FOREIGN KEY (conta_id) REFERENCES contas(id),
+            FOREIGN KEY (categoria_id) REFERENCES categorias(id),
+            FOREIGN KEY (responsavel_id) REFERENCES responsaveis(id),
+            FOREIGN KEY (pagamento_id) REFERENCES pagamentos(id)
+        )"""
+    )
+
+    # Categorias
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS categorias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL
+        )"""
+    )
+
+    # Responsáveis
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS responsaveis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL
+        )"""
+    )
+
+    # Pagamentos
+    conn.execute(
+        """ CREATE TABLE IF NOT EXISTS pagamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL
+        )"""
+    )
+
+    # Transações
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS transacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL,
+            valor REAL NOT NULL,
+            tipo TEXT NOT NULL, -- "receita" ou "despesa"
+            conta_id INTEGER,
+            parcelamento_id INTEGER,
+            categoria_id INTEGER,
+            responsavel_id INTEGER,
+            pagamento_id INTEGER,
+            descricao TEXT,
+            status TEXT NOT NULL DEFAULT 'pendente',
+                -- ex: 'pendente', 'paga', 'vencida'
+            FOREIGN KEY (conta_id) REFERENCES contas(id),
+            FOREIGN KEY (parcelamento_id) REFERENCES parcelamentos(id),
+            FOREIGN KEY (categoria_id) REFERENCES categorias(id),
+            FOREIGN KEY (responsavel_id) REFERENCES responsaveis(id),
+            FOREIGN KEY (pagamento_id) REFERENCES pagamentos(id)
+        )"""
+    )
+
+    # Recorrências
+    conn.execute(
+        """ CREATE TABLE IF NOT EXISTS recorrencias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transacao_id INTEGER,
+            frequencia TEXT NOT NULL,
+                -- ex: 'semanal', 'mensal', 'anual', 'semestral', 'trimestral'
+            data_inicio TEXT NOT NULL,
+            data_fim TEXT,
+            proxima_execucao TEXT,
+            ocorrencias INTEGER,
+            usar_valor_fixo BOOLEAN DEFAULT TRUE,
+            FOREIGN KEY (transacao_id) REFERENCES transacoes(id)
+        )"""
+    )
+
+    # Faturas
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS faturas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conta_id INTEGER,
+            mes INTEGER,
+            ano INTEGER,
+            valor_total REAL,
+            data_fechamento TEXT,
+            data_vencimento TEXT,
+            limite_disponivel REAL,
+            valor_pago REAL,
+            status TEXT NOT NULL, -- ex: 'pendente', 'paga', 'vencida'
+            FOREIGN KEY (conta_id) REFERENCES contas(id)
+        )"""
+    )
+
+    # Colunas adicionadas antes da existência das migrações
+    _adicionar_coluna_se_ausente(
+        conn, 'recorrencias', 'ocorrencias', 'INTEGER DEFAULT 0'
+    )
+    _adicionar_coluna_se_ausente(conn, 'transacoes', 'data_vencimento', 'TEXT')
+    _adicionar_coluna_se_ausente(
+        conn, 'parcelamentos', 'data_vencimento', 'TEXT'
+    )
+
+
+@migracao(2, 'Índices para as consultas de transações')
+def _v2_indices_transacoes(conn, progresso):
+    """
+    Cria os índices secundários usados pelas consultas mais frequentes.
+
+    Planos obtidos com EXPLAIN QUERY PLAN em uma base com 20 mil transações,
+    antes -> depois da migração:
+
+    idx_transacoes_conta_data (filtro por conta em buscar_transacoes e a
+    contagem de excluir_conta):
+        SELECT COUNT(*) FROM transacoes WHERE conta_id = ?
+            SCAN transacoes
+            -> SEARCH transacoes USING COVERING INDEX idx_transacoes_conta_data (conta_id=?)
+        SELECT ... FROM transacoes t ... WHERE t.conta_id = ? ORDER BY t.data DESC
+            SCAN t; USE TEMP B-TREE FOR ORDER BY
+            -> SEARCH t USING INDEX idx_transacoes_conta_data (conta_id=?)
+
+    idx_transacoes_categoria_data (filtro por categoria, mesma forma do anterior):
+        SELECT ... WHERE t.categoria_id = ? ORDER BY t.data DESC
+            SCAN t; USE TEMP B-TREE FOR ORDER BY
+            -> SEARCH t USING INDEX idx_transacoes_categoria_data (categoria_id=?)
+
+    idx_transacoes_pagamento (contagem de excluir_pagamento):
+        SELECT COUNT(*) FROM transacoes WHERE pagamento_id = ?
+            SCAN transacoes
+            -> SEARCH transacoes USING COVERING INDEX idx_transacoes_pagamento (pagamento_id=?)
+
+    idx_recorrencias_transacao (LEFT JOIN recorrencias e excluir_transacao):
+        SELECT id FROM recorrencias WHERE transacao_id = ?
+            SCAN recorrencias
+            -> SEARCH recorrencias USING COVERING INDEX idx_recorrencias_transacao (transacao_id=?)
+        LEFT JOIN recorrencias rec ON rec.transacao_id = t.id
+            SEARCH rec USING AUTOMATIC COVERING INDEX (transacao_id=?) LEFT-JOIN
+            -> SEARCH rec USING COVERING INDEX idx_recorrencias_transacao (transacao_id=?) LEFT-JOIN
+            (o índice automático era reconstruído a cada execução da consulta)
+
+    idx_transacoes_data_tipo_valor (ordenação por data e totais do período; cobre
+    tipo e valor para que as somas não precisem ler a tabela):
+        SELECT ... FROM transacoes t ORDER BY t.data DESC
+            SCAN t; USE TEMP B-TREE FOR ORDER BY
+            -> SCAN t USING INDEX idx_transacoes_data_tipo_valor
+        SELECT SUM(CASE WHEN tipo = 'receita' ...) FROM transacoes
+        WHERE data >= ? AND data < ?
+            SCAN transacoes
+            -> SEARCH transacoes USING COVERING INDEX idx_transacoes_data_tipo_valor (data>? AND data<?)
+
+    idx_transacoes_vencimento_tipo_valor (totais das transações de cartão, que
+    usam a data de vencimento da fatura):
+        SELECT SUM(CASE WHEN tipo = 'receita' ...) FROM transacoes
+        WHERE data_vencimento >= ? AND data_vencimento < ?
+            SCAN transacoes
+            -> SEARCH transacoes USING COVERING INDEX idx_transacoes_vencimento_tipo_valor (data_vencimento>? AND data_vencimento<?)
+
+    O filtro de período de buscar_transacoes, com o OR entre data e
+    data_vencimento que depende de contas.tipo, continua exigindo a leitura de
+    todas as linhas (SCAN t USING INDEX idx_transacoes_data_tipo_valor); o
+    índice apenas elimina a ordenação em memória.
+    """
+    indices = [
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_conta_data '
+        'ON transacoes (conta_id, data)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_categoria_data '
+        'ON transacoes (categoria_id, data)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_pagamento '
+        'ON transacoes (pagamento_id)',
+        'CREATE INDEX IF NOT EXISTS idx_recorrencias_transacao '
+        'ON recorrencias (transacao_id)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_data_tipo_valor '
+        'ON transacoes (data, tipo, valor)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_vencimento_tipo_valor '
+        'ON transacoes (data_vencimento, tipo, valor)',
+    ]
+    for numero, comando in enumerate(indices, start=1):
+        conn.execute(comando)
+        if progresso:
+            progresso('Criando índices', numero, len(indices))
+
+    conn.execute('ANALYZE')
+
+
+# Data em que a transação pesa no período: vencimento da fatura para cartões,
+# data da transação para as demais contas
+_EXPRESSAO_DATA_EFETIVA = """CASE
+            WHEN {alias}data_vencimento IS NOT NULL
+             AND (SELECT tipo FROM contas WHERE contas.id = {alias}conta_id) = 'cartao'
+            THEN {alias}data_vencimento
+            ELSE {alias}data
+        END"""
+
+
+def _criar_triggers_data_efetiva(conn):
+    """
+    Cria os triggers que mantêm transacoes.data_efetiva atualizada.
+    """
+    expressao_nova = _EXPRESSAO_DATA_EFETIVA.format(alias='NEW.')
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transacoes_data_efetiva_insert
+        AFTER INSERT ON transacoes
+        BEGIN
+            UPDATE transacoes SET data_efetiva = {expressao_nova}
+            WHERE id = NEW.id;
+        END"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transacoes_data_efetiva_update
+        AFTER UPDATE OF data, data_vencimento, conta_id ON transacoes
+        BEGIN
+            UPDATE transacoes SET data_efetiva = {expressao_nova}
+            WHERE id = NEW.id;
+        END"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS trg_contas_tipo_data_efetiva
+        AFTER UPDATE OF tipo ON contas
+        WHEN OLD.tipo IS NOT NEW.tipo
+        BEGIN
+            UPDATE transacoes
+            SET data_efetiva = CASE
+                WHEN NEW.tipo = 'cartao' AND data_vencimento IS NOT NULL
+                THEN data_vencimento
+                ELSE data
+            END
+            WHERE conta_id = NEW.id;
+        END"""
+    )
+
+
+@migracao(3, 'Coluna data_efetiva indexada em transacoes')
+def _v3_data_efetiva(conn, progresso):
+    """
+    Persiste a data efetiva de cada transação, mantida por triggers.
+
+    Substitui o filtro de período com OR entre t.data_vencimento (cartões) e
+    t.data (demais contas), que dependia de contas.tipo e não podia usar índice:
+
+        WHERE ((c.tipo = 'cartao' AND ...) OR (...))
+            SCAN t USING INDEX idx_transacoes_data_tipo_valor
+        WHERE t.data_efetiva >= ? AND t.data_efetiva < ?
+            -> SEARCH t USING INDEX idx_transacoes_efetiva_tipo_valor (data_efetiva>? AND data_efetiva<?)
+
+    O índice também cobre tipo e valor, servindo os totais do período. Com ele, o
+    índice por data_vencimento criado na migração 2 deixa de ser usado.
+    """
+    _adicionar_coluna_se_ausente(conn, 'transacoes', 'data_efetiva', 'TEXT')
+    # Os triggers vêm antes do preenchimento, que é confirmado lote a lote: as
+    # transações gravadas entre os lotes já recebem a data efetiva
+    _criar_triggers_data_efetiva(conn)
+
+    executar_em_lotes(
+        conn,
+        'transacoes',
+        'UPDATE transacoes SET data_efetiva = '
+        + _EXPRESSAO_DATA_EFETIVA.format(alias='transacoes.'),
+        condicao='data_efetiva IS NULL',
+        progresso=progresso,
+        descricao='Preenchendo data_efetiva',
+        confirmar_por_lote=True,
+    )
+
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_efetiva_tipo_valor '
+        'ON transacoes (data_efetiva, tipo, valor)'
+    )
+    conn.execute('DROP INDEX IF EXISTS idx_transacoes_vencimento_tipo_valor')
+    conn.execute('ANALYZE')
+
+
+def _reconstruir_tabela(conn, tabela, definicao, conversoes, progresso):
+    """
+    Recria `tabela` com uma nova definição, copiando os dados em lotes.
+
+    :param definicao: Corpo do CREATE TABLE da nova estrutura
+    :param conversoes: Dicionário coluna -> expressão SQL usada na cópia
+    """
+    colunas = [col[1] for col in conn.execute(f'PRAGMA table_info({tabela})')]
+    sequencia = conn.execute(
+        'SELECT seq FROM sqlite_sequence WHERE name = ?', (tabela,)
+    ).fetchone()
+
+    nova = f'{tabela}_nova'
+    conn.execute(f'DROP TABLE IF EXISTS {nova}')
+    conn.execute(f'CREATE TABLE {nova} (\n{definicao}\n)')
+
+    selecao = ', '.join(conversoes.get(coluna, coluna) for coluna in colunas)
+    executar_em_lotes(
+        conn,
+        tabela,
+        f'INSERT INTO {nova} ({", ".join(colunas)}) SELECT {selecao} FROM {tabela}',
+        progresso=progresso,
+        descricao=f'Convertendo {tabela}',
+    )
+
+    conn.execute(f'DROP TABLE {tabela}')
+    conn.execute(f'ALTER TABLE {nova} RENAME TO {tabela}')
+
+    # Preserva o contador do AUTOINCREMENT para não reutilizar ids excluídos
+    if sequencia:
+        conn.execute('DELETE FROM sqlite_sequence WHERE name = ?', (tabela,))
+        conn.execute(
+            'INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)',
+            (tabela, sequencia[0]),
+        )
+
+
+def _centavos(coluna):
+    return f'CAST(ROUND({coluna} * 100) AS INTEGER)'
+
+
+@migracao(4, 'Valores monetários em centavos (INTEGER)')
+def _v4_valores_em_centavos(conn, progresso):
+    """
+    Converte as colunas monetárias de REAL (reais) para INTEGER (centavos).
+
+    Colunas REAL convertem qualquer inteiro gravado de volta para ponto flutuante,
+    por isso as tabelas são recriadas com as colunas declaradas como INTEGER.
+    Valores com até duas casas decimais são convertidos sem perda. As parcelas
+    antigas, criadas com valor_total / parcelas, são redistribuídas para que a
+    soma volte a bater exatamente com o valor total do parcelamento.
+    """
+    from models.dinheiro import dividir_em_parcelas
+
+    # Os triggers referenciam as tabelas recriadas e são refeitos ao final
+    conn.execute('DROP TRIGGER IF EXISTS trg_transacoes_data_efetiva_insert')
+    conn.execute('DROP TRIGGER IF EXISTS trg_transacoes_data_efetiva_update')
+    conn.execute('DROP TRIGGER IF EXISTS trg_contas_tipo_data_efetiva')
+
+    _reconstruir_tabela(
+        conn,
+        'contas',
+        """id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        tipo TEXT NOT NULL, -- ex: 'cartao', 'conta', 'investimento'
+        saldo INTEGER DEFAULT 0, -- centavos
+        dia_fechamento INTEGER,
+        dia_vencimento INTEGER,
+        limite_credito INTEGER -- centavos""",
+        {
+            'saldo': _centavos('saldo'),
+            'limite_credito': _centavos('limite_credito'),
+        },
+        progresso,
+    )
+
+    _reconstruir_tabela(
+        conn,
+        'parcelamentos',
+        """id INTEGER PRIMARY KEY AUTOINCREMENT,
+        descricao TEXT,
+        valor_total INTEGER, -- centavos
+        parcelas INTEGER,
+        data_compra TEXT,
+        data_vencimento TEXT,
+        conta_id INTEGER,
+        categoria_id INTEGER,
+        responsavel_id INTEGER,
+        pagamento_id INTEGER,
+        FOREIGN KEY (conta_id) REFERENCES contas(id),
+        FOREIGN KEY (categoria_id) REFERENCES categorias(id),
+        FOREIGN KEY (responsavel_id) REFERENCES responsaveis(id),
+        FOREIGN KEY (pagamento_id) REFERENCES pagamentos(id)""",
+        {'valor_total': _centavos('valor_total')},
+        progresso,
+    )
+
+    _reconstruir_tabela(
+        conn,
+        'transacoes',
+        """id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data TEXT NOT NULL,
+        valor INTEGER NOT NULL, -- centavos; negativo para despesas
+        tipo TEXT NOT NULL, -- "receita" ou "despesa"
+        conta_id INTEGER,
+        parcelamento_id INTEGER,
+        categoria_id INTEGER,
+        responsavel_id INTEGER,
+        pagamento_id INTEGER,
+        descricao TEXT,
+        status TEXT NOT NULL DEFAULT 'pendente',
+            -- ex: 'pendente', 'paga', 'vencida'
+        data_vencimento TEXT,
+        data_efetiva TEXT,
+        FOREIGN KEY (conta_id) REFERENCES contas(id),
+        FOREIGN KEY (parcelamento_id) REFERENCES parcelamentos(id),
+        FOREIGN KEY (categoria_id) REFERENCES categorias(id),
+        FOREIGN KEY (responsavel_id) REFERENCES responsaveis(id),
+        FOREIGN KEY (pagamento_id) REFERENCES pagamentos(id)""",
+        {'valor': _centavos('valor')},
+        progresso,
+    )
+
+    _reconstruir_tabela(
+        conn,
+        'faturas',
+        """id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conta_id INTEGER,
+        mes INTEGER,
+        ano INTEGER,
+        valor_total INTEGER, -- centavos
+        data_fechamento TEXT,
+        data_vencimento TEXT,
+        limite_disponivel INTEGER, -- centavos
+        valor_pago INTEGER, -- centavos
+        status TEXT NOT NULL, -- ex: 'pendente', 'paga', 'vencida'
+        FOREIGN KEY (conta_id) REFERENCES contas(id)""",
+        {
+            'valor_total': _centavos('valor_total'),
+            'limite_disponivel': _centavos('limite_disponivel'),
+            'valor_pago': _centavos('valor_pago'),
+        },
+        progresso,
+    )
+
+    # Redistribui as parcelas para que a soma seja igual ao valor total
+    parcelamentos = conn.execute(
+        'SELECT id, valor_total, parcelas FROM parcelamentos '
+        'WHERE valor_total IS NOT NULL AND parcelas >= 1'
+    ).fetchall()
+    for parcelamento_id, valor_total, num_parcelas in parcelamentos:
+        parcelas = conn.execute(
+            'SELECT id, valor FROM transacoes WHERE parcelamento_id = ? '
+            'ORDER BY data, id',
+            (parcelamento_id,),
+        ).fetchall()
+        if len(parcelas) != num_parcelas:
+            # Parcelas excluídas individualmente; mantém os valores arredondados
+            continue
+
+        sinal = -1 if parcelas[0][1] < 0 else 1
+        valores = dividir_em_parcelas(sinal * abs(valor_total), num_parcelas)
+        conn.executemany(
+            'UPDATE transacoes SET valor = ? WHERE id = ?',
+            [(valor, parcela[0]) for valor, parcela in zip(valores, parcelas)],
+        )
+
+    for comando in (
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_conta_data '
+        'ON transacoes (conta_id, data)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_categoria_data '
+        'ON transacoes (categoria_id, data)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_pagamento '
+        'ON transacoes (pagamento_id)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_data_tipo_valor '
+        'ON transacoes (data, tipo, valor)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_efetiva_tipo_valor '
+        'ON transacoes (data_efetiva, tipo, valor)',
+    ):
+        conn.execute(comando)
+
+    _criar_triggers_data_efetiva(conn)
+    conn.execute('ANALYZE')
+
+
+@migracao(5, 'Índices de cobertura para os totais por conta e categoria')
+def _v5_indices_totais(conn, progresso):
+    """
+    Cria índices que cobrem os totais do período filtrados por conta ou categoria.
+
+    Os totais dos badges vêm de uma única consulta agregada (COUNT e SUM(CASE
+    tipo ...)). Sem filtro de conta ou categoria ela já é respondida apenas por
+    idx_transacoes_efetiva_tipo_valor; com eles, cada linha do período exigia
+    uma leitura da tabela:
+
+        SELECT COUNT(*), SUM(CASE WHEN t.tipo = 'receita' ...) FROM transacoes t
+        WHERE t.data_efetiva >= ? AND t.data_efetiva < ? AND t.conta_id = ?
+            SEARCH t USING INDEX idx_transacoes_efetiva_tipo_valor (data_efetiva>? AND data_efetiva<?)
+            -> SEARCH t USING COVERING INDEX idx_transacoes_conta_efetiva_tipo_valor (conta_id=? AND data_efetiva>? AND data_efetiva<?)
+
+    O mesmo vale para categoria_id com idx_transacoes_categoria_efetiva_tipo_valor.
+    """
+    indices = [
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_conta_efetiva_tipo_valor '
+        'ON transacoes (conta_id, data_efetiva, tipo, valor)',
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_categoria_efetiva_tipo_valor '
+        'ON transacoes (categoria_id, data_efetiva, tipo, valor)',
+    ]
+    for numero, comando in enumerate(indices, start=1):
+        conn.execute(comando)
+        if progresso:
+            progresso('Criando índices', numero, len(indices))
+
+    conn.execute('ANALYZE')
+
+
+@migracao(6, 'Recorrências virtuais')
+def _v6_recorrencias_virtuais(conn, progresso):
+    """
+    Prepara as recorrências para serem expandidas sob demanda.
+
+    Cada transação gerada por uma recorrência passa a guardar a recorrência e o
+    número da ocorrência (a transação modelo é a ocorrência 1). O índice único
+    impede que a mesma ocorrência seja gravada duas vezes, e as ocorrências
+    excluídas pelo usuário ficam em recorrencias_excecoes para não serem geradas
+    de novo.
+
+    As recorrências cadastradas antes desta versão já tiveram todas as
+    ocorrências gravadas; por isso ficam sem próxima execução.
+    """
+    _adicionar_coluna_se_ausente(conn, 'transacoes', 'recorrencia_id', 'INTEGER')
+    _adicionar_coluna_se_ausente(conn, 'transacoes', 'ocorrencia', 'INTEGER')
+
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS recorrencias_excecoes (
+            recorrencia_id INTEGER NOT NULL,
+            ocorrencia INTEGER NOT NULL,
+            PRIMARY KEY (recorrencia_id, ocorrencia),
+            FOREIGN KEY (recorrencia_id) REFERENCES recorrencias(id)
+        ) WITHOUT ROWID"""
+    )
+
+    conn.execute(
+        """
+        UPDATE transacoes
+        SET recorrencia_id = (
+                SELECT r.id FROM recorrencias r WHERE r.transacao_id = transacoes.id
+            ),
+            ocorrencia = 1
+        WHERE id IN (SELECT transacao_id FROM recorrencias)
+        """
+    )
+    conn.execute('UPDATE recorrencias SET proxima_execucao = NULL')
+
+    conn.execute(
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_transacoes_recorrencia_ocorrencia '
+        'ON transacoes (recorrencia_id, ocorrencia) '
+        'WHERE recorrencia_id IS NOT NULL'
+    )
+
+
+# Quanto uma transação soma ao total da sua fatura: despesas (valor negativo)
+# aumentam o total, estornos diminuem e transações canceladas não contam
+_EXPRESSAO_VALOR_FATURA = (
+    "CASE WHEN {alias}status = 'cancelado' THEN 0 ELSE -{alias}valor END"
+)
+
+
+# O que falta pagar de todas as faturas de um cartão
+_EXPRESSAO_EM_ABERTO_CARTAO = (
+    '(SELECT COALESCE(SUM(f.valor_total - f.valor_pago), 0) '
+    'FROM faturas f WHERE f.conta_id = {conta})'
+)
+
+
+def _criar_triggers_faturas(conn):
+    """
+    Cria os triggers que mantêm valor_total e limite_disponivel das faturas.
+
+    O limite disponível é do cartão: o limite menos o que ainda falta pagar de
+    todas as suas faturas (valor_total - valor_pago). Ele é mantido igual em
+    todas as faturas da conta, de modo que qualquer uma delas o informa com a
+    leitura de uma única linha, e uma compra parcelada ocupa o limite pelo
+    valor de todas as parcelas.
+    """
+    valor_novo = _EXPRESSAO_VALOR_FATURA.format(alias='NEW.')
+    valor_antigo = _EXPRESSAO_VALOR_FATURA.format(alias='OLD.')
+    conta_nova = '(SELECT conta_id FROM faturas WHERE id = NEW.fatura_id)'
+    conta_antiga = '(SELECT conta_id FROM faturas WHERE id = OLD.fatura_id)'
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transacoes_fatura_insert
+        AFTER INSERT ON transacoes
+        WHEN NEW.fatura_id IS NOT NULL
+        BEGIN
+            UPDATE faturas SET valor_total = valor_total + {valor_novo}
+            WHERE id = NEW.fatura_id;
+            UPDATE faturas SET limite_disponivel = limite_disponivel - {valor_novo}
+            WHERE conta_id = {conta_nova};
+        END"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transacoes_fatura_update
+        AFTER UPDATE OF fatura_id, valor, status ON transacoes
+        WHEN OLD.fatura_id IS NOT NEW.fatura_id
+          OR ({valor_antigo}) != ({valor_novo})
+        BEGIN
+            UPDATE faturas SET valor_total = valor_total - {valor_antigo}
+            WHERE id = OLD.fatura_id;
+            UPDATE faturas SET limite_disponivel = limite_disponivel + {valor_antigo}
+            WHERE conta_id = {conta_antiga};
+            UPDATE faturas SET valor_total = valor_total + {valor_novo}
+            WHERE id = NEW.fatura_id;
+            UPDATE faturas SET limite_disponivel = limite_disponivel - {valor_novo}
+            WHERE conta_id = {conta_nova};
+        END"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transacoes_fatura_delete
+        AFTER DELETE ON transacoes
+        WHEN OLD.fatura_id IS NOT NULL
+        BEGIN
+            UPDATE faturas SET valor_total = valor_total - {valor_antigo}
+            WHERE id = OLD.fatura_id;
+            UPDATE faturas SET limite_disponivel = limite_disponivel + {valor_antigo}
+            WHERE conta_id = {conta_antiga};
+        END"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS trg_faturas_valor_pago
+        AFTER UPDATE OF valor_pago ON faturas
+        WHEN OLD.valor_pago IS NOT NEW.valor_pago
+        BEGIN
+            UPDATE faturas
+            SET limite_disponivel =
+                limite_disponivel + (NEW.valor_pago - OLD.valor_pago)
+            WHERE conta_id = NEW.conta_id;
+        END"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contas_limite_faturas
+        AFTER UPDATE OF limite_credito ON contas
+        WHEN OLD.limite_credito IS NOT NEW.limite_credito
+        BEGIN
+            UPDATE faturas
+            SET limite_disponivel = COALESCE(NEW.limite_credito, 0)
+                - {_EXPRESSAO_EM_ABERTO_CARTAO.format(conta='NEW.id')}
+            WHERE conta_id = NEW.id;
+        END"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS trg_contas_tipo_faturas
+        AFTER UPDATE OF tipo ON contas
+        WHEN OLD.tipo = 'cartao' AND NEW.tipo != 'cartao'
+        BEGIN
+            UPDATE transacoes SET fatura_id = NULL
+            WHERE conta_id = NEW.id AND fatura_id IS NOT NULL;
+        END"""
+    )
+
+
+@migracao(7, 'Faturas mantidas incrementalmente')
+def _v7_faturas(conn, progresso):
+    """
+    Associa cada transação de cartão à sua fatura e passa a manter os totais
+    das faturas por triggers.
+
+    Antes desta versão, a tabela faturas não era gravada e o total de uma fatura
+    só podia ser obtido somando as transações do cartão. Com transacoes.fatura_id
+    e os triggers, o total e o limite disponível de uma fatura são lidos de uma
+    única linha:
+
+        SELECT valor_total, limite_disponivel FROM faturas
+        WHERE conta_id = ? AND ano = ? AND mes = ?
+            SEARCH faturas USING INDEX idx_faturas_conta_ano_mes (conta_id=? AND ano=? AND mes=?)
+
+    As transações de cartão existentes são associadas às faturas (e têm o
+    vencimento recalculado pela tabela de ciclos do cartão).
+    """
+    from models.faturas import atribuir_faturas
+
+    _adicionar_coluna_se_ausente(conn, 'transacoes', 'fatura_id', 'INTEGER')
+    conn.execute(
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_faturas_conta_ano_mes '
+        'ON faturas (conta_id, ano, mes)'
+    )
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_transacoes_fatura '
+        'ON transacoes (fatura_id) WHERE fatura_id IS NOT NULL'
+    )
+    _criar_triggers_faturas(conn)
+
+    associadas = atribuir_faturas(conn, 't.fatura_id IS NULL')
+    if progresso:
+        progresso('Associando transações às faturas', associadas, associadas)
+
+
+@migracao(8, 'Limite disponível por cartão nas faturas')
+def _v8_limite_do_cartao(conn, progresso):
+    """
+    Passa a manter em faturas.limite_disponivel o limite disponível do cartão.
+
+    Até a versão 7, o limite disponível de cada fatura descontava apenas o que
+    faltava pagar dela: uma compra em 12 parcelas reduzia o limite de cada
+    fatura em uma parcela só. Os triggers são refeitos para atualizar todas as
+    faturas do cartão e o valor é recalculado a partir dos totais.
+    """
+    for trigger in (
+        'trg_transacoes_fatura_insert',
+        'trg_transacoes_fatura_update',
+        'trg_transacoes_fatura_delete',
+        'trg_contas_limite_faturas',
+    ):
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    _criar_triggers_faturas(conn)
+
+    conn.execute(
+        f"""
+        UPDATE faturas
+        SET limite_disponivel =
+            COALESCE((SELECT limite_credito FROM contas WHERE id = faturas.conta_id), 0)
+            - {_EXPRESSAO_EM_ABERTO_CARTAO.format(conta='faturas.conta_id')}
+        """
+    )
+
+
+# Descrição das ocorrências gravadas pelas recorrências: 'Aluguel (3/12)'
+_DESCRICAO_OCORRENCIA = re.compile(r'^(.*) \((\d+)/(\d+)\)$')
+
+
+@migracao(9, 'Séries recorrentes anteriores às recorrências virtuais')
+def _v9_series_recorrentes_antigas(conn, progresso):
+    """
+    Converte as séries recorrentes gravadas antes da versão 6 para o modelo das
+    recorrências virtuais, em que o saldo da conta só recebe as ocorrências já
+    gravadas (vencidas ou editadas).
+
+    Antes da versão 6, todas as ocorrências eram gravadas no cadastro e somadas
+    ao saldo, inclusive as futuras. Para cada uma dessas séries:
+        - as ocorrências gravadas (identificadas pela descrição 'X (n/total)' e
+          pela data do cronograma) são ligadas à recorrência;
+        - as futuras, pendentes e iguais ao modelo são excluídas e descontadas
+          do saldo, e voltam a ser geradas sob demanda a partir de
+          proxima_execucao;
+        - as editadas continuam gravadas, como uma ocorrência virtual editada;
+        - os números sem ocorrência gravada (excluídas pelo usuário ou com a
+          descrição alterada) ficam em recorrencias_excecoes, para não serem
+          gerados de novo.
+    """
+    from controllers.recorrencias import hoje
+    from controllers.transacoes_controller import gerar_cronograma
+
+    data_atual = hoje()
+    regras = conn.execute(
+        """
+        SELECT r.id, r.frequencia, r.data_inicio, r.ocorrencias, t.id, t.descricao,
+               t.valor, t.tipo, t.conta_id, t.categoria_id, t.responsavel_id,
+               t.pagamento_id
+        FROM recorrencias r
+        JOIN transacoes t ON t.id = r.transacao_id
+        WHERE r.proxima_execucao IS NULL AND r.ocorrencias > 1
+          AND t.descricao IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM transacoes o
+              WHERE o.recorrencia_id = r.id AND o.ocorrencia > 1
+          )
+        """
+    ).fetchall()
+
+    saldos = {}
+    for numero_regra, regra in enumerate(regras, start=1):
+        recorrencia_id, frequencia, inicio, total, modelo_id, descricao = regra[:6]
+        datas = gerar_cronograma(inicio, total, frequencia)
+        candidatas = conn.execute(
+            """
+            SELECT id, descricao, data, valor, status, categoria_id,
+                   responsavel_id, pagamento_id
+            FROM transacoes
+            WHERE recorrencia_id IS NULL AND id != ? AND conta_id IS ? AND tipo = ?
+              AND substr(descricao, 1, ?) = ?
+            """,
+            (modelo_id, regra[8], regra[7], len(descricao) + 2, descricao + ' ('),
+        ).fetchall()
+
+        gravadas = {}
+        for candidata in candidatas:
+            partes = _DESCRICAO_OCORRENCIA.match(candidata[1])
+            if not partes or partes[1] != descricao or int(partes[3]) != total:
+                continue
+            numero = int(partes[2])
+            if 2 <= numero <= total and candidata[2] == datas[numero - 1]:
+                gravadas.setdefault(numero, candidata)
+
+        conn.executemany(
+            'UPDATE transacoes SET recorrencia_id = ?, ocorrencia = ? WHERE id = ?',
+            [(recorrencia_id, numero, linha[0]) for numero, linha in gravadas.items()],
+        )
+
+        # Futuras e iguais ao modelo: passam a ser virtuais
+        modelo = (regra[6], 'pendente') + tuple(regra[9:12])
+        virtuais = sorted(
+            numero
+            for numero, linha in gravadas.items()
+            if linha[2] > data_atual and (linha[3], linha[4]) + tuple(linha[5:8]) == modelo
+        )
+        conn.executemany(
+            'DELETE FROM transacoes WHERE id = ?',
+            [(gravadas[numero][0],) for numero in virtuais],
+        )
+        if regra[8] is not None:
+            saldos[regra[8]] = saldos.get(regra[8], 0) + regra[6] * len(virtuais)
+
+        ausentes = set(range(2, total + 1)) - set(gravadas)
+        conn.executemany(
+            'INSERT OR IGNORE INTO recorrencias_excecoes (recorrencia_id, ocorrencia) '
+            'VALUES (?, ?)',
+            [(recorrencia_id, numero) for numero in sorted(ausentes)],
+        )
+        if virtuais:
+            conn.execute(
+                'UPDATE recorrencias SET proxima_execucao = ? WHERE id = ?',
+                (datas[virtuais[0] - 1], recorrencia_id),
+            )
+        if progresso:
+            progresso('Convertendo séries recorrentes', numero_regra, len(regras))
+
+    conn.executemany(
+        'UPDATE contas SET saldo = saldo - ? WHERE id = ?',
+        [(valor, conta_id) for conta_id, valor in saldos.items() if valor],
+    )
@@ -0,0 +1,164 @@
+"""
+Este módulo define os perfis de desempenho do SQLite aplicados a cada conexão.
+
+O perfil é escolhido pela variável SQLITE_PERFIL do arquivo .env e cada PRAGMA
+pode ser sobrescrito individualmente:
+
+    SQLITE_PERFIL=desempenho
+    SQLITE_JOURNAL_MODE=WAL
+    SQLITE_SYNCHRONOUS=NORMAL
+    SQLITE_CACHE_SIZE=-65536      # negativo = KiB, positivo = páginas
+    SQLITE_MMAP_SIZE=268435456    # bytes
+    SQLITE_TEMP_STORE=MEMORY
+    SQLITE_BUSY_TIMEOUT=5000      # milissegundos
+"""
+import os
+
+from dotenv import load_dotenv
+
+
+PERFIL_PADRAO = 'desempenho'
+
+PERFIS = {
+    # Padrões do próprio SQLite (journal de rollback e sincronização completa)
+    'padrao': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+    # WAL permite leituras concorrentes com uma escrita em andamento
+    'desempenho': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # WAL com fsync a cada commit, para máquinas sujeitas a quedas de energia
+    'seguro': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16384,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 10000,
+    },
+}
+
+VALORES_PERMITIDOS = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+}
+
+PRAGMAS_INTEIROS = ('cache_size', 'mmap_size', 'busy_timeout')
+
+# busy_timeout vem primeiro para que a troca de journal_mode aguarde bloqueios
+ORDEM_APLICACAO = (
+    'busy_timeout',
+    'journal_mode',
+    'synchronous',
+    'cache_size',
+    'mmap_size',
+    'temp_store',
+)
+
+# Nomes dos valores numéricos devolvidos pela leitura dos PRAGMAs
+NOMES_SYNCHRONOUS = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+NOMES_TEMP_STORE = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+
+_perfil_atual = None
+
+
+def carregar_perfil():
+    """
+    Monta o perfil a partir das variáveis de ambiente (.env).
+
+    :return: Dicionário com o nome do perfil e os valores de cada PRAGMA
+    """
+    load_dotenv()
+
+    nome = os.getenv('SQLITE_PERFIL', PERFIL_PADRAO).strip().lower()
+    if nome not in PERFIS:
+        raise ValueError(
+            f"Perfil SQLite desconhecido: '{nome}'. "
+            f"Opções: {', '.join(sorted(PERFIS))}."
+        )
+
+    perfil = dict(PERFIS[nome])
+    for pragma in ORDEM_APLICACAO:
+        valor = os.getenv(f'SQLITE_{pragma.upper()}')
+        if valor is None or not valor.strip():
+            continue
+
+        if pragma in PRAGMAS_INTEIROS:
+            try:
+                perfil[pragma] = int(valor)
+            except ValueError:
+                raise ValueError(
+                    f'SQLITE_{pragma.upper()} deve ser um número inteiro.'
+                ) from None
+        else:
+            valor = valor.strip().upper()
+            if valor not in VALORES_PERMITIDOS[pragma]:
+                raise ValueError(
+                    f'Valor inválido para SQLITE_{pragma.upper()}: {valor}.'
+                )
+            perfil[pragma] = valor
+
+    perfil['nome'] = nome
+    return perfil
+
+
+def obter_perfil():
+    """
+    Retorna o perfil em uso, carregando-o na primeira chamada.
+    """
+    global _perfil_atual
+    if _perfil_atual is None:
+        _perfil_atual = carregar_perfil()
+    return dict(_perfil_atual)
+
+
+def recarregar_perfil():
+    """
+    Relê o perfil do ambiente. Vale para as conexões criadas a partir de então.
+    """
+    global _perfil_atual
+    _perfil_atual = carregar_perfil()
+    return dict(_perfil_atual)
+
+
+def aplicar_perfil(conn, perfil=None):
+    """
+    Aplica os PRAGMAs do perfil em uma conexão recém-aberta.
+    """
+    perfil = perfil or obter_perfil()
+    for pragma in ORDEM_APLICACAO:
+        # Os valores já foram validados, por isso podem ser interpolados
+        conn.execute(f'PRAGMA {pragma} = {perfil[pragma]}')
+
+
+def inspecionar_conexao(conn):
+    """
+    Lê os valores efetivos dos PRAGMAs de desempenho em uma conexão.
+
+    Útil para conferir em tempo de execução se o perfil foi aplicado.
+    """
+    efetivo = {}
+    for pragma in ORDEM_APLICACAO:
+        valor = conn.execute(f'PRAGMA {pragma}').fetchone()
+        efetivo[pragma] = valor[0] if valor else None
+
+    efetivo['journal_mode'] = str(efetivo['journal_mode']).upper()
+    efetivo['synchronous'] = NOMES_SYNCHRONOUS.get(
+        efetivo['synchronous'], efetivo['synchronous']
+    )
+    efetivo['temp_store'] = NOMES_TEMP_STORE.get(
+        efetivo['temp_store'], efetivo['temp_store']
+    )
+    return efetivo
@@ -0,0 +1,193 @@
+"""
+Este módulo rastreia as instruções SQL executadas durante uma medição
+(models.metricas), para encontrar padrões N+1 e conexões aninhadas.
+
+Cada conexão obtida do pool durante o rastreamento recebe um trace callback
+(sqlite3.Connection.set_trace_callback) que registra o texto de cada instrução;
+o cursor do pool (models.database.CursorMedido) delimita cada execução e soma o
+seu tempo à instrução registrada. As linhas dos triggers e as repetições de um
+executemany, que o SQLite também entrega ao trace callback, ficam na instrução
+que as disparou.
+
+Ao final, o rastreamento aponta:
+    - instruções idênticas (a menos dos valores) executadas várias vezes, como
+      as consultas feitas dentro de um laço;
+    - requisições que obtiveram mais de uma conexão do pool, em sequência ou
+      uma dentro da outra.
+
+O rastreamento das requisições do servidor é ligado pela variável
+SQL_RASTREAMENTO=1 do arquivo .env; nos testes, pela fixture rastreamento_sql.
+"""
+
+import os
+import re
+from collections import Counter
+
+# Quantidade de execuções a partir da qual uma instrução é apontada
+LIMITE_REPETICOES = 2
+
+# Instruções de controle de transação, que não contam como repetições
+CONTROLE_TRANSACAO = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'END')
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACOS = re.compile(r'\s+')
+
+
+def rastreamento_ativado():
+    """
+    Indica se o rastreamento das requisições foi ligado no arquivo .env.
+    """
+    return os.getenv('SQL_RASTREAMENTO', '').lower() in ('1', 'true', 'sim')
+
+
+def normalizar_sql(sql):
+    """
+    Troca os valores literais da instrução por '?' e compacta os espaços, para
+    que execuções da mesma instrução com parâmetros diferentes sejam iguais.
+
+    :param sql: Texto da instrução, com os parâmetros já substituídos
+    :return: Texto normalizado
+    """
+    return _ESPACOS.sub(' ', _LITERAIS.sub('?', sql)).strip()
+
+
+def _eh_controle(sql):
+    return sql.lstrip().split(' ', 1)[0].upper() in CONTROLE_TRANSACAO
+
+
+class InstrucaoRastreada:
+    """
+    Uma instrução executada, com a conexão que a executou e o tempo gasto.
+    """
+
+    __slots__ = ('sql', 'conexao', 'segundos', 'lote')
+
+    def __init__(self, sql, conexao, lote=False):
+        self.sql = normalizar_sql(sql)
+        self.conexao = conexao
+        self.segundos = 0.0
+        self.lote = lote
+
+
+class Rastreamento:
+    """
+    Instruções SQL e conexões usadas durante uma medição.
+    """
+
+    def __init__(self):
+        self.instrucoes = []
+        self.conexoes = 0
+        self.abertas = 0
+        self.maximo_abertas = 0
+        # Execução em andamento no cursor e a instrução registrada para ela
+        self._executando = False
+        self._lote = False
+        self._atual = None
+
+    def acompanhar_conexao(self, conn):
+        """
+        Passa a registrar as instruções de uma conexão obtida do pool.
+        """
+        self.conexoes += 1
+        self.abertas += 1
+        self.maximo_abertas = max(self.maximo_abertas, self.abertas)
+        numero = self.conexoes
+        conn.set_trace_callback(lambda sql: self._registrar(numero, sql))
+
+    def liberar_conexao(self, conn):
+        """
+        Deixa de registrar as instruções de uma conexão devolvida ao pool.
+        """
+        conn.set_trace_callback(None)
+        self.abertas -= 1
+
+    def iniciar_instrucao(self, lote=False):
+        """
+        Marca o início de uma execução do cursor.
+
+        :param lote: Se a execução é um executemany
+        """
+        self._executando = True
+        self._lote = lote
+        self._atual = None
+
+    def encerrar_instrucao(self, segundos):
+        """
+        Soma o tempo de uma execução à instrução registrada para ela.
+        """
+        self.somar_tempo(segundos, self._atual)
+        self._executando = False
+        self._atual = None
+
+    def somar_tempo(self, segundos, instrucao=None):
+        """
+        Soma tempo à instrução informada ou, se nenhuma, à última registrada.
+        """
+        if instrucao is None:
+            if not self.instrucoes:
+                return
+            instrucao = self.instrucoes[-1]
+        instrucao.segundos += segundos
+
+    def _registrar(self, conexao, sql):
+        if not self._executando or _eh_controle(sql):
+            self.instrucoes.append(InstrucaoRastreada(sql, conexao))
+        elif self._atual is None:
+            self._atual = InstrucaoRastreada(sql, conexao, self._lote)
+            self.instrucoes.append(self._atual)
+        # Demais linhas da execução em andamento: triggers ou linhas do lote
+
+    def instrucoes_repetidas(self, minimo=LIMITE_REPETICOES):
+        """
+        Retorna as instruções executadas pelo menos `minimo` vezes.
+
+        :return: Lista de (sql normalizado, execuções), das mais repetidas
+        """
+        contagem = Counter(
+            instrucao.sql
+            for instrucao in self.instrucoes
+            if not _eh_controle(instrucao.sql)
+        )
+        return [
+            (sql, quantidade)
+            for sql, quantidade in contagem.most_common()
+            if quantidade >= minimo
+        ]
+
+    def tempo_total(self):
+        return sum(instrucao.segundos for instrucao in self.instrucoes)
+
+    def alertas(self):
+        """
+        Retorna a descrição de cada padrão suspeito encontrado.
+        """
+        alertas = [
+            f'instrução executada {quantidade} vezes: {sql}'
+            for sql, quantidade in self.instrucoes_repetidas()
+        ]
+        if self.conexoes > 1:
+            alertas.append(
+                f'{self.conexoes} conexões obtidas do pool '
+                f'(até {self.maximo_abertas} abertas ao mesmo tempo)'
+            )
+        return alertas
+
+    def relatorio(self):
+        """
+        Retorna o relatório em texto: as instruções, na ordem, e os alertas.
+        """
+        linhas = [
+            f'{len(self.instrucoes)} instruções em {self.conexoes} conexão(ões), '
+            f'{self.tempo_total() * 1000:.2f} ms'
+        ]
+        for instrucao in self.instrucoes:
+            lote = ' (lote)' if instrucao.lote else ''
+            linhas.append(
+                f'  [{instrucao.conexao}] {instrucao.segundos * 1000:7.2f} ms  '
+                f'{instrucao.sql}{lote}'
+            )
+        alertas = self.alertas()
+        if alertas:
+            linhas.append('Alertas:')
+            linhas.extend(f'  - {alerta}' for alerta in alertas)
+        return '\n'.join(linhas)
@@ -0,0 +1,67 @@
+"""
+Fixtures compartilhadas pelos testes.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from models import database
+from models.dimensoes import invalidar_dimensoes
+from models.metricas import rastrear_sql
+
+# Relatórios dos testes cujo rastreamento SQL encontrou padrões suspeitos
+_relatorios_sql = []
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """
+    Aponta o banco de dados para um arquivo temporário com as tabelas criadas.
+    """
+    database.fechar_conexoes()
+    monkeypatch.setattr(database, 'DB_PATH', tmp_path / 'database.db')
+    database.criar_tabelas()
+    invalidar_dimensoes()
+    yield database.DB_PATH
+    database.fechar_conexoes()
+
+
+@pytest.fixture
+def rastreamento_sql(request):
+    """
+    Context manager que rastreia as instruções SQL executadas no bloco.
+
+    Os relatórios dos blocos com instruções repetidas ou mais de uma conexão são
+    exibidos no resumo ao final da execução.
+    """
+
+    @contextmanager
+    def rastrear():
+        with rastrear_sql() as rastreamento:
+            yield rastreamento
+        if rastreamento.alertas():
+            _relatorios_sql.append((request.node.nodeid, rastreamento.relatorio()))
+
+    return rastrear
+
+
+@pytest.fixture
+def callbacks_visualizacao(monkeypatch):
+    """
+    Módulo de callbacks da visualização, importado sem depender do locale
+    pt_BR estar instalado.
+    """
+    import importlib
+    import locale
+
+    monkeypatch.setattr(locale, 'setlocale', lambda *args: 'C')
+    return importlib.import_module('callbacks.visualizar_transacoes')
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _relatorios_sql:
+        return
+    terminalreporter.section('rastreamento SQL')
+    for teste, relatorio in _relatorios_sql:
+        terminalreporter.write_line(teste)
+        terminalreporter.write_line(relatorio)
@@ -0,0 +1,81 @@
+import sqlite3
+
+from models.cache import CacheResultados
+from models.database import conexao, registrar_alteracao, versao_dados
+
+
+def test_lru_respeita_tamanho_e_peso():
+    cache = CacheResultados(tamanho_maximo=2, peso_maximo=10, peso=len)
+    versao = versao_dados()
+
+    cache.guardar('a', [1, 2, 3], versao)
+    cache.guardar('b', [1, 2, 3], versao)
+    assert cache.obter('a') == [1, 2, 3]  # 'a' passa a ser o mais recente
+
+    cache.guardar('c', [1], versao)
+    assert cache.obter('b') is None
+    assert cache.obter('a') is not None
+
+    cache.guardar('d', [1] * 6, versao)  # excede o peso: descarta 'c'
+    assert cache.obter('c') is None
+    assert cache.obter('a') is not None
+    assert cache.estatisticas()['peso_total'] == 9
+
+    cache.guardar('e', [1] * 11, versao)  # maior que o limite: não é guardado
+    assert cache.obter('e') is None
+
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['falhas']) == (3, 3)
+
+
+def test_escrita_confirmada_invalida_o_cache(banco):
+    cache = CacheResultados()
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        return {'valor': len(chamadas)}
+
+    assert cache.obter_ou_calcular('x', calcular) == {'valor': 1}
+    assert cache.obter_ou_calcular('x', calcular) == {'valor': 1}
+
+    # Transação sem alterações não muda a versão
+    with conexao() as conn:
+        conn.execute('SELECT COUNT(*) FROM transacoes').fetchone()
+    assert cache.obter_ou_calcular('x', calcular) == {'valor': 1}
+
+    with conexao() as conn:
+        conn.execute("INSERT INTO categorias (nome) VALUES ('Mercado')")
+    assert cache.obter_ou_calcular('x', calcular) == {'valor': 2}
+
+    # Alterações desfeitas também não invalidam
+    with conexao() as conn:
+        conn.execute("INSERT INTO categorias (nome) VALUES ('Lazer')")
+        conn.rollback()
+    assert cache.obter_ou_calcular('x', calcular) == {'valor': 2}
+
+    registrar_alteracao()
+    assert cache.obter_ou_calcular('x', calcular) == {'valor': 3}
+
+
+def test_escrita_de_outro_processo_invalida_o_cache(banco):
+    cache = CacheResultados()
+    cache.guardar('x', 'antigo', versao_dados())
+    assert cache.obter('x') == 'antigo'
+
+    # Conexão fora do pool, como a de outro worker do servidor
+    externa = sqlite3.connect(banco)
+    externa.execute("INSERT INTO categorias (nome) VALUES ('Mercado')")
+    externa.commit()
+    externa.close()
+
+    assert cache.obter('x') is None
+
+
+def test_resultado_calculado_durante_escrita_e_descartado():
+    cache = CacheResultados()
+    versao = versao_dados()
+    registrar_alteracao()
+
+    cache.guardar('x', 'antigo', versao)
+    assert cache.obter('x') is None
@@ -0,0 +1,48 @@
+from datetime import date, datetime
+
+import pytest
+
+from models.calendario import (
+    ajustar_dias_uteis,
+    data_pascoa,
+    eh_feriado,
+    feriados_do_ano,
+    proximo_dia_util,
+)
+
+
+@pytest.mark.parametrize(
+    'ano, pascoa',
+    [(2024, date(2024, 3, 31)), (2025, date(2025, 4, 20)), (2038, date(2038, 4, 25))],
+)
+def test_data_pascoa(ano, pascoa):
+    assert data_pascoa(ano) == pascoa
+
+
+def test_feriados_moveis_de_2025():
+    feriados = feriados_do_ano(2025)
+    assert {
+        date(2025, 3, 3),  # Carnaval
+        date(2025, 3, 4),
+        date(2025, 4, 18),  # Sexta-feira Santa
+        date(2025, 6, 19),  # Corpus Christi
+        date(2025, 11, 20),  # Consciência Negra
+    } <= feriados
+    assert date(2023, 11, 20) not in feriados_do_ano(2023)
+    assert eh_feriado(datetime(2025, 12, 25, 10, 30))
+
+
+def test_proximo_dia_util_mantem_o_tipo():
+    # Sexta-feira Santa seguida de fim de semana
+    assert proximo_dia_util(date(2025, 4, 18)) == date(2025, 4, 22)
+    assert proximo_dia_util(datetime(2025, 4, 21)) == datetime(2025, 4, 22)
+    assert proximo_dia_util(date(2025, 4, 23)) == date(2025, 4, 23)
+
+
+def test_ajuste_vetorizado_igual_ao_iterativo():
+    datas = [date.fromordinal(n) for n in range(738886, 739986, 7)]
+    esperadas = [proximo_dia_util(d).isoformat() for d in datas]
+    assert ajustar_dias_uteis([d.isoformat() for d in datas]) == esperadas
+    # 31/12 num sábado ajusta para o primeiro dia útil do ano seguinte
+    assert ajustar_dias_uteis(['2033-12-31']) == ['2034-01-02']
+    assert ajustar_dias_uteis([]) == []
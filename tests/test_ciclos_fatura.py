@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+import pytest
+
+from controllers.cadastro.contas import cadastrar_conta, editar_conta, listar_contas
+from controllers.transacoes_controller import calcular_data_vencimento
+from models import ciclos_fatura
+from models.ciclos_fatura import TabelaCiclos, tabela_ciclos
+
+
+@pytest.mark.parametrize('dias', [(5, 12), (25, 5), (31, 10), (28, 30), (1, 1)])
+def test_tabela_igual_ao_calculo_por_data(dias):
+    tabela = TabelaCiclos(*dias, 2023, 2026)
+    datas = [
+        (date(2023, 1, 1) + timedelta(days=n)).isoformat() for n in range(0, 1400, 3)
+    ]
+    assert tabela.vencimentos_de(datas) == [
+        calcular_data_vencimento(data, *dias) for data in datas
+    ]
+
+
+def test_tabela_regerada_apenas_quando_os_dias_mudam(banco, monkeypatch):
+    cache = ciclos_fatura.CacheCiclos()
+    monkeypatch.setattr(ciclos_fatura, '_cache', cache)
+    cadastrar_conta('Nubank', 'cartao', 0, 5, 12, 1000)
+    conta_id = listar_contas()['contas'][0]['id']
+
+    tabela = tabela_ciclos(conta_id, 5, 12, ['2024-01-20'])
+    assert tabela_ciclos(conta_id, 5, 12, ['2024-06-01']) is tabela
+    assert cache.geracoes == 1
+
+    # Uma data fora da janela amplia a tabela
+    tabela = tabela_ciclos(conta_id, 5, 12, ['2060-12-20'])
+    assert tabela.vencimento('2060-12-20') == '2061-01-12'
+    assert cache.geracoes == 2
+
+    editar_conta(conta_id, 'Nubank renomeado')
+    assert tabela_ciclos(conta_id, 5, 12) is cache._tabelas[conta_id]
+    assert cache.geracoes == 2
+
+    editar_conta(conta_id, 'Nubank', dia_fechamento=10, dia_vencimento=17)
+    assert conta_id not in cache._tabelas
@@ -0,0 +1,66 @@
+import pytest
+
+from controllers.consulta_tabela import (
+    dividir_filter_query,
+    traduzir_filter_query,
+    traduzir_sort_by,
+)
+
+COLUNAS = {
+    'valor': {'expressao': 't.valor', 'numerica': True},
+    'descricao': {'expressao': 't.descricao'},
+    'tipo': {'expressao': 't.tipo', 'converter': lambda v: str(v).lower()},
+    'conta': {'expressao': 'c.nome', 'juncao': 'LEFT JOIN contas c ON 1'},
+}
+
+
+def test_dividir_respeita_aspas():
+    assert dividir_filter_query('{descricao} contains "a && b" && {valor} > 5') == [
+        '{descricao} contains "a && b"',
+        '{valor} > 5',
+    ]
+
+
+@pytest.mark.parametrize(
+    'filtro, clausula, params',
+    [
+        ('{valor} > 100', 't.valor > ?', [100.0]),
+        ('{valor} ge 2.5', 't.valor >= ?', [2.5]),
+        ('{tipo} = Receita', 't.tipo = ?', ['receita']),
+        ('{descricao} i= "Mercado"', 't.descricao = ? COLLATE NOCASE', ['Mercado']),
+        ('{descricao} icontains 50%', "t.descricao LIKE ? ESCAPE '\\'", ['%50\\%%']),
+        ('{descricao} contains Pix', 'instr(t.descricao, ?) > 0', ['Pix']),
+        ('{descricao} is blank', "(t.descricao IS NULL OR t.descricao = '')", []),
+    ],
+)
+def test_traduz_expressoes(filtro, clausula, params):
+    assert traduzir_filter_query(filtro, COLUNAS)[:2] == ([clausula], params)
+
+
+def test_juncoes_e_valores_sao_parametros():
+    clausulas, params, juncoes = traduzir_filter_query(
+        "{conta} icontains \"x' OR 1=1 --\"", COLUNAS
+    )
+    assert clausulas == ["c.nome LIKE ? ESCAPE '\\'"]
+    assert params == ["%x' OR 1=1 --%"]
+    assert juncoes == ['LEFT JOIN contas c ON 1']
+
+
+@pytest.mark.parametrize(
+    'filtro',
+    ['{senha} = 1', '{valor} contains 1', '{valor} > abc', '{valor} = 1 || {valor} = 2'],
+)
+def test_rejeita_filtros_invalidos(filtro):
+    with pytest.raises(ValueError):
+        traduzir_filter_query(filtro, COLUNAS)
+
+
+def test_traduz_sort_by():
+    sort_by = [
+        {'column_id': 'valor', 'direction': 'desc'},
+        {'column_id': 'descricao', 'direction': 'asc'},
+    ]
+    assert traduzir_sort_by(sort_by, COLUNAS) == ['t.valor DESC', 't.descricao ASC']
+
+    with pytest.raises(ValueError):
+        traduzir_sort_by([{'column_id': 't.id; DROP TABLE', 'direction': 'asc'}], COLUNAS)
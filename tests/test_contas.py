@@ -0,0 +1,28 @@
+from controllers.cadastro.contas import (
+    cadastrar_conta,
+    editar_conta,
+    listar_contas,
+    obter_conta,
+)
+from models.database import conexao
+
+
+def test_valores_da_conta_gravados_em_centavos(banco, rastreamento_sql):
+    resultado = cadastrar_conta('Nubank', 'cartao', 0, 5, 12, 1500.10)
+    assert resultado['success']
+
+    with conexao() as conn:
+        assert conn.execute('SELECT saldo, limite_credito FROM contas').fetchone() == (
+            0,
+            150010,
+        )
+
+    conta = listar_contas()['contas'][0]
+    assert conta['limite'] == 1500.10
+
+    with rastreamento_sql() as rastreamento:
+        editar_conta(conta['id'], 'Nubank', saldo=-20.05)
+    # A conta atual é lida na mesma conexão e transação da atualização
+    assert rastreamento.alertas() == []
+    assert rastreamento.conexoes == 1
+    assert obter_conta(conta['id'])['conta']['saldo'] == -20.05
@@ -0,0 +1,98 @@
+import sqlite3
+
+import pytest
+
+from models import database
+from models.database import (
+    UnidadeDeTrabalho,
+    conectar,
+    conexao,
+    unidade_de_trabalho,
+)
+from models.metricas import rastrear_sql
+
+
+def test_conexao_reutilizada_pelo_pool(banco):
+    conn = conectar()
+    conn.close()
+
+    assert conectar() is conn
+
+
+def test_conexoes_simultaneas_sao_distintas(banco):
+    conn1 = conectar()
+    conn2 = conectar()
+
+    assert conn1 is not conn2
+
+    conn1.close()
+    conn2.close()
+
+
+def test_close_descarta_transacao_pendente(banco):
+    conn = conectar()
+    conn.execute("INSERT INTO categorias (nome) VALUES ('Mercado')")
+    conn.close()
+
+    conn = conectar()
+    assert conn.execute('SELECT COUNT(*) FROM categorias').fetchone()[0] == 0
+    conn.close()
+
+
+def test_context_manager_confirma_e_desfaz(banco):
+    with conexao() as conn:
+        conn.execute("INSERT INTO categorias (nome) VALUES ('Mercado')")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        with conexao() as conn:
+            conn.execute("INSERT INTO categorias (nome) VALUES ('Lazer')")
+            conn.execute('INSERT INTO categorias (nome) VALUES (NULL)')
+
+    with conexao() as conn:
+        nomes = [r[0] for r in conn.execute('SELECT nome FROM categorias')]
+    assert nomes == ['Mercado']
+
+
+def test_pool_descarta_conexoes_de_outro_banco(banco, tmp_path, monkeypatch):
+    conn = conectar()
+    conn.close()
+
+    monkeypatch.setattr(database, 'DB_PATH', tmp_path / 'outro.db')
+    novo = conectar()
+
+    assert novo is not conn
+    novo.close()
+
+
+def test_unidade_de_trabalho_confirma_operacoes_de_uma_vez(banco):
+    invalidacoes = []
+    with rastrear_sql() as rastreamento:
+        with UnidadeDeTrabalho() as uow:
+            for nome in ('Mercado', None, 'Lazer'):
+                try:
+                    with unidade_de_trabalho(uow):
+                        uow.conn.execute('INSERT INTO categorias (nome) VALUES (?)', (nome,))
+                        uow.ao_confirmar(invalidacoes.append, 'categorias')
+                except sqlite3.IntegrityError:
+                    pass
+            assert invalidacoes == []
+
+    # A operação que falhou desfez apenas a própria alteração
+    with conexao() as conn:
+        nomes = [r[0] for r in conn.execute('SELECT nome FROM categorias ORDER BY id')]
+    assert nomes == ['Mercado', 'Lazer']
+    assert invalidacoes == ['categorias']
+    assert rastreamento.conexoes == 1
+    controle = [i.sql for i in rastreamento.instrucoes if i.sql in ('BEGIN IMMEDIATE', 'COMMIT')]
+    assert controle == ['BEGIN IMMEDIATE', 'COMMIT']
+
+
+def test_unidade_de_trabalho_desfaz_tudo_em_excecao(banco):
+    with pytest.raises(RuntimeError):
+        with UnidadeDeTrabalho() as uow:
+            with unidade_de_trabalho(uow):
+                uow.conn.execute("INSERT INTO categorias (nome) VALUES ('Mercado')")
+            raise RuntimeError
+
+    with conexao() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM categorias').fetchone()[0] == 0
@@ -0,0 +1,103 @@
+from controllers.cadastro.categorias import (
+    cadastrar_categoria,
+    editar_categoria,
+    listar_categorias,
+)
+from controllers.cadastro.pagamentos import cadastrar_pagamento
+from controllers.cadastro.responsaveis import cadastrar_responsavel
+from controllers.cadastro.contas import cadastrar_conta
+from controllers.visualizar_transacoes import CONSULTA_TRANSACOES, TransacoesRepository
+from models import dimensoes
+from models.database import UnidadeDeTrabalho, conexao
+from models.dimensoes import obter_dimensoes
+from models.metricas import rastrear_sql
+
+
+def test_dimensoes_recarregadas_apenas_apos_cadastro(banco):
+    cadastrar_conta('Nubank', 'cartao', 0, 5, 12, 1000)
+    cadastrar_conta('Corrente', 'conta', 100)
+    cadastrar_categoria('Mercado')
+    with conexao() as conn:
+        conn.execute("INSERT INTO pagamentos (tipo) VALUES ('Pix')")
+
+    carregamentos = dimensoes._cache.carregamentos
+    atual = obter_dimensoes()
+    assert obter_dimensoes() is atual
+    assert atual.opcoes('contas') == [
+        {'label': 'Corrente (conta)', 'value': 2},
+        {'label': 'Nubank (cartao)', 'value': 1},
+    ]
+    assert atual.opcoes('pagamentos') == [{'label': 'Pix', 'value': 1}]
+    assert atual.obter('contas', 1)['dia_fechamento'] == 5
+    assert atual.metadados_contas() == {
+        '2': {'tipo': 'conta'},
+        '1': {'tipo': 'cartao'},
+    }
+
+    # Escritas em transações não recarregam as dimensões
+    with conexao() as conn:
+        conn.execute(
+            "INSERT INTO transacoes (data, valor, tipo, conta_id, categoria_id) "
+            "VALUES ('2024-03-01', -500, 'despesa', 1, 1)"
+        )
+    assert obter_dimensoes() is atual
+
+    editar_categoria(1, 'Supermercado')
+    assert obter_dimensoes() is not atual
+    assert obter_dimensoes().nome('categorias', 1) == 'Supermercado'
+    assert dimensoes._cache.carregamentos == carregamentos + 2
+
+
+def test_nomes_da_listagem_resolvidos_em_memoria(banco):
+    assert 'JOIN contas' not in CONSULTA_TRANSACOES
+    assert 'JOIN categorias' not in CONSULTA_TRANSACOES
+
+    cadastrar_conta('Nubank', 'cartao', 0, 5, 12, 1000)
+    cadastrar_categoria('Mercado')
+    with conexao() as conn:
+        conn.execute(
+            "INSERT INTO transacoes (data, data_vencimento, valor, tipo, descricao, conta_id, categoria_id) "
+            "VALUES ('2024-03-01', '2024-03-12', -500, 'despesa', 'Feira', 1, 1)"
+        )
+
+    transacao = TransacoesRepository.buscar_transacoes()['transacoes'][0]
+    assert transacao['conta'] == 'Nubank'
+    assert transacao['conta_tipo'] == 'cartao'
+    assert transacao['categoria'] == 'Mercado'
+    assert transacao['responsavel'] is None
+
+    pagina = TransacoesRepository.buscar_pagina(
+        sort_by=[{'column_id': 'conta', 'direction': 'asc'}],
+        filter_query='{categoria} icontains merc',
+    )
+    assert [t['descricao'] for t in pagina['transacoes']] == ['Feira']
+
+
+def test_cadastros_na_mesma_unidade_de_trabalho(banco):
+    from controllers.cadastro_controller import salvar_conta, salvar_responsavel
+
+    atual = obter_dimensoes()
+    with rastrear_sql() as rastreamento:
+        with UnidadeDeTrabalho() as uow:
+            assert cadastrar_categoria('Mercado', uow=uow)['success']
+            assert cadastrar_responsavel('Ana', uow=uow)['success']
+            assert cadastrar_pagamento('Pix', uow=uow)['success']
+            assert salvar_responsavel(1, 'Bia', uow=uow) == (
+                'Responsável salvo com sucesso!'
+            )
+            assert salvar_conta(1, 'Itaú', 'conta', None, None, None, 10, uow=uow) == (
+                'Conta salva com sucesso!'
+            )
+            assert listar_categorias(uow)['categorias'] == [
+                {'id': 1, 'nome': 'Mercado'}
+            ]
+            # As dimensões só são recarregadas depois do COMMIT
+            assert obter_dimensoes() is atual
+
+    assert rastreamento.conexoes == 1
+    dimensoes_novas = obter_dimensoes()
+    assert dimensoes_novas is not atual
+    assert dimensoes_novas.nomes['responsaveis'] == {1: 'Ana', 2: 'Bia'}
+    assert dimensoes_novas.obter('contas', 1)['tipo'] == 'conta'
+    with conexao() as conn:
+        assert conn.execute('SELECT saldo FROM contas').fetchone() == (1000,)
@@ -0,0 +1,27 @@
+import pytest
+
+from models.dinheiro import dividir_em_parcelas, para_centavos, para_reais
+
+
+@pytest.mark.parametrize(
+    'valor, esperado',
+    [(10, 1000), (0.1, 10), (19.99, 1999), ('1.005', 101), (-7.5, -750), (None, None)],
+)
+def test_para_centavos(valor, esperado):
+    assert para_centavos(valor) == esperado
+
+
+def test_para_reais():
+    assert para_reais(1999) == 19.99
+    assert para_reais(None) is None
+
+
+def test_dividir_em_parcelas_distribui_o_resto():
+    assert dividir_em_parcelas(10000, 3) == [3334, 3333, 3333]
+    assert dividir_em_parcelas(-10000, 3) == [-3334, -3333, -3333]
+    assert sum(dividir_em_parcelas(123457, 7)) == 123457
+
+
+def test_dividir_em_parcelas_invalido():
+    with pytest.raises(ValueError):
+        dividir_em_parcelas(100, 0)
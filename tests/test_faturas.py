@@ -0,0 +1,142 @@
+from controllers.cadastro.contas import editar_conta
+from controllers.faturas import listar_faturas, obter_fatura, verificar_limite
+from controllers.transacoes_controller import cadastrar_transacao
+from controllers.visualizar_transacoes import editar_transacao, excluir_transacao
+from models.database import conexao
+
+
+def _cartao():
+    with conexao() as conn:
+        conn.execute(
+            "INSERT INTO contas (id, nome, tipo, saldo, dia_fechamento, dia_vencimento, "
+            "limite_credito) VALUES (1, 'Nubank', 'cartao', 0, 5, 12, 100000)"
+        )
+
+
+def _faturas():
+    with conexao() as conn:
+        return conn.execute(
+            'SELECT ano, mes, data_vencimento, valor_total, limite_disponivel '
+            'FROM faturas ORDER BY ano, mes'
+        ).fetchall()
+
+
+def test_parcelas_distribuidas_nas_faturas(banco):
+    _cartao()
+    cadastrar_transacao(
+        -30000, '2024-03-20', 'despesa', 'TV', 1, tipo_conta='cartao', num_parcelas=3
+    )
+
+    # O limite do cartão desconta as três parcelas, em todas as faturas
+    assert _faturas() == [
+        (2024, 4, '2024-04-12', 10000, 70000),
+        (2024, 5, '2024-05-13', 10000, 70000),
+        (2024, 6, '2024-06-12', 10000, 70000),
+    ]
+    fatura = obter_fatura(1, '2024-04-05')['fatura']
+    assert (fatura['valor_total'], fatura['limite_disponivel']) == (100.0, 700.0)
+    assert len(listar_faturas(1)['faturas']) == 3
+
+    # Uma compra nova, em uma fatura nova, já nasce com o limite do cartão
+    cadastrar_transacao(-5000, '2024-07-01', 'despesa', 'Livro', 1, tipo_conta='cartao')
+    assert {fatura[4] for fatura in _faturas()} == {65000}
+    assert verificar_limite(1, 650.0) == {
+        'success': True,
+        'cabe': True,
+        'limite_disponivel': 650.0,
+    }
+    assert not verificar_limite(1, 650.01)['cabe']
+
+    # Pagar uma fatura devolve o valor pago ao limite do cartão
+    with conexao() as conn:
+        conn.execute('UPDATE faturas SET valor_pago = 10000 WHERE mes = 4')
+    assert {fatura[4] for fatura in _faturas()} == {75000}
+
+
+def test_limite_sem_faturas_e_de_conta_comum(banco):
+    _cartao()
+    assert verificar_limite(1, 1000.0)['cabe']
+    assert not verificar_limite(1, 1000.01)['cabe']
+    with conexao() as conn:
+        conn.execute("INSERT INTO contas (id, nome, tipo, saldo) VALUES (2, 'Inter', 'conta', 0)")
+    assert not verificar_limite(2, 10.0)['success']
+
+
+def test_totais_acompanham_edicao_e_exclusao(banco):
+    _cartao()
+    cadastrar_transacao(-5000, '2024-04-01', 'despesa', 'Mercado', 1, tipo_conta='cartao')
+    cadastrar_transacao(-2000, '2024-04-02', 'despesa', 'Farmácia', 1, tipo_conta='cartao')
+    assert _faturas() == [(2024, 4, '2024-04-12', 7000, 93000)]
+
+    with conexao() as conn:
+        mercado, farmacia = [
+            linha[0] for linha in conn.execute('SELECT id FROM transacoes ORDER BY id')
+        ]
+
+    dados = {
+        'data': '2024-04-10',  # depois do fechamento: fatura de maio
+        'valor': 60.0,
+        'tipo': 'despesa',
+        'descricao': 'Mercado',
+        'conta_id': 1,
+        'categoria_id': None,
+        'responsavel_id': None,
+        'pagamento_id': None,
+        'status': 'pendente',
+    }
+    assert editar_transacao(mercado, dados)['success']
+    assert _faturas() == [
+        (2024, 4, '2024-04-12', 2000, 92000),
+        (2024, 5, '2024-05-13', 6000, 92000),
+    ]
+
+    excluir_transacao(farmacia)
+    assert _faturas()[0][3:] == (0, 94000)
+
+    with conexao() as conn:
+        conn.execute('UPDATE contas SET limite_credito = 50000 WHERE id = 1')
+    assert _faturas()[1][3:] == (6000, 44000)
+
+
+def _vencimentos():
+    with conexao() as conn:
+        return conn.execute(
+            'SELECT t.descricao, t.data_vencimento, t.data_efetiva, f.mes '
+            'FROM transacoes t LEFT JOIN faturas f ON f.id = t.fatura_id '
+            'ORDER BY t.id'
+        ).fetchall()
+
+
+def test_editar_dias_do_cartao_reatribui_faturas(banco):
+    _cartao()
+    cadastrar_transacao(-5000, '2024-04-08', 'despesa', 'Mercado', 1, tipo_conta='cartao')
+    cadastrar_transacao(-2000, '2024-04-09', 'despesa', 'Farmácia', 1, tipo_conta='cartao')
+    with conexao() as conn:
+        conn.execute("UPDATE transacoes SET status = 'pago' WHERE descricao = 'Farmácia'")
+    assert _faturas() == [(2024, 5, '2024-05-13', 7000, 93000)]
+
+    # Fechamento no dia 10: a compra em aberto passa para a fatura de abril
+    assert editar_conta(1, 'Nubank', 'cartao', 0, 10, 17, 1000.0)['success']
+    assert _vencimentos() == [
+        ('Mercado', '2024-04-17', '2024-04-17', 4),
+        ('Farmácia', '2024-05-13', '2024-05-13', 5),
+    ]
+    assert _faturas() == [
+        (2024, 4, '2024-04-17', 5000, 93000),
+        (2024, 5, '2024-05-13', 2000, 93000),
+    ]
+
+
+def test_conta_que_vira_cartao_recebe_faturas(banco):
+    with conexao() as conn:
+        conn.execute("INSERT INTO contas (id, nome, tipo, saldo) VALUES (1, 'Inter', 'conta', 0)")
+    cadastrar_transacao(-5000, '2024-04-08', 'despesa', 'Mercado', 1, tipo_conta='conta')
+    assert _faturas() == []
+
+    assert editar_conta(1, 'Inter', 'cartao', 0, 5, 12, 1000.0)['success']
+    assert _vencimentos() == [('Mercado', '2024-05-13', '2024-05-13', 5)]
+    assert _faturas() == [(2024, 5, '2024-05-13', 5000, 95000)]
+
+    # De volta a conta comum, a transação sai da fatura e pesa na data da compra
+    assert editar_conta(1, 'Inter', 'conta', 0)['success']
+    assert _vencimentos()[0][2:] == ('2024-04-08', None)
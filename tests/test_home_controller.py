@@ -0,0 +1,18 @@
+from controllers.home_controller import ABAS, id_conteudo_aba, layout
+
+
+def test_conteudo_de_todas_as_abas_montado_no_layout():
+    abas, conteudo = layout().children
+
+    assert [aba.value for aba in abas.children] == [valor for valor, _, _ in ABAS]
+    assert [c.id for c in conteudo.children] == [
+        id_conteudo_aba('transacoes'),
+        id_conteudo_aba('visualizar-transacoes'),
+        id_conteudo_aba('cadastros'),
+    ]
+    # Apenas a aba inicial fica visível; as demais são só escondidas
+    assert [c.style for c in conteudo.children] == [
+        None,
+        {'display': 'none'},
+        {'display': 'none'},
+    ]
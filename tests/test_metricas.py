@@ -0,0 +1,78 @@
+import logging
+
+import dash
+from dash import Input, Output, html
+
+from controllers.metricas import instrumentar_app
+from models import metricas
+from models.database import conectar
+from models.metricas import Histograma, encerrar_medicao, iniciar_medicao
+
+
+def test_histograma_acumula_por_faixa():
+    histograma = Histograma((1, 5, 10))
+    for valor in (0, 1, 3, 7, 50):
+        histograma.observar(valor)
+
+    assert histograma.acumulados() == [(1, 2), (5, 3), (10, 4), ('+Inf', 5)]
+    assert (histograma.soma, histograma.total) == (61, 5)
+
+
+def test_medicao_conta_instrucoes_das_conexoes(banco):
+    medicao, token = iniciar_medicao()
+    try:
+        conn = conectar()
+        try:
+            conn.execute("INSERT INTO categorias (nome) VALUES ('Mercado')")
+            conn.executemany(
+                'INSERT INTO categorias (nome) VALUES (?)', [('Lazer',), ('Saúde',)]
+            )
+            cursor = conn.cursor()
+            cursor.execute('SELECT nome FROM categorias')
+            assert len(cursor.fetchall()) == 3
+            conn.commit()
+        finally:
+            conn.close()
+    finally:
+        encerrar_medicao(token)
+
+    # Três instruções e o commit
+    assert medicao.instrucoes == 4
+    assert 0 < medicao.tempo_banco <= medicao.duracao()
+    assert metricas.medicao_atual() is None
+
+
+def test_callbacks_medidos_e_expostos_em_metrics(banco, monkeypatch, caplog):
+    registro = metricas.RegistroMetricas()
+    registro.limite_lento = 0
+    monkeypatch.setattr(metricas, '_registro', registro)
+
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='botao'), html.Div(id='saida')])
+
+    @app.callback(Output('saida', 'children'), Input('botao', 'n_clicks'))
+    def contar_categorias(n_clicks):
+        conn = conectar()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM categorias').fetchone()[0]
+        finally:
+            conn.close()
+
+    instrumentar_app(app)
+    cliente = app.server.test_client()
+    corpo = {
+        'output': 'saida.children',
+        'outputs': {'id': 'saida', 'property': 'children'},
+        'inputs': [{'id': 'botao', 'property': 'n_clicks', 'value': 1}],
+        'changedPropIds': ['botao.n_clicks'],
+        'state': [],
+    }
+    with caplog.at_level(logging.WARNING, logger='models.metricas'):
+        assert cliente.post('/_dash-update-component', json=corpo).status_code == 200
+
+    texto = cliente.get('/metrics').get_data(as_text=True)
+    nome = f'{__name__}.contar_categorias'
+    assert f'myfinance_callback_duracao_segundos_count{{callback="{nome}"}} 1' in texto
+    assert f'myfinance_callback_instrucoes_sql_sum{{callback="{nome}"}} 1' in texto
+    assert f'myfinance_callback_resposta_bytes_bucket{{callback="{nome}",le="1000"}} 1' in texto
+    assert 'Callback lento: ' + nome in caplog.text
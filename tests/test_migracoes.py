@@ -0,0 +1,308 @@
+import sqlite3
+
+import pytest
+
+from models import database, migracoes
+from models.database import conectar
+
+
+def _colunas(conn, tabela):
+    return [col[1] for col in conn.execute(f'PRAGMA table_info({tabela})')]
+
+
+def test_banco_novo_fica_na_versao_mais_recente(banco):
+    conn = conectar()
+    assert migracoes.versao_atual(conn) == migracoes.versao_mais_recente()
+    assert 'data_vencimento' in _colunas(conn, 'transacoes')
+    conn.close()
+
+
+def test_migrar_banco_atualizado_nao_executa_nada(banco, monkeypatch):
+    def falhar(*args):
+        raise AssertionError('migração executada novamente')
+
+    monkeypatch.setattr(
+        migracoes,
+        'MIGRACOES',
+        [(n, d, falhar) for n, d, _ in migracoes.MIGRACOES],
+    )
+
+    assert migracoes.migrar() == migracoes.versao_mais_recente()
+
+
+def test_banco_legado_sem_versao(tmp_path, monkeypatch):
+    caminho = tmp_path / 'legado.db'
+    legado = sqlite3.connect(caminho)
+    legado.execute(
+        'CREATE TABLE transacoes (id INTEGER PRIMARY KEY, data TEXT NOT NULL, '
+        'valor REAL NOT NULL, tipo TEXT NOT NULL, conta_id INTEGER, '
+        'parcelamento_id INTEGER, categoria_id INTEGER, responsavel_id INTEGER, '
+        "pagamento_id INTEGER, descricao TEXT, status TEXT NOT NULL DEFAULT 'pendente')"
+    )
+    legado.execute(
+        "INSERT INTO transacoes (data, valor, tipo) VALUES ('2024-01-05', 10, 'receita')"
+    )
+    legado.commit()
+    legado.close()
+
+    database.fechar_conexoes()
+    monkeypatch.setattr(database, 'DB_PATH', caminho)
+    mensagens = []
+    migracoes.migrar(lambda msg, feitos, total: mensagens.append(msg))
+
+    conn = conectar()
+    assert 'data_vencimento' in _colunas(conn, 'transacoes')
+    assert conn.execute('SELECT COUNT(*) FROM transacoes').fetchone()[0] == 1
+    conn.close()
+    database.fechar_conexoes()
+    assert mensagens[0] == 'Migração 1: Estrutura inicial'
+
+
+def test_executar_em_lotes_retomavel(banco):
+    conn = conectar()
+    conn.executemany(
+        'INSERT INTO categorias (nome) VALUES (?)',
+        [(f'cat{i}',) for i in range(25)],
+    )
+    conn.commit()
+
+    andamento = []
+    conn.execute('BEGIN IMMEDIATE')
+    processados = migracoes.executar_em_lotes(
+        conn,
+        'categorias',
+        "UPDATE categorias SET nome = upper(nome)",
+        condicao="nome != upper(nome)",
+        tamanho_lote=10,
+        progresso=lambda msg, feitos, total: andamento.append((feitos, total)),
+        confirmar_por_lote=True,
+    )
+    conn.commit()
+
+    assert processados == 25
+    assert andamento == [(10, 25), (20, 25), (25, 25)]
+    assert conn.execute(
+        "SELECT COUNT(*) FROM categorias WHERE nome = upper(nome)"
+    ).fetchone()[0] == 25
+    conn.close()
+
+
+def test_preenchimento_interrompido_deixa_banco_consistente(tmp_path, monkeypatch):
+    caminho = tmp_path / 'v2.db'
+    database.fechar_conexoes()
+    monkeypatch.setattr(database, 'DB_PATH', caminho)
+    todas = migracoes.MIGRACOES
+    monkeypatch.setattr(migracoes, 'MIGRACOES', todas[:2])
+    migracoes.migrar()
+    conn = conectar()
+    conn.execute(
+        "INSERT INTO transacoes (data, valor, tipo) VALUES ('2024-01-05', 10, 'receita')"
+    )
+    conn.commit()
+    conn.close()
+
+    def interromper(mensagem, feitos, total):
+        if mensagem == 'Preenchendo data_efetiva':
+            raise sqlite3.OperationalError('interrompido')
+
+    monkeypatch.setattr(migracoes, 'MIGRACOES', todas[:3])
+    with pytest.raises(sqlite3.OperationalError):
+        migracoes.migrar(interromper)
+
+    # O lote já confirmado e os triggers valem antes de user_version mudar
+    conn = conectar()
+    assert migracoes.versao_atual(conn) == 2
+    conn.execute(
+        "INSERT INTO transacoes (data, valor, tipo) VALUES ('2024-02-05', 20, 'receita')"
+    )
+    conn.commit()
+    assert [d for (d,) in conn.execute('SELECT data_efetiva FROM transacoes')] == [
+        '2024-01-05',
+        '2024-02-05',
+    ]
+    conn.close()
+
+    assert migracoes.migrar() == 3
+    database.fechar_conexoes()
+
+
+def _plano(conn, consulta, params=()):
+    return ' | '.join(
+        linha[3] for linha in conn.execute('EXPLAIN QUERY PLAN ' + consulta, params)
+    )
+
+
+def test_indices_atendem_as_consultas_frequentes(banco):
+    conn = conectar()
+
+    assert 'COVERING INDEX idx_transacoes_conta_' in _plano(
+        conn, 'SELECT COUNT(*) FROM transacoes WHERE conta_id = ?', (1,)
+    )
+    assert 'idx_transacoes_pagamento' in _plano(
+        conn, 'SELECT COUNT(*) FROM transacoes WHERE pagamento_id = ?', (1,)
+    )
+    assert 'idx_recorrencias_transacao' in _plano(
+        conn, 'SELECT id FROM recorrencias WHERE transacao_id = ?', (1,)
+    )
+    assert 'TEMP B-TREE' not in _plano(
+        conn, 'SELECT id, descricao FROM transacoes ORDER BY data DESC'
+    )
+    assert 'COVERING INDEX idx_transacoes_data_tipo_valor' in _plano(
+        conn,
+        "SELECT SUM(CASE WHEN tipo = 'receita' THEN valor ELSE 0 END) "
+        'FROM transacoes WHERE data >= ? AND data < ?',
+        ('2024-01-01', '2024-02-01'),
+    )
+    conn.close()
+
+
+def test_migracao_para_centavos(tmp_path, monkeypatch):
+    caminho = tmp_path / 'reais.db'
+    database.fechar_conexoes()
+    monkeypatch.setattr(database, 'DB_PATH', caminho)
+    monkeypatch.setattr(migracoes, 'MIGRACOES', migracoes.MIGRACOES[:3])
+    migracoes.migrar()
+
+    conn = conectar()
+    conn.execute(
+        "INSERT INTO contas (id, nome, tipo, saldo, limite_credito) "
+        "VALUES (1, 'Cartão', 'cartao', 1234.56, 5000)"
+    )
+    conn.execute(
+        "INSERT INTO parcelamentos (id, valor_total, parcelas) VALUES (1, 100, 3)"
+    )
+    conn.executemany(
+        'INSERT INTO transacoes (data, valor, tipo, conta_id, parcelamento_id) '
+        "VALUES (?, ?, 'despesa', 1, 1)",
+        [(f'2024-0{i}-10', -100 / 3) for i in range(1, 4)],
+    )
+    conn.execute(
+        "INSERT INTO transacoes (data, valor, tipo) VALUES ('2024-01-01', 0.3, 'receita')"
+    )
+    conn.commit()
+    conn.close()
+    database.fechar_conexoes()
+
+    monkeypatch.undo()
+    monkeypatch.setattr(database, 'DB_PATH', caminho)
+    migracoes.migrar()
+
+    conn = conectar()
+    assert conn.execute('SELECT saldo, limite_credito FROM contas').fetchone() == (
+        123456,
+        500000,
+    )
+    assert [
+        v for (v,) in conn.execute(
+            'SELECT valor FROM transacoes WHERE parcelamento_id = 1 ORDER BY data'
+        )
+    ] == [-3334, -3333, -3333]
+    assert conn.execute(
+        'SELECT valor, typeof(valor), data_efetiva FROM transacoes WHERE parcelamento_id IS NULL'
+    ).fetchone() == (30, 'integer', '2024-01-01')
+    conn.execute(
+        "INSERT INTO transacoes (data, valor, tipo) VALUES ('2024-05-01', 1, 'receita')"
+    )
+    assert conn.execute('SELECT MAX(id) FROM transacoes').fetchone()[0] == 5
+    conn.close()
+    database.fechar_conexoes()
+
+
+def test_migracao_recalcula_limite_do_cartao(tmp_path, monkeypatch):
+    from controllers.transacoes_controller import cadastrar_transacao
+
+    caminho = tmp_path / 'v7.db'
+    database.fechar_conexoes()
+    monkeypatch.setattr(database, 'DB_PATH', caminho)
+    todas = migracoes.MIGRACOES
+    monkeypatch.setattr(migracoes, 'MIGRACOES', todas[:7])
+    migracoes.migrar()
+    conn = conectar()
+    conn.execute(
+        "INSERT INTO contas (id, nome, tipo, saldo, dia_fechamento, dia_vencimento, "
+        "limite_credito) VALUES (1, 'Nubank', 'cartao', 0, 5, 12, 100000)"
+    )
+    conn.commit()
+    conn.close()
+    cadastrar_transacao(
+        -30000, '2024-03-20', 'despesa', 'TV', 1, tipo_conta='cartao', num_parcelas=3
+    )
+
+    def limites():
+        with database.conexao() as conn:
+            return [l for (l,) in conn.execute('SELECT limite_disponivel FROM faturas')]
+
+    # Até a versão 7, cada fatura descontava apenas a própria parcela
+    with database.conexao() as conn:
+        conn.execute('UPDATE faturas SET limite_disponivel = 100000 - valor_total')
+    assert limites() == [90000, 90000, 90000]
+
+    monkeypatch.setattr(migracoes, 'MIGRACOES', todas)
+    migracoes.migrar()
+    assert limites() == [70000, 70000, 70000]
+    database.fechar_conexoes()
+
+
+def test_migracao_desconta_do_saldo_as_series_antigas(tmp_path, monkeypatch):
+    from controllers import recorrencias
+
+    caminho = tmp_path / 'v8.db'
+    database.fechar_conexoes()
+    monkeypatch.setattr(database, 'DB_PATH', caminho)
+    monkeypatch.setattr(recorrencias, 'hoje', lambda: '2024-03-15')
+    todas = migracoes.MIGRACOES
+    monkeypatch.setattr(migracoes, 'MIGRACOES', todas[:8])
+    migracoes.migrar()
+
+    # Série de 6 meses gravada inteira e somada ao saldo, como antes da versão 6:
+    # a 2ª foi excluída pelo usuário e a 5ª teve o valor editado
+    conn = conectar()
+    conn.execute(
+        "INSERT INTO contas (id, nome, tipo, saldo) VALUES (1, 'Itaú', 'corrente', 0)"
+    )
+    datas = [f'2024-0{mes}-10' for mes in range(1, 7)]
+    for numero, data in enumerate(datas, start=1):
+        if numero == 2:
+            continue
+        conn.execute(
+            'INSERT INTO transacoes (id, data, valor, tipo, descricao, conta_id, status) '
+            "VALUES (?, ?, ?, 'despesa', ?, 1, 'pendente')",
+            (
+                numero,
+                data,
+                -20000 if numero == 5 else -10000,
+                'Aluguel' if numero == 1 else f'Aluguel ({numero}/6)',
+            ),
+        )
+    conn.execute(
+        "INSERT INTO recorrencias (id, transacao_id, frequencia, data_inicio, "
+        "data_fim, ocorrencias) VALUES (1, 1, 'mensal', '2024-01-10', '2024-06-10', 6)"
+    )
+    conn.execute('UPDATE transacoes SET recorrencia_id = 1, ocorrencia = 1 WHERE id = 1')
+    conn.execute('UPDATE contas SET saldo = -60000')
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(migracoes, 'MIGRACOES', todas)
+    migracoes.migrar()
+
+    conn = conectar()
+    # As ocorrências 4 e 6 (futuras e iguais ao modelo) passam a ser virtuais
+    assert conn.execute(
+        'SELECT id, ocorrencia FROM transacoes ORDER BY id'
+    ).fetchall() == [(1, 1), (3, 3), (5, 5)]
+    assert conn.execute('SELECT saldo FROM contas').fetchone() == (-40000,)
+    assert conn.execute(
+        'SELECT proxima_execucao FROM recorrencias'
+    ).fetchone() == ('2024-04-10',)
+    assert conn.execute(
+        'SELECT ocorrencia FROM recorrencias_excecoes'
+    ).fetchall() == [(2,)]
+    conn.close()
+
+    virtuais = recorrencias.ocorrencias_virtuais('2024-01-01', '2024-12-31')
+    assert [(o[1], o[5]) for o in virtuais] == [
+        ('2024-04-10', 'Aluguel (4/6)'),
+        ('2024-06-10', 'Aluguel (6/6)'),
+    ]
+    database.fechar_conexoes()
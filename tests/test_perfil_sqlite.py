@@ -0,0 +1,62 @@
+import pytest
+
+from models import perfil_sqlite
+from models.database import conectar, inspecionar_desempenho
+
+
+@pytest.fixture(autouse=True)
+def limpar_ambiente(monkeypatch):
+    monkeypatch.setattr(perfil_sqlite, 'load_dotenv', lambda: None)
+    for pragma in perfil_sqlite.ORDEM_APLICACAO:
+        monkeypatch.delenv(f'SQLITE_{pragma.upper()}', raising=False)
+    monkeypatch.delenv('SQLITE_PERFIL', raising=False)
+    perfil_sqlite.recarregar_perfil()
+    yield
+    perfil_sqlite._perfil_atual = None
+
+
+def test_perfil_padrao_e_desempenho():
+    perfil = perfil_sqlite.carregar_perfil()
+
+    assert perfil['nome'] == 'desempenho'
+    assert perfil['journal_mode'] == 'WAL'
+    assert perfil['synchronous'] == 'NORMAL'
+
+
+def test_sobrescrita_pelo_ambiente(monkeypatch):
+    monkeypatch.setenv('SQLITE_PERFIL', 'seguro')
+    monkeypatch.setenv('SQLITE_CACHE_SIZE', '-4096')
+    monkeypatch.setenv('SQLITE_TEMP_STORE', 'memory')
+
+    perfil = perfil_sqlite.carregar_perfil()
+
+    assert perfil['nome'] == 'seguro'
+    assert perfil['cache_size'] == -4096
+    assert perfil['temp_store'] == 'MEMORY'
+
+
+@pytest.mark.parametrize(
+    'variavel, valor',
+    [
+        ('SQLITE_PERFIL', 'turbo'),
+        ('SQLITE_SYNCHRONOUS', 'talvez'),
+        ('SQLITE_MMAP_SIZE', 'muito'),
+    ],
+)
+def test_valores_invalidos(monkeypatch, variavel, valor):
+    monkeypatch.setenv(variavel, valor)
+
+    with pytest.raises(ValueError):
+        perfil_sqlite.carregar_perfil()
+
+
+def test_perfil_aplicado_nas_conexoes(banco):
+    conn = conectar()
+    efetivo = perfil_sqlite.inspecionar_conexao(conn)
+    conn.close()
+
+    assert efetivo['journal_mode'] == 'WAL'
+    assert efetivo['synchronous'] == 'NORMAL'
+    assert efetivo['temp_store'] == 'MEMORY'
+    assert efetivo['cache_size'] == -65536
+    assert inspecionar_desempenho()['perfil']['nome'] == 'desempenho'
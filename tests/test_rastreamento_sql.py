@@ -0,0 +1,90 @@
+import importlib
+import locale
+
+from controllers.transacoes_controller import cadastrar_transacao
+from models.database import conectar, conexao
+from models.dimensoes import invalidar_dimensoes, obter_dimensoes
+from models.metricas import rastrear_sql
+from models.rastreamento_sql import normalizar_sql
+
+
+def _cartao():
+    with conexao() as conn:
+        conn.execute(
+            "INSERT INTO contas (id, nome, tipo, saldo, dia_fechamento, dia_vencimento, "
+            "limite_credito) VALUES (1, 'Nubank', 'cartao', 0, 5, 12, 100000)"
+        )
+
+
+def test_normalizar_sql_ignora_valores_e_espacos():
+    assert normalizar_sql(
+        "SELECT id FROM faturas\n  WHERE conta_id = 3 AND nome = 'O''Hara'"
+    ) == 'SELECT id FROM faturas WHERE conta_id = ? AND nome = ?'
+
+
+def test_aponta_instrucao_repetida_e_conexao_aninhada(banco):
+    with rastrear_sql() as rastreamento:
+        conn = conectar()
+        try:
+            for categoria_id in (1, 2, 3):
+                conn.execute('SELECT nome FROM categorias WHERE id = ?', (categoria_id,))
+            interna = conectar()
+            interna.execute('SELECT COUNT(*) FROM contas').fetchone()
+            interna.close()
+        finally:
+            conn.close()
+
+    assert rastreamento.instrucoes_repetidas() == [
+        ('SELECT nome FROM categorias WHERE id = ?', 3)
+    ]
+    assert (rastreamento.conexoes, rastreamento.maximo_abertas) == (2, 2)
+    assert rastreamento.abertas == 0
+    assert len(rastreamento.alertas()) == 2
+    assert '[2]' in rastreamento.relatorio()
+
+
+def test_parcelamento_grava_sem_instrucoes_repetidas(banco, rastreamento_sql):
+    _cartao()
+    with rastreamento_sql() as rastreamento:
+        cadastrar_transacao(
+            -120000, '2024-03-20', 'despesa', 'TV', 1, tipo_conta='cartao',
+            num_parcelas=12,
+        )
+
+    # Parcelas e faturas são gravadas em lote; os triggers não viram instruções
+    assert rastreamento.alertas() == [], rastreamento.relatorio()
+    assert sum(instrucao.lote for instrucao in rastreamento.instrucoes) == 3
+    assert rastreamento.instrucoes[-1].sql == 'COMMIT'
+
+
+def test_transacoes_recentes_resolvem_cadastros_em_memoria(
+    banco, rastreamento_sql, monkeypatch
+):
+    # O pacote callbacks fixa o locale pt_BR, que pode não estar instalado
+    monkeypatch.setattr(locale, 'setlocale', lambda *args: 'C')
+    recentes = importlib.import_module('callbacks.transacoes')
+    _cartao()
+    with conexao() as conn:
+        conn.execute("INSERT INTO categorias (id, nome) VALUES (1, 'Lazer')")
+    invalidar_dimensoes()
+    cadastrar_transacao(
+        -5000, '2024-03-20', 'despesa', 'Streaming', 1, categoria_id=1,
+        tipo_conta='cartao', frequencia='mensal', ocorrencias=12,
+    )
+    obter_dimensoes()
+
+    with rastreamento_sql() as rastreamento:
+        tabela = recentes.carregar_transacoes_recentes('transacoes', None, None)
+
+    assert rastreamento.alertas() == [], rastreamento.relatorio()
+    (consulta,) = rastreamento.instrucoes
+    assert 'contas' not in consulta.sql and 'categorias' not in consulta.sql
+    assert 'rec.id = t.recorrencia_id' in consulta.sql
+    linha = tabela.data[-1]
+    assert (linha['conta'], linha['categoria'], linha['recorrente']) == (
+        'Nubank',
+        'Lazer',
+        'Mensal',
+    )
+    assert linha['data'] == '2024-04-12'
+    assert 'Data de vencimento: 2024-04-12' in tabela.tooltip_data[-1]['data']['value']
@@ -0,0 +1,182 @@
+import pytest
+
+from controllers import recorrencias
+from controllers.transacoes_controller import cadastrar_transacao
+from controllers.visualizar_transacoes import (
+    editar_transacao,
+    excluir_transacao,
+    listar_pagina_transacoes,
+    obter_transacao,
+    resumir_transacoes,
+)
+from models.database import conexao
+
+
+@pytest.fixture
+def aluguel(banco, monkeypatch):
+    """
+    Aluguel semanal de 520 ocorrências, iniciado em 2024-01-01 e cadastrado
+    em 2024-01-10 (duas ocorrências já vencidas).
+    """
+    monkeypatch.setattr(recorrencias, 'hoje', lambda: '2024-01-10')
+    with conexao() as conn:
+        conn.execute(
+            "INSERT INTO contas (id, nome, tipo, saldo) VALUES (1, 'Corrente', 'conta', 0)"
+        )
+    resultado = cadastrar_transacao(
+        -100000,
+        '2024-01-01',
+        'despesa',
+        'Aluguel',
+        1,
+        tipo_conta='conta',
+        frequencia='semanal',
+        ocorrencias=520,
+    )
+    assert resultado == {'success': True, 'quantidade': 2}
+    return monkeypatch
+
+
+def _contar_gravadas():
+    with conexao() as conn:
+        return conn.execute('SELECT COUNT(*) FROM transacoes').fetchone()[0]
+
+
+def _saldo():
+    with conexao() as conn:
+        return conn.execute('SELECT saldo FROM contas WHERE id = 1').fetchone()[0]
+
+
+def test_ocorrencias_expandidas_sob_demanda(aluguel):
+    assert _contar_gravadas() == 2
+
+    janela = recorrencias.expandir_ocorrencias('2024-02-01', '2024-03-01')
+    assert [o[1] for o in janela] == [
+        '2024-02-05',
+        '2024-02-12',
+        '2024-02-19',
+        '2024-02-26',
+    ]
+    assert janela[0][5] == 'Aluguel (6/520)'
+    assert janela[0][0] == recorrencias.id_virtual(1, 6)
+    assert len(recorrencias.expandir_ocorrencias()) == 518
+
+    # As ocorrências virtuais aparecem nas listagens e nos totais do período
+    filtros = {'periodo': 'mes', 'mes': 2, 'ano': 2024}
+    pagina = listar_pagina_transacoes(filtros)
+    assert [t['data'] for t in pagina['transacoes']][:2] == [
+        '2024-02-26',
+        '2024-02-19',
+    ]
+    assert pagina['transacoes'][0]['recorrente'] == 'Semanal'
+    assert resumir_transacoes(filtros)['total_despesas'] == 4000
+
+    # Sem período, apenas as ocorrências dos próximos 12 meses (até 2025-01-10)
+    assert resumir_transacoes({})['total_registros'] == 54
+    assert resumir_transacoes({'periodo': 'ano', 'ano': 2030})['total_registros'] == 52
+
+
+def test_horizonte_sem_periodo_configuravel(aluguel, monkeypatch):
+    monkeypatch.setenv('RECORRENCIAS_HORIZONTE_MESES', '1')
+    assert recorrencias.horizonte_listagem() == '2024-02-10'
+    pagina = listar_pagina_transacoes({})
+    assert pagina['transacoes'][0]['data'] == '2024-02-05'
+    assert resumir_transacoes({})['total_registros'] == 6
+
+
+def test_janela_monta_apenas_as_ocorrencias_do_periodo(aluguel, monkeypatch):
+    with conexao() as conn:
+        conn.execute(
+            "INSERT INTO contas (id, nome, tipo, saldo, dia_fechamento, dia_vencimento) "
+            "VALUES (2, 'Nubank', 'cartao', 0, 5, 12)"
+        )
+    cadastrar_transacao(
+        -5000, '2024-01-20', 'despesa', 'Streaming', 2, tipo_conta='cartao',
+        frequencia='mensal', ocorrencias=24,
+    )
+    todas = recorrencias.expandir_ocorrencias()
+
+    montadas = []
+    montar = recorrencias._montar_ocorrencias
+    monkeypatch.setattr(
+        recorrencias,
+        '_montar_ocorrencias',
+        lambda regra, indices, *args: montadas.extend(indices) or montar(regra, indices, *args),
+    )
+    for inicio, fim in (('2024-03-01', '2024-04-01'), ('2025-01-01', '2026-01-01')):
+        montadas.clear()
+        janela = recorrencias.expandir_ocorrencias(inicio, fim)
+        # A data efetiva do cartão é o vencimento, no mês seguinte à compra
+        assert janela == [o for o in todas if inicio <= o[12] < fim]
+        assert any(o[8] == 2 and o[1] < inicio for o in janela)
+        assert len(montadas) < len(janela) + 5
+
+
+def test_materializacao_avanca_proxima_execucao(aluguel):
+    resultado = recorrencias.materializar_recorrencias('2024-01-31')
+    assert resultado == {'success': True, 'quantidade': 3}
+    # Executar de novo no mesmo dia não grava nada
+    assert recorrencias.materializar_recorrencias('2024-01-31')['quantidade'] == 0
+
+    with conexao() as conn:
+        proxima = conn.execute(
+            'SELECT proxima_execucao FROM recorrencias'
+        ).fetchone()[0]
+    assert proxima == '2024-02-05'
+    assert _contar_gravadas() == 5
+    assert _saldo() == -100000 * 5
+    assert len(recorrencias.expandir_ocorrencias()) == 515
+
+
+def test_editar_e_excluir_ocorrencia_virtual(aluguel):
+    decima = recorrencias.id_virtual(1, 10)
+    assert obter_transacao(decima)['transacao']['data'] == '2024-03-04'
+
+    dados = dict(obter_transacao(decima)['transacao'], valor=1200.0)
+    assert editar_transacao(decima, dados)['success']
+    assert _contar_gravadas() == 3
+    assert _saldo() == -100000 * 2 - 120000
+
+    excluir_transacao(recorrencias.id_virtual(1, 11))
+    ocorrencias = {o[14] for o in recorrencias.expandir_ocorrencias()}
+    assert 10 not in ocorrencias and 11 not in ocorrencias
+
+    # A ocorrência editada não é gravada de novo e a excluída não é gravada
+    recorrencias.materializar_recorrencias('2024-03-31')
+    with conexao() as conn:
+        valores = conn.execute(
+            'SELECT ocorrencia, valor FROM transacoes '
+            'WHERE ocorrencia BETWEEN 9 AND 12 ORDER BY ocorrencia'
+        ).fetchall()
+    assert valores == [(9, -100000), (10, -120000), (12, -100000)]
+
+
+def test_excluir_transacao_modelo_encerra_recorrencia(aluguel):
+    with conexao() as conn:
+        modelo = conn.execute(
+            'SELECT transacao_id FROM recorrencias'
+        ).fetchone()[0]
+
+    assert excluir_transacao(modelo)['success']
+    assert recorrencias.expandir_ocorrencias() == []
+
+
+def test_excluir_modelo_recarrega_pagina_e_totais(aluguel, callbacks_visualizacao):
+    v = callbacks_visualizacao
+    tabela, totais, _, filtros, _ = v.carregar_transacoes(
+        'visualizar-transacoes', 1, 'mes', 1, 2024, None, None, 'todas', 'todos'
+    )
+    # Cinco semanas em janeiro: o modelo, a 2ª ocorrência gravada e 3 virtuais
+    assert totais == {'receitas': 0, 'despesas': 5 * 100000}
+    linhas = tabela.children[0].data
+    modelo = next(linha for linha in linhas if linha['data'] == '2024-01-01')
+
+    resposta = v.confirmar_exclusao_transacao(
+        1, modelo['id'], [linhas.index(modelo)], filtros, 0, [], '', {}
+    )
+
+    # A página e os totais são lidos de novo: sobra apenas a 2ª ocorrência gravada
+    _, _, linhas, selecao, totais, paginas, cursores = resposta
+    assert totais == {'receitas': 0, 'despesas': 100000}
+    assert [linha['data'] for linha in linhas] == ['2024-01-08']
+    assert (selecao, paginas, cursores) == ([], 1, {})
@@ -0,0 +1,134 @@
+from controllers import recorrencias
+from controllers.transacoes_controller import cadastrar_transacao, gerar_cronograma
+from models.database import UnidadeDeTrabalho, conexao
+from models.metricas import rastrear_sql
+
+
+def _inserir_contas(conn):
+    conn.execute(
+        "INSERT INTO contas (id, nome, tipo, saldo, dia_fechamento, dia_vencimento) "
+        "VALUES (1, 'Nubank', 'cartao', 0, 5, 12)"
+    )
+    conn.execute("INSERT INTO contas (id, nome, tipo, saldo) VALUES (2, 'Corrente', 'conta', 0)")
+
+
+def test_cronograma_parte_sempre_da_data_inicial():
+    assert gerar_cronograma('2024-01-31', 4) == [
+        '2024-01-31',
+        '2024-02-29',
+        '2024-03-31',
+        '2024-04-30',
+    ]
+    assert gerar_cronograma('2024-01-01', 3, 'semanal') == [
+        '2024-01-01',
+        '2024-01-08',
+        '2024-01-15',
+    ]
+
+
+def test_parcelamento_gravado_em_lote(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+
+    resultado = cadastrar_transacao(
+        -10000, '2024-01-20', 'despesa', 'TV', 1, tipo_conta='cartao', num_parcelas=3
+    )
+    assert resultado == {'success': True, 'quantidade': 3}
+
+    with conexao() as conn:
+        parcelas = conn.execute(
+            'SELECT data, data_vencimento, valor, descricao FROM transacoes ORDER BY id'
+        ).fetchall()
+        saldo = conn.execute('SELECT saldo FROM contas WHERE id = 1').fetchone()[0]
+        parcelamento = conn.execute(
+            'SELECT valor_total, data_vencimento FROM parcelamentos'
+        ).fetchone()
+
+    assert parcelas == [
+        # 12 e 13/02/2024 são Carnaval: o vencimento passa para a quarta-feira
+        ('2024-01-20', '2024-02-14', -3334, 'TV (1/3)'),
+        ('2024-02-20', '2024-03-12', -3333, 'TV (2/3)'),
+        ('2024-03-20', '2024-04-12', -3333, 'TV (3/3)'),
+    ]
+    assert parcelamento == (10000, '2024-02-14')
+    assert saldo == 0  # parcelas só alteram o saldo quando pagas
+
+
+def test_recorrencia_grava_apenas_ocorrencias_vencidas(banco, monkeypatch):
+    monkeypatch.setattr(recorrencias, 'hoje', lambda: '2024-03-15')
+    with conexao() as conn:
+        _inserir_contas(conn)
+
+    resultado = cadastrar_transacao(
+        -150000,
+        '2024-01-10',
+        'despesa',
+        'Aluguel',
+        2,
+        tipo_conta='conta',
+        frequencia='mensal',
+        ocorrencias=360,
+    )
+    assert resultado == {'success': True, 'quantidade': 3}
+
+    with conexao() as conn:
+        linhas = conn.execute(
+            'SELECT data, descricao, ocorrencia FROM transacoes ORDER BY id'
+        ).fetchall()
+        recorrencia = conn.execute(
+            'SELECT data_fim, proxima_execucao, ocorrencias FROM recorrencias'
+        ).fetchone()
+        saldo = conn.execute('SELECT saldo FROM contas WHERE id = 2').fetchone()[0]
+
+    assert linhas == [
+        ('2024-01-10', 'Aluguel', 1),
+        ('2024-02-10', 'Aluguel (2/360)', 2),
+        ('2024-03-10', 'Aluguel (3/360)', 3),
+    ]
+    assert recorrencia == ('2053-12-10', '2024-04-10', 360)
+    assert saldo == -150000 * 3
+
+
+def test_cadastros_em_lote_numa_unica_transacao(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+
+    with rastrear_sql() as rastreamento:
+        with UnidadeDeTrabalho() as uow:
+            for dia in range(1, 29):
+                resultado = cadastrar_transacao(
+                    -1000, f'2024-02-{dia:02d}', 'despesa', 'Café', 2, uow=uow
+                )
+                assert resultado['success']
+
+    assert rastreamento.conexoes == 1
+    assert sum(i.sql == 'COMMIT' for i in rastreamento.instrucoes) == 1
+    with conexao() as conn:
+        assert conn.execute('SELECT saldo FROM contas WHERE id = 2').fetchone()[0] == -28000
+
+
+def test_formulario_usa_a_conta_cadastrada_no_servidor(banco, monkeypatch):
+    import importlib
+    import locale
+
+    # O pacote callbacks fixa o locale pt_BR, que pode não estar instalado
+    monkeypatch.setattr(locale, 'setlocale', lambda *args: 'C')
+    formulario = importlib.import_module('callbacks.transacoes')
+    with conexao() as conn:
+        _inserir_contas(conn)
+
+    # O tipo e os dias do cartão não dependem dos dados enviados pelo navegador
+    formulario.salvar_transacao(
+        1, 100, '2024-01-20', 'TV', 1, None, None, None, 'despesa',
+        'parcelado', 3, None, None, None,
+    )
+
+    with conexao() as conn:
+        parcelas = conn.execute(
+            'SELECT data_vencimento, valor FROM transacoes ORDER BY id'
+        ).fetchall()
+    assert parcelas == [
+        ('2024-02-14', -3334),
+        ('2024-03-12', -3333),
+        ('2024-04-12', -3333),
+    ]
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from verificar_callbacks import callbacks_sem_io, listar_callbacks_sem_io
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def test_callbacks_de_interface_rodam_no_navegador():
+    nomes = {nome for _, nome, _ in listar_callbacks_sem_io(RAIZ)}
+    for convertido in (
+        'mostrar_parcelamento',
+        'habilitar_campo_parcelas',
+        'mostrar_recorrencia',
+        'atualizar_texto_ocorrencias',
+        'atualizar_filtros_periodo',
+        'toggle_campos_editar_conta',
+        'toggle_campos_conta',
+    ):
+        assert convertido not in nomes
+
+
+def test_detecta_callbacks_sem_io(tmp_path):
+    arquivo = tmp_path / 'callbacks.py'
+    arquivo.write_text(
+        '''
+from dash import callback, Output, Input
+from models.database import conectar
+
+
+def contar():
+    return conectar().execute('SELECT 1').fetchone()
+
+
+def formatar(valor):
+    return f'R$ {valor}'
+
+
+@callback(Output('a', 'children'), Input('b', 'value'))
+def puro(valor):
+    return formatar(valor)
+
+
+@callback(Output('c', 'children'), Input('d', 'value'))
+def com_io(valor):
+    return contar()
+''',
+        encoding='utf-8',
+    )
+
+    assert callbacks_sem_io(arquivo) == [('puro', 15)]
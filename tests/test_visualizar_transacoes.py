@@ -0,0 +1,358 @@
+import pytest
+
+from controllers.visualizar_transacoes import (
+    TransacoesRepository,
+    listar_pagina_transacoes,
+    resumir_transacoes,
+)
+from models.database import conectar, conexao
+
+
+def _inserir_contas(conn):
+    conn.execute(
+        "INSERT INTO contas (id, nome, tipo, dia_fechamento, dia_vencimento) "
+        "VALUES (1, 'Nubank', 'cartao', 5, 12)"
+    )
+    conn.execute("INSERT INTO contas (id, nome, tipo) VALUES (2, 'Corrente', 'conta')")
+
+
+def test_data_efetiva_mantida_por_triggers(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.execute(
+            "INSERT INTO transacoes (id, data, data_vencimento, valor, tipo, conta_id) "
+            "VALUES (1, '2024-01-20', '2024-02-12', -50, 'despesa', 1)"
+        )
+        conn.execute(
+            "INSERT INTO transacoes (id, data, valor, tipo, conta_id) "
+            "VALUES (2, '2024-01-20', 100, 'receita', 2)"
+        )
+        datas = dict(conn.execute('SELECT id, data_efetiva FROM transacoes'))
+        assert datas == {1: '2024-02-12', 2: '2024-01-20'}
+
+        conn.execute("UPDATE transacoes SET data_vencimento = '2024-03-12' WHERE id = 1")
+        conn.execute("UPDATE contas SET tipo = 'conta' WHERE id = 1")
+        datas = dict(conn.execute('SELECT id, data_efetiva FROM transacoes'))
+        assert datas[1] == '2024-01-20'
+
+
+def test_filtro_de_periodo_usa_data_efetiva(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.executemany(
+            'INSERT INTO transacoes (data, data_vencimento, valor, tipo, conta_id, status) '
+            "VALUES (?, ?, ?, ?, ?, 'pendente')",
+            [
+                ('2024-01-20', '2024-02-12', -5010, 'despesa', 1),
+                ('2024-02-03', None, 10000, 'receita', 2),
+                ('2024-12-30', '2025-01-13', -1000, 'despesa', 1),
+                ('2024-02-10', '2024-02-12', 3033, 'receita', 2),
+            ],
+        )
+
+    fevereiro = TransacoesRepository.buscar_transacoes(
+        {'periodo': 'mes', 'mes': 2, 'ano': 2024}
+    )
+    ano = TransacoesRepository.buscar_transacoes({'periodo': 'ano', 'ano': 2024})
+
+    assert sorted(t['data'] for t in fevereiro['transacoes']) == [
+        '2024-02-03',
+        '2024-02-10',
+        '2024-02-12',
+    ]
+    assert fevereiro['total_despesas'] == 50.10
+    assert fevereiro['total_receitas'] == 130.33
+    assert len(ano['transacoes']) == 3
+    assert all(t['data'] < '2025-01-01' for t in ano['transacoes'])
+
+
+def test_paginacao_keyset_equivale_ao_offset(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.executemany(
+            "INSERT INTO transacoes (data, valor, tipo, conta_id) VALUES (?, ?, ?, 2)",
+            [
+                (f'2024-03-{1 + i % 5:02d}', 100 * i, 'receita' if i % 2 else 'despesa')
+                for i in range(23)
+            ],
+        )
+
+    paginas = []
+    apos = None
+    for pagina in range(3):
+        resultado = TransacoesRepository.buscar_pagina(None, 10, pagina, apos)
+        apos = resultado['cursor']
+        paginas.append([t['id'] for t in resultado['transacoes']])
+
+    por_offset = [
+        [t['id'] for t in TransacoesRepository.buscar_pagina(None, 10, p)['transacoes']]
+        for p in range(3)
+    ]
+
+    assert [len(p) for p in paginas] == [10, 10, 3]
+    assert paginas == por_offset
+    assert len({i for p in paginas for i in p}) == 23
+
+
+def test_ordem_e_cursor_usam_a_data_exibida(banco):
+    # Compras no cartão aparecem na data de vencimento, depois de transações
+    # da conta com data posterior à da compra
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.executemany(
+            'INSERT INTO transacoes (data, data_vencimento, valor, tipo, conta_id) '
+            'VALUES (?, ?, -100, ?, ?)',
+            [
+                ('2024-01-20', '2024-02-12', 'despesa', 1),
+                ('2024-02-01', None, 'despesa', 2),
+                ('2024-01-10', '2024-02-12', 'despesa', 1),
+                ('2024-02-20', None, 'despesa', 2),
+            ],
+        )
+
+    paginas = []
+    apos = None
+    for pagina in range(4):
+        resultado = TransacoesRepository.buscar_pagina(None, 1, pagina, apos)
+        apos = resultado['cursor']
+        paginas.extend((t['data'], t['id']) for t in resultado['transacoes'])
+        assert apos == [paginas[-1][0], paginas[-1][1]]
+
+    assert paginas == [
+        ('2024-02-20', 4),
+        ('2024-02-12', 3),
+        ('2024-02-12', 1),
+        ('2024-02-01', 2),
+    ]
+    assert paginas == [
+        (t['data'], t['id'])
+        for t in TransacoesRepository.buscar_pagina(None, 4)['transacoes']
+    ]
+
+
+def test_resumo_conta_registros_e_totais(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.executemany(
+            "INSERT INTO transacoes (data, valor, tipo, conta_id) VALUES ('2024-03-01', ?, ?, 2)",
+            [(1050, 'receita'), (-250, 'despesa'), (-1, 'despesa')],
+        )
+
+    resumo = TransacoesRepository.resumir_transacoes({'tipo': 'todas'})
+
+    assert resumo['total_registros'] == 3
+    assert resumo['total_receitas'] == 10.50
+    assert resumo['total_despesas'] == 2.51
+    assert resumo['saldo'] == 7.99
+
+
+def test_pagina_ordenada_e_filtrada_pela_tabela(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.executemany(
+            "INSERT INTO transacoes (data, valor, tipo, descricao, conta_id) "
+            "VALUES ('2024-03-01', ?, ?, ?, ?)",
+            [
+                (-1500, 'despesa', 'Mercado', 2),
+                (-9000, 'despesa', 'Aluguel', 2),
+                (20000, 'receita', 'Salário', 2),
+                (-4000, 'despesa', 'Mercado livre', 1),
+            ],
+        )
+
+    resultado = TransacoesRepository.buscar_pagina(
+        None,
+        10,
+        sort_by=[{'column_id': 'valor', 'direction': 'desc'}],
+        filter_query='{tipo} = Despesa && {valor} >= 20',
+    )
+    assert [t['valor'] for t in resultado['transacoes']] == [90.0, 40.0]
+
+    resumo = TransacoesRepository.resumir_transacoes(
+        None, '{conta} icontains nubank && {descricao} icontains mercado'
+    )
+    assert resumo['total_registros'] == 1
+    assert resumo['total_despesas'] == 40.0
+
+    invalido = TransacoesRepository.buscar_pagina(None, filter_query='{x} = 1')
+    assert invalido['success'] is False
+
+
+@pytest.mark.parametrize(
+    'filtros, indice',
+    [
+        ({'periodo': 'mes', 'mes': 3, 'ano': 2024}, 'idx_transacoes_efetiva_tipo_valor'),
+        (
+            {'periodo': 'ano', 'ano': 2024, 'conta_id': 1, 'tipo': 'despesa'},
+            'idx_transacoes_conta_efetiva_tipo_valor',
+        ),
+        (
+            {'periodo': 'ano', 'ano': 2024, 'categoria_id': 1},
+            'idx_transacoes_categoria_efetiva_tipo_valor',
+        ),
+    ],
+)
+def test_totais_lidos_apenas_do_indice(banco, filtros, indice):
+    conn = conectar()
+    consultas = []
+    conn.set_trace_callback(consultas.append)
+    TransacoesRepository.calcular_totais(conn.cursor(), filtros)
+    conn.set_trace_callback(None)
+
+    plano = ' | '.join(
+        linha[3] for linha in conn.execute('EXPLAIN QUERY PLAN ' + consultas[-1])
+    )
+    conn.close()
+
+    assert plano.startswith(f'SEARCH t USING COVERING INDEX {indice} ')
+
+
+def test_listagem_em_cache_ate_a_proxima_escrita(banco):
+    from controllers.visualizar_transacoes import estatisticas_cache
+
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.execute(
+            "INSERT INTO transacoes (id, data, valor, tipo, conta_id) "
+            "VALUES (1, '2024-03-01', 1000, 'receita', 2)"
+        )
+
+    antes = estatisticas_cache()
+    filtros = {'periodo': 'mes', 'mes': '3', 'ano': 2024, 'tipo': 'todas'}
+    primeira = TransacoesRepository.buscar_transacoes(filtros)
+    segunda = TransacoesRepository.buscar_transacoes(
+        {'periodo': 'mes', 'mes': 3, 'ano': '2024', 'conta_id': None}
+    )
+    depois = estatisticas_cache()
+
+    assert segunda is primeira
+    assert depois['acertos'] - antes['acertos'] == 1
+    assert depois['falhas'] - antes['falhas'] == 1
+
+    TransacoesRepository.atualizar_transacao(
+        1,
+        {
+            'data': '2024-03-01',
+            'valor': 25,
+            'tipo': 'receita',
+            'descricao': None,
+            'conta_id': 2,
+            'categoria_id': None,
+            'responsavel_id': None,
+            'pagamento_id': None,
+            'status': 'pendente',
+        },
+    )
+    assert TransacoesRepository.buscar_transacoes(filtros)['total_receitas'] == 25.0
+
+
+def test_lote_materializa_apenas_os_campos_pedidos(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.execute(
+            "INSERT INTO transacoes (id, data, data_vencimento, valor, tipo, conta_id, status) "
+            "VALUES (1, '2024-01-20', '2024-02-12', -5010, 'despesa', 1, 'pendente')"
+        )
+
+    lote = TransacoesRepository.buscar_transacoes()['transacoes']
+
+    assert len(lote) == 1
+    assert lote.para_dicionarios(('id', 'data', 'valor', 'tipo')) == [
+        {'id': 1, 'data': '2024-02-12', 'valor': 50.10, 'tipo': 'Despesa'}
+    ]
+    assert lote.coluna('valor_original') == [-50.10]
+
+    registro = lote[0]
+    assert registro['conta'] == 'Nubank'
+    assert registro['data_original'] == '2024-01-20'
+    assert registro.get('inexistente') is None
+    assert registro.para_dicionario()['recorrente'] == 'Não'
+
+
+def test_edicao_devolve_o_necessario_para_atualizar_a_linha(banco):
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.execute(
+            "INSERT INTO transacoes (id, data, valor, tipo, conta_id, status) "
+            "VALUES (1, '2024-03-10', -2500, 'despesa', 2, 'pendente')"
+        )
+    marco = {'periodo': 'mes', 'mes': 3, 'ano': 2024}
+    dados = {
+        'tipo': 'despesa',
+        'valor': 30.0,
+        'data': '2024-03-10',
+        'descricao': 'Mercado',
+        'conta_id': 2,
+        'categoria_id': None,
+        'responsavel_id': None,
+        'pagamento_id': None,
+        'status': 'pendente',
+    }
+
+    resultado = TransacoesRepository.atualizar_transacao(1, dados)
+    assert resultado['transacao_id'] == 1
+    assert resultado['anterior'] == {'tipo': 'despesa', 'valor': -2500}
+
+    linha = TransacoesRepository.obter_linha(1, marco)['transacoes']
+    assert [t['valor'] for t in linha] == [30.0]
+
+    # Fora do período filtrado, a linha sai da tabela
+    TransacoesRepository.atualizar_transacao(1, dict(dados, data='2024-04-01'))
+    assert not TransacoesRepository.obter_linha(1, marco)['transacoes']
+
+    excluida = TransacoesRepository.excluir_transacao(1)['excluida']
+    assert excluida == {'tipo': 'despesa', 'valor': -3000}
+
+
+def _aplicar(patch, dados):
+    """
+    Aplica as operações de um dash.Patch a uma cópia dos dados.
+    """
+    dados = type(dados)(dados)
+    for operacao in patch.to_plotly_json()['operations']:
+        (local,), params = operacao['location'], operacao['params']
+        if operacao['operation'] == 'Delete':
+            del dados[local]
+        elif operacao['operation'] == 'Assign':
+            dados[local] = params['value']
+        else:
+            sinal = 1 if operacao['operation'] == 'Add' else -1
+            dados[local] += sinal * params['value']
+    return dados
+
+
+def test_edicao_e_exclusao_respeitam_o_filtro_das_colunas(banco, callbacks_visualizacao):
+    v = callbacks_visualizacao
+    with conexao() as conn:
+        _inserir_contas(conn)
+        conn.executemany(
+            "INSERT INTO transacoes (id, data, valor, tipo, conta_id, status) "
+            "VALUES (?, ?, -1000, 'despesa', 2, 'pendente')",
+            [(i, f'2024-03-{i:02d}') for i in range(1, 17)],
+        )
+    filtros = {'periodo': 'mes', 'mes': 3, 'ano': 2024}
+    despesas = '{tipo} = Despesa'
+    linhas = v.linhas_tabela(
+        listar_pagina_transacoes(filtros, v.TAMANHO_PAGINA, 0, filter_query=despesas)[
+            'transacoes'
+        ]
+    )
+    totais = v.totais_do_resumo(resumir_transacoes(filtros))
+    cursores = {'0': [linhas[-1]['data'], linhas[-1]['id']], '1': ['2024-03-01', 1]}
+
+    # Virar receita tira a linha da tabela filtrada, mas ela continua nos totais
+    editada = linhas[0]
+    resposta = v.salvar_edicao_transacao(
+        1, editada['id'], 'receita', 10.0, '2024-03-16', 'Estorno', 2, None, None,
+        None, 'pendente', filtros, [0], 0, [], despesas, cursores,
+    )
+    _, _, _, tabela, selecao, ajuste, paginas, novos_cursores = resposta
+    assert _aplicar(tabela, linhas) == linhas[1:]
+    assert _aplicar(ajuste, totais) == v.totais_do_resumo(resumir_transacoes(filtros))
+    assert (selecao, paginas, novos_cursores) == ([], 1, {})
+
+    # Excluir na segunda página mantém apenas os cursores das anteriores
+    resposta = v.confirmar_exclusao_transacao(
+        1, 1, [0], filtros, 1, [], despesas, cursores
+    )
+    assert resposta[-2:] == (1, {'0': cursores['0']})
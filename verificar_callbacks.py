@@ -0,0 +1,127 @@
+"""
+Script para listar os callbacks executados no servidor que não fazem I/O.
+
+Um callback que só transforma as suas entradas (mostrar/esconder campos,
+habilitar filtros, trocar textos) custa uma requisição ao servidor a cada
+interação e deve ser escrito como clientside_callback. O script analisa o código
+dos módulos de callbacks e views (sem importá-los) e aponta as funções decoradas
+com @callback que não usam, direta ou indiretamente, nada de controllers, models
+ou sqlite3.
+"""
+
+import ast
+import sys
+from pathlib import Path
+
+# Arquivos e diretórios analisados, relativos à raiz do projeto
+ALVOS = ('app.py', 'callbacks', 'views')
+
+# Módulos cujo uso caracteriza um callback que faz I/O
+MODULOS_IO = ('controllers', 'models', 'sqlite3')
+
+
+def _eh_modulo_io(nome):
+    return any(nome == modulo or nome.startswith(modulo + '.') for modulo in MODULOS_IO)
+
+
+def _eh_callback(funcao):
+    """
+    Verifica se a função é decorada com @callback ou @app.callback.
+    """
+    for decorador in funcao.decorator_list:
+        alvo = decorador.func if isinstance(decorador, ast.Call) else decorador
+        if isinstance(alvo, ast.Name) and alvo.id == 'callback':
+            return True
+        if isinstance(alvo, ast.Attribute) and alvo.attr == 'callback':
+            return True
+    return False
+
+
+def _nomes_usados(funcao):
+    return {no.id for no in ast.walk(funcao) if isinstance(no, ast.Name)}
+
+
+def _nomes_io(arvore):
+    """
+    Retorna os nomes do módulo que levam a I/O: os importados de controllers,
+    models ou sqlite3 e as funções do próprio módulo que os usam.
+    """
+    nomes = set()
+    for no in arvore.body:
+        if isinstance(no, ast.ImportFrom) and no.module and _eh_modulo_io(no.module):
+            nomes.update(alias.asname or alias.name for alias in no.names)
+        elif isinstance(no, ast.Import):
+            nomes.update(
+                alias.asname or alias.name.split('.')[0]
+                for alias in no.names
+                if _eh_modulo_io(alias.name)
+            )
+
+    auxiliares = [
+        no
+        for no in arvore.body
+        if isinstance(no, ast.FunctionDef) and not _eh_callback(no)
+    ]
+    # Propaga até estabilizar: auxiliares que chamam auxiliares com I/O
+    alterou = True
+    while alterou:
+        alterou = False
+        for funcao in auxiliares:
+            if funcao.name not in nomes and _nomes_usados(funcao) & nomes:
+                nomes.add(funcao.name)
+                alterou = True
+    return nomes
+
+
+def callbacks_sem_io(caminho):
+    """
+    Lista os callbacks de servidor de um arquivo que não fazem I/O.
+
+    :param caminho: Caminho do arquivo Python
+    :return: Lista de tuplas (nome da função, linha)
+    """
+    arvore = ast.parse(Path(caminho).read_text(encoding='utf-8'))
+    nomes = _nomes_io(arvore)
+    return [
+        (no.name, no.lineno)
+        for no in arvore.body
+        if isinstance(no, ast.FunctionDef)
+        and _eh_callback(no)
+        and not _nomes_usados(no) & nomes
+    ]
+
+
+def listar_callbacks_sem_io(raiz='.'):
+    """
+    Lista os callbacks de servidor do projeto que não fazem I/O.
+
+    :param raiz: Diretório raiz do projeto
+    :return: Lista de tuplas (caminho relativo, nome da função, linha)
+    """
+    raiz = Path(raiz)
+    arquivos = []
+    for alvo in ALVOS:
+        caminho = raiz / alvo
+        if caminho.is_dir():
+            arquivos.extend(sorted(caminho.rglob('*.py')))
+        elif caminho.exists():
+            arquivos.append(caminho)
+
+    return [
+        (arquivo.relative_to(raiz).as_posix(), nome, linha)
+        for arquivo in arquivos
+        for nome, linha in callbacks_sem_io(arquivo)
+    ]
+
+
+if __name__ == '__main__':
+    encontrados = listar_callbacks_sem_io(Path(__file__).parent)
+    if not encontrados:
+        print('Nenhum callback de servidor sem I/O encontrado.')
+        sys.exit(0)
+
+    print('Callbacks de servidor que não fazem I/O (candidatos a clientside):')
+    for arquivo, nome, linha in encontrados:
+        print(f'  {arquivo}:{linha} {nome}')
+    # Código de saída diferente de zero para uso em verificações automáticas
+    sys.exit(1)
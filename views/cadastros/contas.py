@@ -2,7 +2,7 @@
 Este módulo define os componentes de interface para o cadastro e listagem de contas.
 """
 
-from dash import html, dash_table, callback, Input, Output
+from dash import html, dash_table, clientside_callback, Input, Output
 import dash_bootstrap_components as dbc
 
 
@@ -199,7 +199,17 @@ def tabela_contas():
     )
 
 
-@callback(
+# Mostra/esconde os campos específicos do tipo de conta no navegador
+clientside_callback(
+    """
+    function(tipoConta) {
+        const cartao = tipoConta === 'cartao';
+        return [
+            {display: cartao ? 'block' : 'none'},
+            {display: cartao ? 'none' : 'block'}
+        ];
+    }
+    """,
     [
         Output('campos-cartao-credito', 'style', allow_duplicate=True),
         Output('campos-outros-tipos', 'style', allow_duplicate=True),
@@ -207,11 +217,3 @@ def tabela_contas():
     [Input('select-tipo-conta', 'value')],
     prevent_initial_call=True,
 )
-def toggle_campos_conta(tipo_conta):
-    """
-    Callback para mostrar/esconder campos específicos de acordo com o tipo de conta.
-    """
-    if tipo_conta == 'cartao':
-        return {'display': 'block'}, {'display': 'none'}
-    else:
-        return {'display': 'none'}, {'display': 'block'}
@@ -15,8 +15,8 @@ def transacoes_layout():
     """
     return html.Div(
         [
-            # Componente para armazenar o tipo da conta selecionada
-            dcc.Store(id='transacao-conta-tipo'),
+            # Tipo e dias de fechamento/vencimento de cada conta do dropdown
+            dcc.Store(id='transacao-contas'),
             dbc.Row(
                 [
                     # Formulário de nova transação
@@ -309,10 +309,12 @@ def get_layout():
                     ),
                     dbc.CardBody(
                         [
+                            # Mensagens de seleção, edição e exclusão
+                            html.Div(id='feedback-visualizar-transacoes'),
                             html.Div(
                                 id='tabela-visualizar-transacoes',
                                 className='table-responsive',
-                            )
+                            ),
                         ]
                     ),
                 ]
@@ -536,5 +538,10 @@ def get_layout():
             ),
             # Store para ID da transação a ser excluída
             dcc.Store(id='transacao-excluir-id'),
+            # Stores com os filtros aplicados e os cursores das páginas já visitadas
+            dcc.Store(id='filtros-transacoes'),
+            dcc.Store(id='paginacao-transacoes'),
+            # Totais de receitas e despesas (em centavos) exibidos nos badges
+            dcc.Store(id='totais-transacoes'),
         ]
     )